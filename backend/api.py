@@ -1,29 +1,140 @@
+import json
 import os
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from ml_scheduler import MLScheduler
-from google.generativeai.client import configure
-from google.generativeai.generative_models import GenerativeModel
+import time
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables (every setting below may come from .env)
 load_dotenv()
+from observability import (
+    CHAT_CACHE, CHAT_FALLBACKS, HTTP_REQUEST_SECONDS, KB_LOOKUPS, LLM_ERRORS, REGISTRY,
+    STAGE_SECONDS, configure_logging, get_logger, stage,
+)
+from startup import BootReport, Lazy
+
+configure_logging()
+log = get_logger("api")
+boot = BootReport()
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from flask_cors import CORS
+from chat_cache import ChatAnswerCache, normalize_prompt
+from llm_client import FakeLLMClient, GeminiClient, LLMBusyError, PooledLLMClient
+boot.mark("flask imports")
+
+# Heavy subsystems (Gemini SDK, NumPy/ML model) are built on first use so
+# workers boot fast. Set API_PRELOAD=1 to build them all at startup instead.
+PRELOAD = os.getenv("API_PRELOAD", "").lower() in ("1", "true", "yes")
+# ONLINE_LEARNING=1 learns from submitted workloads and hot-swaps the model.
+ONLINE_LEARNING = os.getenv("ONLINE_LEARNING", "").lower() in ("1", "true", "yes")
 
-# Configure Gemini API
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-if not gemini_api_key:
-    print("GEMINI_API_KEY not found. Falling back to local knowledge base.")
-    model = None
-else:
+
+def _create_llm():
+    # LLM_CLIENT=fake streams canned local answers (no network, no API key);
+    # LLM_FAKE_DELAY adds seconds per word to mimic a slow model.
+    if os.getenv("LLM_CLIENT", "").lower() == "fake":
+        log.info("using local fake LLM client")
+        return FakeLLMClient(delay=float(os.getenv("LLM_FAKE_DELAY", "0")))
+
+    # Configure Gemini API
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        log.warning("GEMINI_API_KEY not found; falling back to local knowledge base")
+        return None
     try:
+        from google.generativeai.client import configure
+        from google.generativeai.generative_models import GenerativeModel
+
         configure(api_key=gemini_api_key)
         # Updated to use current Gemini model name
         model = GenerativeModel("gemini-2.5-flash")
-        print("Gemini AI initialized successfully with model: gemini-2.5-flash")
+        log.info("gemini initialized", model="gemini-2.5-flash")
+        return GeminiClient(model)
     except Exception as e:
-        print(f"Error initializing Gemini: {e}")
-        print("Chatbot will fall back to local knowledge base")
-        model = None
+        log.error("gemini initialization failed; chat will use the knowledge base", error=str(e))
+        return None
+
+
+def _init_llm():
+    client = _create_llm()
+    if client is None:
+        return None
+    # Bound upstream concurrency and per-call latency for every chat request.
+    # Chats beyond LLM_MAX_WAITING queued calls get the knowledge-base answer
+    # instead of holding a request thread that predictions need.
+    return PooledLLMClient(
+        client,
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+        max_waiting=int(os.getenv("LLM_MAX_WAITING", "8")),
+    )
+
+
+def _init_knowledge_base():
+    from knowledge_base import OS_KNOWLEDGE_BASE, KnowledgeBase
+
+    # KNOWLEDGE_BASE_PATH adds (or overrides) entries from a JSON/JSONL corpus.
+    path = os.getenv("KNOWLEDGE_BASE_PATH")
+    if path:
+        return KnowledgeBase.load(path)
+    return KnowledgeBase.from_mapping(OS_KNOWLEDGE_BASE)
+
+
+def _init_model_registry():
+    from dataset_cache import DEFAULT_DIRECTORY, DatasetCache
+    from model_registry import ModelRegistry
+    from model_selection import ModelBudget
+
+    # Load the recommender once; every request shares the published model.
+    # MODEL_BUDGET_* makes retrains pick the best model within a latency/size budget.
+    # Retrains read labeled synthetic data from DATASET_CACHE_DIR (empty disables the cache)
+    # and publish to SCHEDULER_STATE_DIR (default model_state/ beside the model file).
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_scheduler.pkl")
+    cache_dir = os.getenv("DATASET_CACHE_DIR", str(DEFAULT_DIRECTORY))
+    registry = ModelRegistry(
+        model_path=os.getenv("SCHEDULER_MODEL_PATH", default_path),
+        budget=ModelBudget.from_env(),
+        dataset_cache=DatasetCache(cache_dir) if cache_dir else None,
+        state_dir=os.getenv("SCHEDULER_STATE_DIR") or None,
+    )
+    registry.load()
+    return registry
+
+
+def _init_inference_pool():
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=int(os.getenv("INFERENCE_THREADS", "2")), thread_name_prefix="inference")
+
+
+def _init_online_learner():
+    from online_learning import OnlineLearner, TrainingBuffer
+
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "online_buffer")
+    learner = OnlineLearner(
+        model_registry.get(),
+        TrainingBuffer(os.getenv("ONLINE_BUFFER_DIR", default_dir)),
+        interval=float(os.getenv("ONLINE_RETRAIN_INTERVAL", "300")),
+        min_new_rows=int(os.getenv("ONLINE_MIN_SAMPLES", "200")),
+    )
+    learner.start()
+    return learner
+
+
+llm = Lazy("llm", _init_llm, boot)
+knowledge_base = Lazy("knowledge base", _init_knowledge_base, boot)
+chat_cache = ChatAnswerCache()
+model_registry = Lazy("model registry", _init_model_registry, boot)
+online_learner = Lazy("online learner", _init_online_learner, boot)
+# Built on first use, so under serve.py each worker creates its own after fork.
+inference_pool = Lazy("inference pool", _init_inference_pool, boot)
+
+
+def run_inference(fn, *args):
+    """
+    Run CPU-bound work (prediction, simulation) on the small inference pool and
+    wait for it. Request threads stay free to wait on I/O, and CPU work is
+    capped at INFERENCE_THREADS per process however many requests are open.
+    """
+    return inference_pool.get().submit(fn, *args).result()
 
 app = Flask(__name__)
 # Allow all origins for development
@@ -42,75 +153,206 @@ CORS(app, resources={
     }
 })
 
-# Local knowledge base for OS concepts
-OS_KNOWLEDGE_BASE = {
-    'process': 'A **process** is a program in execution. It includes the program code and its current activity. Each process has its own memory space, file handles, and system resources.',
-    'thread': 'A **thread** is the smallest unit of processing that can be performed in an OS. Threads within the same process share the same memory space but have their own program counters and stack.',
-    'scheduling': '**CPU Scheduling** is the process of determining which process will use the CPU when multiple processes are ready to execute. Common algorithms include FCFS, SJF, Priority, Round Robin, and Multilevel Queue.',
-    'paging': '**Paging** is a memory management scheme that divides memory into fixed-size blocks called pages. It allows the physical address space of a process to be non-contiguous.',
-    'segmentation': '**Segmentation** is a memory management technique that divides memory into segments of varying sizes. Each segment represents a logical unit like code, data, or stack.',
-    'virtual memory': '**Virtual Memory** is a memory management technique that provides an idealized abstraction of the storage resources available on a machine, allowing execution of processes that may not be completely in memory.',
-    'deadlock': 'A **deadlock** is a situation where a set of processes are blocked because each process is holding a resource and waiting for another resource acquired by some other process.',
-    'synchronization': '**Synchronization** is the coordination of multiple processes or threads to ensure proper execution order and prevent race conditions.',
-    'concurrency': '**Concurrency** is the ability of different parts or units of a program to be executed out-of-order or in partial order, without affecting the final outcome.',
-    'file system': 'A **file system** is a method for storing and organizing computer files and the data they contain, including file attributes, directory structure, and file allocation methods.',
-    'memory management': "**Memory Management** involves managing the computer's primary memory, including memory allocation, swapping, and memory protection.",
-    'disk scheduling': '**Disk Scheduling** algorithms determine the order in which disk I/O requests are processed, including FCFS, SSTF, SCAN, and C-SCAN algorithms.',
-    'interprocess communication': '**Interprocess Communication (IPC)** mechanisms allow processes to communicate and synchronize their actions, including shared memory, message passing, pipes, and sockets.'
-}
+def _answer_prompt(prompt):
+    return f"""You are an expert in Operating Systems.
+            Provide a clear, concise, and accurate response to the following question about operating systems:
+            {prompt}
+
+            If the question is not related to operating systems, politely explain that you specialize in OS topics.
+            Keep your response focused and educational."""
+
+
+def _continuation_prompt(response_text):
+    return f"Continue and complete the previous answer without repeating it. Prior content: {response_text}"
+
+
+ANSWER_MAX_TOKENS = 2048  # allow longer answers to avoid mid-sentence cut-offs
+CONTINUATION_MAX_TOKENS = 1024
+
+
+def _log_llm_error(e):
+    error_str = str(e)
+    if isinstance(e, LLMBusyError):
+        LLM_ERRORS.labels("busy").inc()
+        log.warning("llm pool busy; falling back to local knowledge base")
+    elif "429" in error_str or "quota" in error_str.lower():
+        LLM_ERRORS.labels("quota").inc()
+        log.warning("gemini quota exceeded; falling back to local knowledge base")
+    else:
+        LLM_ERRORS.labels("other").inc()
+        log.error("gemini call failed", error=error_str)
+
 
 def generate_gemini_response(prompt):
-    """Generate a response using Gemini AI"""
-    if not model:
+    """
+    Generate a response using Gemini AI. Answers are cached per normalized
+    prompt, and concurrent identical prompts share one upstream call.
+    """
+    if not llm.get():
         return None
+    response_text, how = chat_cache.get_or_compute(prompt, lambda: _generate_uncached(prompt))
+    CHAT_CACHE.labels(how).inc()
+    if how != "computed":
+        log.info("chat answer served from cache", how=how)
+    return response_text
 
-    try:
-        response = model.generate_content(
-            f"""You are an expert in Operating Systems.
-            Provide a clear, concise, and accurate response to the following question about operating systems:
-            {prompt}
 
-            If the question is not related to operating systems, politely explain that you specialize in OS topics.
-            Keep your response focused and educational.""",
-            generation_config={
-                "temperature": 0.5,
-                "max_output_tokens": 2048,  # allow longer answers to avoid mid-sentence cut-offs
-            },
-        )
+def _generate_uncached(prompt):
+    client = llm.get()
 
-        response_text = response.text or ""
+    try:
+        with stage("llm_call"):
+            response = client.generate(_answer_prompt(prompt), ANSWER_MAX_TOKENS)
+        response_text = response.text
 
         # Log usage/finish info to help diagnose truncation
-        usage = getattr(response, "usage_metadata", None)
-        finish_reason = None
-        if getattr(response, "candidates", None):
-            finish_reason = getattr(response.candidates[0], "finish_reason", None)
-        if usage or finish_reason:
-            print(f"[Gemini] finish_reason={finish_reason}, usage={usage}")
+        if response.usage or response.finish_reason:
+            log.info("llm answer", finish_reason=response.finish_reason, usage=response.usage)
 
         # If the model stopped due to token limit, try to continue once
-        if finish_reason and str(finish_reason).upper() == "MAX_TOKENS":
+        if response.finish_reason == "MAX_TOKENS":
             try:
-                continuation = model.generate_content(
-                    f"Continue and complete the previous answer without repeating it. Prior content: {response_text}",
-                    generation_config={
-                        "temperature": 0.5,
-                        "max_output_tokens": 1024,
-                    },
-                )
-                response_text += "\n\n" + (continuation.text or "")
+                with stage("llm_continuation"):
+                    continuation = client.generate(_continuation_prompt(response_text), CONTINUATION_MAX_TOKENS)
+                response_text += "\n\n" + continuation.text
             except Exception as cont_err:
-                print(f"[Gemini] Error requesting continuation: {cont_err}")
+                log.error("llm continuation failed", error=str(cont_err))
 
         return response_text
     except Exception as e:
-        error_str = str(e)
-        if "429" in error_str or "quota" in error_str.lower():
-            print("Gemini API quota exceeded - falling back to local knowledge base")
-            return None
-        else:
-            print(f"Error generating Gemini response: {e}")
-            return None
+        _log_llm_error(e)
+        return None
+
+
+def stream_gemini_response(prompt):
+    """
+    Yield answer text as the model produces it, then stream the continuation
+    if the answer hit the token limit. Errors propagate to the caller.
+    """
+    client = llm.get()
+    if not client:
+        return
+
+    # Stream stages span first request to last chunk, including time spent
+    # handing chunks to the client.
+    parts, finish_reason, usage = [], None, None
+    started = time.perf_counter()
+    for chunk in client.stream(_answer_prompt(prompt), ANSWER_MAX_TOKENS):
+        finish_reason = chunk.finish_reason or finish_reason
+        usage = chunk.usage or usage
+        if chunk.text:
+            parts.append(chunk.text)
+            yield chunk.text
+    STAGE_SECONDS.labels("llm_call").observe(time.perf_counter() - started)
+    if usage or finish_reason:
+        log.info("llm answer", finish_reason=finish_reason, usage=usage, streamed=True)
+
+    if finish_reason == "MAX_TOKENS":
+        try:
+            yield "\n\n"
+            started = time.perf_counter()
+            for chunk in client.stream(_continuation_prompt("".join(parts)), CONTINUATION_MAX_TOKENS):
+                if chunk.text:
+                    yield chunk.text
+            STAGE_SECONDS.labels("llm_continuation").observe(time.perf_counter() - started)
+        except Exception as cont_err:
+            log.error("llm continuation failed", error=str(cont_err))
+
+
+def local_answer(user_message):
+    """Knowledge-base (or canned fallback) answer when the LLM has nothing."""
+    with stage("kb_fallback"):
+        match = knowledge_base.get().lookup(user_message)
+    if match:
+        KB_LOOKUPS.labels(match.method).inc()
+        log.info("knowledge base match", term=match.term, method=match.method)
+        return match.answer
+
+    fallback_responses = [
+        "I'm having trouble generating a response. Could you rephrase your question about operating systems?",
+        "That's an interesting question! I'm having some technical difficulties right now. Could you try asking in a different way?",
+        "I specialize in operating system concepts. Could you ask me something about processes, memory management, or file systems?"
+    ]
+    KB_LOOKUPS.labels("miss").inc()
+    log.info("no knowledge base match; using canned response")
+    return fallback_responses[len(user_message) % len(fallback_responses)]
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def chat_events(user_message):
+    """
+    Server-sent events for a streamed answer: "delta" events carry text, then
+    one "done" event names the source. Cached answers, and answers to an
+    identical prompt already in flight, arrive as a single delta. If the model
+    fails before producing anything, the local answer is sent instead; a
+    mid-answer failure ends the stream with an "error" event.
+    """
+    key = normalize_prompt(user_message)
+    cached = chat_cache.answers.get(key)
+    if cached:
+        CHAT_CACHE.labels("cache").inc()
+        log.info("chat answer served from cache", how="cache")
+        yield _sse("delta", {"text": cached})
+        yield _sse("done", {"source": "cache"})
+        return
+
+    flight, leader = chat_cache.flights.begin(key)
+    if not leader:
+        try:
+            shared = flight.result()
+        except Exception:
+            shared = None
+        if shared:
+            CHAT_CACHE.labels("coalesced").inc()
+            log.info("chat answer served from cache", how="coalesced")
+            yield _sse("delta", {"text": shared})
+            yield _sse("done", {"source": "coalesced"})
+            return
+    else:
+        parts, completed = [], False
+        try:
+            for text in stream_gemini_response(user_message):
+                parts.append(text)
+                yield _sse("delta", {"text": text})
+            completed = True
+        except Exception as e:
+            _log_llm_error(e)
+            if parts:
+                yield _sse("error", {"error": str(e)})
+                return
+        finally:
+            answer = "".join(parts) if completed else None
+            if answer:
+                chat_cache.answers.set(key, answer)
+            chat_cache.flights.finish(key, answer)
+
+        if parts:
+            CHAT_CACHE.labels("computed").inc()
+            log.info("chat answer streamed from llm")
+            yield _sse("done", {"source": "llm"})
+            return
+
+    _count_fallback()
+    yield _sse("delta", {"text": local_answer(user_message)})
+    yield _sse("done", {"source": "local"})
+
+
+def _count_fallback():
+    reason = "llm_unavailable" if not llm.get() else "llm_failed"
+    CHAT_FALLBACKS.labels(reason).inc()
+    log.info("chat falling back to knowledge base", reason=reason)
+
+
+def _wants_stream(data):
+    return (
+        bool(data.get("stream"))
+        or request.args.get("stream", "").lower() in ("1", "true")
+        or "text/event-stream" in request.headers.get("Accept", "")
+    )
+
 
 @app.route("/api/chat", methods=["POST", "OPTIONS"])
 def chat():
@@ -123,45 +365,36 @@ def chat():
         return response
 
     try:
-        data = request.get_json()
-        user_message = data.get("message", "").strip()
+        with stage("request_parse"):
+            data = request.get_json()
+            user_message = data.get("message", "").strip()
 
         if not user_message:
             return jsonify({"error": "No message provided"}), 400
 
-        print(f"[Chat Request] Message: {user_message}")
+        log.info("chat request", message=user_message[:200])
+
+        if _wants_stream(data):
+            return Response(
+                stream_with_context(chat_events(user_message)),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
 
         # First try to get a response from Gemini
         response_text = generate_gemini_response(user_message)
 
         if response_text:
-            print("[Chat Response] Response from Gemini AI")
+            log.info("chat answer from llm")
         else:
-            print("[Chat Response] Gemini unavailable, using knowledge base")
-
-        # If Gemini fails or returns None, fall back to the knowledge base
-        if not response_text:
-            user_message_lower = user_message.lower()
-            for term, explanation in OS_KNOWLEDGE_BASE.items():
-                if term in user_message_lower:
-                    response_text = explanation
-                    print(f"[Chat Response] Matched knowledge base term: {term}")
-                    break
-
-        # If still no response, use a fallback
-        if not response_text:
-            fallback_responses = [
-                "I'm having trouble generating a response. Could you rephrase your question about operating systems?",
-                "That's an interesting question! I'm having some technical difficulties right now. Could you try asking in a different way?",
-                "I specialize in operating system concepts. Could you ask me something about processes, memory management, or file systems?"
-            ]
-            response_text = fallback_responses[len(user_message) % len(fallback_responses)]
-            print("[Chat Response] Using fallback response")
+            _count_fallback()
+            # If Gemini fails or returns None, fall back to the knowledge base
+            response_text = local_answer(user_message)
 
         return jsonify({"response": response_text})
 
     except Exception as e:
-        print(f"[Chat Error] {str(e)}")
+        log.error("chat request failed", error=str(e))
         return jsonify({
             "error": str(e),
             "message": "Error processing your request."
@@ -170,19 +403,49 @@ def chat():
 @app.route("/api/suggest-algorithm", methods=["POST"])
 def suggest_algorithm():
     try:
-        data = request.get_json()
-        processes = data.get("processes", [])
+        with stage("request_parse"):
+            data = request.get_json()
+            processes = data.get("processes", [])
 
         if not processes:
             return jsonify({"error": "No processes provided"}), 400
 
-        # Initialize ML scheduler
-        ml_scheduler = MLScheduler()
-        suggested_algorithm, confidence = ml_scheduler.predict_with_confidence(processes)
+        suggested_algorithm, confidence, source = run_inference(model_registry.get().predict_with_confidence, processes)
+        if ONLINE_LEARNING:
+            online_learner.get().record(processes)
 
         return jsonify({
             "suggested_algorithm": suggested_algorithm,
-            "confidence": confidence
+            "confidence": confidence,
+            "source": source,
+            "model_version": model_registry.get().version,
+        })
+
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Error processing your request."
+        }), 500
+
+@app.route("/api/suggest-algorithm/batch", methods=["POST"])
+def suggest_algorithm_batch():
+    try:
+        with stage("request_parse"):
+            data = request.get_json()
+            workloads = data.get("workloads", [])
+
+        if not isinstance(workloads, list) or not workloads:
+            return jsonify({"error": "No workloads provided"}), 400
+
+        results = run_inference(model_registry.get().predict_batch, workloads)
+        if ONLINE_LEARNING:
+            for processes in workloads:
+                if isinstance(processes, list) and processes:
+                    online_learner.get().record(processes)
+
+        return jsonify({
+            "results": results,
+            "model_version": model_registry.get().version,
         })
 
     except Exception as e:
@@ -191,12 +454,126 @@ def suggest_algorithm():
             "message": "Error processing your request."
         }), 500
 
+@app.route("/api/suggest-algorithm/ingest", methods=["POST"])
+def suggest_algorithm_ingest():
+    # Imported here so NumPy stays off the boot path (see PRELOAD).
+    import workload_stream
+
+    # The body (or an uploaded "file") is read line by line, never buffered whole.
+    upload = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+    stream = upload.stream if upload else request.stream
+    fmt = request.args.get("format") or workload_stream.format_from_content_type(
+        upload.mimetype if upload else request.content_type
+    )
+    try:
+        with stage("feature_extraction"):
+            features, count = workload_stream.features_from_stream(stream, fmt)
+        suggested_algorithm, confidence, source = run_inference(model_registry.get().predict_features, features)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Error processing your request."
+        }), 500
+
+    return jsonify({
+        "suggested_algorithm": suggested_algorithm,
+        "confidence": confidence,
+        "source": source,
+        "process_count": count,
+        "model_version": model_registry.get().version,
+    })
+
+@app.route("/api/simulate", methods=["POST"])
+def simulate_schedules():
+    # Imported here so NumPy stays off the boot path (see PRELOAD).
+    import simulation
+
+    try:
+        with stage("request_parse"):
+            data = request.get_json() or {}
+            wants_stream = bool(data.get("stream")) or "application/x-ndjson" in request.headers.get("Accept", "")
+            req = simulation.SimulationRequest.parse(data, stream=wants_stream)
+        schedules = run_inference(simulation.simulate, req)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Error processing your request."
+        }), 500
+
+    if wants_stream:
+        return Response(stream_with_context(simulation.stream(req, schedules)), mimetype="application/x-ndjson")
+    return jsonify(simulation.page(req, schedules))
+
+@app.route("/api/simulate/sweep", methods=["POST"])
+def sweep_quanta():
+    import quantum_sweep
+
+    try:
+        with stage("request_parse"):
+            req = quantum_sweep.SweepRequest.parse(request.get_json() or {})
+        return jsonify(run_inference(quantum_sweep.sweep, req))
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Error processing your request."
+        }), 500
+
+@app.route("/api/chat/status", methods=["GET"])
+def chat_status():
+    return jsonify({"llm_ready": bool(llm.get()), "cache": chat_cache.stats()})
+
+@app.route("/api/model/status", methods=["GET"])
+def model_status():
+    status = model_registry.get().status()
+    if online_learner.initialized:
+        status["online_learning"] = online_learner.get().status()
+    return jsonify(status)
+
+# Read at scrape time; reported only once the subsystem exists.
+REGISTRY.gauge(
+    "scheduler_model_version", "Version of the model being served.",
+    fn=lambda: model_registry.get().version if model_registry.initialized else None,
+)
+REGISTRY.gauge("scheduler_chat_cache_entries", "Cached chat answers.", fn=lambda: chat_cache.stats()["size"])
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+boot.mark("app setup")
+if PRELOAD:
+    llm.get()
+    knowledge_base.get()
+    model_registry.get()
+    if ONLINE_LEARNING:
+        online_learner.get()
+    boot.mark("preload")
+boot.emit()
+
 if __name__ == "__main__":
     print("\n" + "="*50)
     print("OS Learning Assistant Backend")
     print("="*50)
     print("Backend running on: http://localhost:5000")
     print("Chat endpoint: http://localhost:5000/api/chat")
-    print(f"Gemini AI: {'Enabled' if model else 'Disabled (using fallback)'}")
+    print(f"Gemini AI: {'Enabled' if llm.get() else 'Disabled (using fallback)'}")
     print("="*50 + "\n")
     app.run(host='0.0.0.0', port=5000, debug=True)
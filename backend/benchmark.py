@@ -0,0 +1,305 @@
+"""
+benchmark.py
+Performance benchmarks for the scheduler backend.
+
+Covers per-policy simulation, feature extraction, dataset generation
+throughput (labeled fresh and read from the dataset cache), model load time,
+single and batch prediction latency, and HTTP endpoint latency through the
+Flask test client. Workloads are generated from fixed seeds at 10, 1k and
+100k processes, so runs are comparable.
+
+    python benchmark.py                         # full run, JSON to stdout
+    python benchmark.py --quick -o bench.json   # skip 100k workloads, fewer repeats
+    python benchmark.py --filter simulate       # only cases whose name contains "simulate"
+    python benchmark.py --compare bench.json    # exit 1 if any case regressed
+
+Results are JSON: {"meta": {...}, "results": {case: {"unit", "better",
+"median", "min", "p95", "repeat"}}}. --compare checks medians against a stored
+run and flags cases more than --threshold (default 25%) worse.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from compact_model import exportable
+from observability import configure_logging
+from dataset_cache import DatasetCache
+from ml_scheduler import ALGORITHMS, MLScheduler, ProcessSample
+
+SIZES = (10, 1_000, 100_000)
+QUICK_SIZES = (10, 1_000)
+MODEL_PATH = Path(__file__).resolve().parent / "ml_scheduler.pkl"
+
+
+def workload(n: int, seed: int = 0) -> List[ProcessSample]:
+    """
+    Seeded workload with the training distributions for burst and priority;
+    arrivals spread over ~6n time units so large traces keep a bounded queue.
+    """
+    rng = random.Random(seed * 1_000_003 + n)
+    horizon = max(12, 6 * n)
+    return [
+        ProcessSample(burst=rng.randint(1, 25), priority=rng.randint(1, 10), arrival=rng.randint(0, horizon))
+        for _ in range(n)
+    ]
+
+
+def as_request(processes: List[ProcessSample]) -> List[Dict]:
+    return [{"pid": f"P{i + 1}", "burst": p.burst, "priority": p.priority, "arrival": p.arrival} for i, p in enumerate(processes)]
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """Wall-clock timings of ``fn`` in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return {
+        "unit": "ms",
+        "better": "lower",
+        "median": statistics.median(times),
+        "min": times[0],
+        "p95": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        "repeat": repeat,
+    }
+
+
+def _repeat_for(n: int, quick: bool) -> int:
+    if n >= 100_000:
+        return 1
+    if n >= 1_000:
+        return 3 if quick else 10
+    return 20 if quick else 200
+
+
+class BenchmarkSuite:
+    def __init__(self, quick: bool = False, name_filter: Optional[str] = None):
+        self.quick = quick
+        self.name_filter = name_filter
+        self.sizes = QUICK_SIZES if quick else SIZES
+        self.results: Dict[str, Dict] = {}
+        self._scheduler: Optional[MLScheduler] = None
+        self._model_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    def case(self, name: str, fn: Callable[[], object], repeat: int, warmup: int = 1):
+        if self.name_filter and self.name_filter not in name:
+            return
+        self.results[name] = measure(fn, repeat, warmup)
+        print(f"[Benchmark] {name:<44} {self.results[name]['median']:10.3f} ms", file=sys.stderr)
+
+    def scheduler(self) -> MLScheduler:
+        """A model-backed scheduler; trains a throwaway model if none is checked in."""
+        if self._scheduler is None:
+            scheduler = MLScheduler(model_path=str(MODEL_PATH))
+            if not (scheduler.load() and scheduler.is_ready()):
+                scheduler.train()
+            self._scheduler = scheduler
+        return self._scheduler
+
+    def simulation(self):
+        scheduler = MLScheduler()
+        for n in self.sizes:
+            processes = workload(n)
+            for algo in ALGORITHMS:
+                self.case(f"simulate/{algo}/{n}", lambda: scheduler._simulate_algorithm(processes, algo),
+                          _repeat_for(n, self.quick), warmup=0 if n >= 100_000 else 1)
+            self.case(f"features/{n}", lambda: scheduler.extract_features(processes), _repeat_for(n, self.quick))
+
+    def dataset(self):
+        scheduler = MLScheduler()
+        n_samples = 500 if self.quick else 2000
+        cache_dir = tempfile.TemporaryDirectory(prefix="bench-dataset-")
+        # Both chunked variants split the set into the same 8 chunks, so the
+        # process pool is used (at least two workers, even on one core).
+        chunk_size = max(1, n_samples // 8)
+        variants = {
+            "stream": {"n_jobs": None},
+            "serial": {"n_jobs": 1, "chunk_size": chunk_size},
+            "parallel": {"n_jobs": max(2, os.cpu_count() or 1), "chunk_size": chunk_size},
+            # The warmup run labels into the cache; timed runs only map it.
+            "cached": {"cache": DatasetCache(cache_dir.name)},
+        }
+        for variant, kwargs in variants.items():
+            name = f"dataset/{n_samples}/{variant}"
+            if self.name_filter and self.name_filter not in name:
+                continue
+            timing = measure(lambda: scheduler.generate_dataset(n_samples=n_samples, **kwargs),
+                             repeat=1 if self.quick else 3, warmup=1 if variant == "cached" else 0)
+            self.results[name] = {
+                "unit": "samples/s",
+                "better": "higher",
+                "median": n_samples / (timing["median"] / 1000),
+                "min": n_samples / (timing["p95"] / 1000),
+                "p95": n_samples / (timing["min"] / 1000),
+                "repeat": timing["repeat"],
+            }
+            print(f"[Benchmark] {name:<44} {self.results[name]['median']:10.1f} samples/s", file=sys.stderr)
+        cache_dir.cleanup()
+
+    def model_load(self):
+        scheduler = self.scheduler()
+        repeat = 5 if self.quick else 20
+        with tempfile.TemporaryDirectory() as tmp:
+            pickle_path = Path(tmp) / "model.pkl"
+            scheduler.save(pickle_path)
+            self.case("model/load/pickle", lambda: MLScheduler().load(pickle_path), repeat)
+            if exportable(scheduler.model):
+                compact_path = scheduler.export_compact(Path(tmp) / "model.npz")
+                self.case("model/load/compact", lambda: MLScheduler().load(compact_path), repeat)
+
+    def prediction(self):
+        scheduler = self.scheduler()
+        for n in self.sizes:
+            processes = as_request(workload(n))
+            self.case(f"predict/single/{n}", lambda: scheduler.predict_with_confidence(processes), _repeat_for(n, self.quick))
+        for batch in (1, 100, 1000):
+            workloads = [as_request(workload(10, seed)) for seed in range(batch)]
+            self.case(f"predict/batch/{batch}x10", lambda: scheduler.predict_batch(workloads), _repeat_for(batch * 10, self.quick))
+
+    def endpoints(self):
+        # Local fake LLM and lazy subsystems, so no network or key is needed.
+        # The API serves a private copy of the benchmark model, so it neither
+        # retrains nor touches the checked-in model files.
+        self._model_dir = tempfile.TemporaryDirectory(prefix="benchmark-model-")
+        model_path = os.path.join(self._model_dir.name, "ml_scheduler.pkl")
+        self.scheduler().save(model_path)
+        os.environ["SCHEDULER_MODEL_PATH"] = model_path
+        os.environ["LLM_CLIENT"] = "fake"
+        os.environ.pop("API_PRELOAD", None)
+        import api
+        import simulation
+
+        client = api.app.test_client()
+        registry = api.model_registry.get()
+        small = as_request(workload(10))
+        batch = {"workloads": [as_request(workload(10, seed)) for seed in range(100)]}
+        repeat = 20 if self.quick else 100
+        counter = iter(range(10 ** 9))
+
+        def post(path: str, payload_fn: Callable[[], Dict]):
+            def call():
+                response = client.post(path, json=payload_fn())
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+            return call
+
+        def unpredicted(payload: Dict) -> Callable[[], Dict]:
+            def payload_fn():
+                # Measure feature extraction and inference, not the prediction cache.
+                registry.cache.clear()
+                return payload
+            return payload_fn
+
+        self.case("http/suggest-algorithm/10", post("/api/suggest-algorithm", unpredicted({"processes": small})), repeat)
+        self.case(
+            "http/suggest-algorithm/batch/100x10",
+            post("/api/suggest-algorithm/batch", unpredicted(batch)),
+            max(5, repeat // 10),
+        )
+        for n in self.sizes[:2]:
+            payload = {"processes": as_request(workload(n))}
+
+            def uncached():
+                # Measure simulation, not the schedule cache.
+                simulation.schedule_cache.clear()
+                return payload
+
+            self.case(f"http/simulate/{n}", post("/api/simulate", uncached), _repeat_for(n, self.quick))
+        self.case("http/chat/uncached", post("/api/chat", lambda: {"message": f"explain paging {next(counter)}"}), repeat)
+
+    def run(self) -> Dict:
+        started = time.perf_counter()
+        self.simulation()
+        self.dataset()
+        self.model_load()
+        self.prediction()
+        self.endpoints()
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "quick": self.quick,
+                "elapsed_s": time.perf_counter() - started,
+            },
+            "results": self.results,
+        }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.25) -> List[Dict]:
+    """
+    Per-case change of the median against the baseline. A case regresses when
+    it is more than ``threshold`` worse in its ``better`` direction.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["median"]:
+            continue
+        change = result["median"] / base["median"] - 1
+        worse = change if result["better"] == "lower" else -change
+        rows.append({
+            "case": name,
+            "baseline": base["median"],
+            "current": result["median"],
+            "unit": result["unit"],
+            "change": change,
+            "regressed": worse > threshold,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler backend.")
+    parser.add_argument("--quick", action="store_true", help="skip 100k-process workloads and use fewer repeats")
+    parser.add_argument("--filter", help="only run cases whose name contains this string")
+    parser.add_argument("-o", "--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a stored results JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before a case counts as regressed")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    # Subsystem logs go to stderr so stdout carries only the JSON report.
+    with contextlib.redirect_stdout(sys.stderr):
+        report = BenchmarkSuite(quick=args.quick, name_filter=args.filter).run()
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        rows = compare(report, baseline, args.threshold)
+        report["comparison"] = {"baseline": args.compare, "threshold": args.threshold, "cases": rows}
+        for row in rows:
+            flag = "REGRESSED" if row["regressed"] else "ok"
+            print(f"[Benchmark] {row['case']:<44} {row['change']:+8.1%}  {flag}", file=sys.stderr)
+        if any(row["regressed"] for row in rows):
+            exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
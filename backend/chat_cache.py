@@ -0,0 +1,90 @@
+"""
+chat_cache.py
+Answer cache and request coalescing for /api/chat.
+
+Prompts are normalized (case, whitespace, sentence punctuation) so trivially
+different phrasings of the same question share one entry. SingleFlight makes
+concurrent identical prompts wait on one upstream call instead of each making
+their own.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from ttl_cache import TTLCache
+
+# Only punctuation that ends a word, so "3.5" and "35" stay different prompts.
+_SENTENCE_PUNCTUATION = re.compile(r"[?!.,;:]+(?=\s|$)")
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(_SENTENCE_PUNCTUATION.sub(" ", prompt.lower()).split())
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key onto one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.coalesced = 0
+
+    def begin(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        Returns (future, is_leader). The leader must call finish(); everyone
+        else waits on the future.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def finish(self, key: Hashable, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            future = self._calls.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+class ChatAnswerCache:
+    def __init__(self, maxsize: int = 2048, ttl: Optional[float] = 3600.0):
+        self.answers = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.flights = SingleFlight()
+
+    def get_or_compute(self, prompt: str, compute: Callable[[], Optional[str]]) -> Tuple[Optional[str], str]:
+        """
+        Returns (answer, how) where how is "cache", "coalesced" or "computed".
+        Only non-empty answers are cached, so failures are retried next time.
+        """
+        key = normalize_prompt(prompt)
+        cached = self.answers.get(key)
+        if cached is not None:
+            return cached, "cache"
+
+        future, leader = self.flights.begin(key)
+        if not leader:
+            return future.result(), "coalesced"
+        try:
+            answer = compute()
+        except BaseException as exc:
+            self.flights.finish(key, error=exc)
+            raise
+        if answer:
+            self.answers.set(key, answer)
+        self.flights.finish(key, answer)
+        return answer, "computed"
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.answers.stats(), "coalesced": self.flights.coalesced}
@@ -0,0 +1,164 @@
+"""
+compact_model.py
+sklearn-free storage and inference for the scheduler's random forest.
+
+export_forest flattens every tree of a fitted RandomForestClassifier (or a
+single DecisionTreeClassifier, stored as a forest of one) into contiguous node
+arrays (feature, threshold, left/right child, leaf class
+distribution) and writes them as an uncompressed .npz. CompactForest maps that
+file back into memory without copying, so forked or separate worker processes
+share the same pages, and predicts with a batched NumPy traversal. It exposes
+the parts of the classifier API that MLScheduler uses (classes_,
+n_features_in_, predict_proba, predict).
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import zipfile
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+# Format revision of the exported arrays; bump when the layout changes.
+FORMAT_VERSION = 1
+
+
+def exportable(model) -> bool:
+    """True for fitted models export_forest can write: a random forest or a single decision tree."""
+    if hasattr(model, "tree_"):
+        return hasattr(model, "classes_")
+    # Gradient boosting keeps an array of regression trees here, not a list.
+    estimators = getattr(model, "estimators_", None)
+    return isinstance(estimators, list) and all(hasattr(e, "tree_") for e in estimators)
+
+
+def export_forest(model, path: str | Path) -> Path:
+    """
+    Write a fitted RandomForestClassifier or DecisionTreeClassifier to
+    ``path`` in the compact format. The file is written next to the target
+    and renamed into place.
+    """
+    if not exportable(model):
+        raise ValueError(f"{type(model).__name__} cannot be exported in the compact format.")
+    path = Path(path)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in getattr(model, "estimators_", [model]):
+        tree = estimator.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        own = np.arange(n)
+        # Leaves point at themselves, which is how traversal detects them.
+        features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold))
+        lefts.append((np.where(leaf, own, tree.children_left) + offset).astype(np.int32))
+        rights.append((np.where(leaf, own, tree.children_right) + offset).astype(np.int32))
+        value = tree.value[:, 0, :]
+        values.append(value / np.maximum(value.sum(axis=1, keepdims=True), np.finfo(float).tiny))
+        roots.append(offset)
+        offset += n
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        np.savez(
+            fh,
+            format_version=np.array([FORMAT_VERSION], dtype=np.int64),
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_).astype(str),
+            n_features_in=np.array([model.n_features_in_], dtype=np.int64),
+        )
+    os.replace(tmp, path)
+    return path
+
+
+def _mmap_npz(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Memory-map every member of an uncompressed .npz (np.load ignores mmap_mode for archives).
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive:
+        members = archive.infolist()
+    with open(path, "rb") as fh:
+        for info in members:
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} member {info.filename} is compressed; cannot memory-map it.")
+            fh.seek(info.header_offset)
+            name_len, extra_len = struct.unpack("<HH", fh.read(30)[26:30])
+            fh.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(fh)
+            arrays[info.filename[:-len(".npy")]] = np.memmap(
+                path, dtype=dtype, mode="r", offset=fh.tell(), shape=shape, order="F" if fortran else "C"
+            )
+    return arrays
+
+
+class CompactForest:
+    """Read-only forest predictor backed by (optionally memory-mapped) node arrays."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        version = int(arrays["format_version"][0])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format {version}.")
+        # asarray drops the memmap subclass but keeps the mapped buffer.
+        self.feature = np.asarray(arrays["feature"])
+        self.threshold = np.asarray(arrays["threshold"])
+        self.left = np.asarray(arrays["left"])
+        self.right = np.asarray(arrays["right"])
+        self.value = np.asarray(arrays["value"])
+        self.roots = np.asarray(arrays["roots"], dtype=np.intp)
+        self.classes_ = np.asarray(arrays["classes"])
+        self.n_features_in_ = int(arrays["n_features_in"][0])
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> "CompactForest":
+        path = Path(path)
+        if mmap:
+            return cls(_mmap_npz(path))
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Global leaf index reached in every tree, shape (n_samples, n_trees)."""
+        # sklearn compares float32 features against float64 thresholds.
+        X = np.asarray(X, dtype=np.float32)
+        n_samples, n_trees = X.shape[0], len(self.roots)
+        node = np.tile(self.roots, n_samples)
+        # Working set of (sample, tree) pairs still at an internal node: their
+        # position in ``node``, current node, and feature-row offset in X.
+        position = np.arange(node.size)
+        current = node.copy()
+        offset = np.repeat(np.arange(n_samples) * X.shape[1], n_trees)
+        values = X.ravel()
+        while position.size:
+            go_left = values[offset + self.feature[current]] <= self.threshold[current]
+            step = np.where(go_left, self.left[current], self.right[current])
+            moving = step != current
+            node[position] = step
+            position, current, offset = position[moving], step[moving], offset[moving]
+        return node.reshape(n_samples, n_trees)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.apply(X)
+        proba = np.zeros((leaves.shape[0], len(self.classes_)))
+        for t in range(leaves.shape[1]):
+            proba += self.value[leaves[:, t]]
+        return proba / leaves.shape[1]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
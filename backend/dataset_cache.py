@@ -0,0 +1,257 @@
+"""
+dataset_cache.py
+On-disk cache of labeled synthetic training sets.
+
+Labeling a synthetic set simulates every algorithm on every workload, which is
+most of the cost of a cold MLScheduler.train(). DatasetCache labels each set
+once and keeps it in a directory named by a hash of everything that decides
+its rows: the workload size range, the seed, the generation mode (one stream,
+or chunks of chunk_size), the time quantum, the algorithms, the scoring
+weights and SIMULATOR_VERSION. The sample count is not part of the key. Both
+modes draw workloads as a stream whose prefixes do not depend on its length,
+so a smaller request reads a prefix of the cached rows and a larger one labels
+only the missing rows and appends them.
+
+X.npy and y.npy are plain .npy files grown in place: new rows are written at
+the end and the row count in the header is rewritten. They are returned
+memory-mapped read-only, so a set larger than RAM can still be opened.
+meta.json holds the committed row count (and, for the single-stream mode, the
+generator state after the last row) and is replaced atomically after each
+block. Rows past the count, left by an interrupted append, are overwritten by
+the next one. Writers to one directory are serialized with a lock file.
+
+    python dataset_cache.py --samples 200000 --jobs -1   # fill the default set
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml_scheduler import (
+    ALGORITHMS, SCORE_WEIGHTS, SIMULATOR_VERSION, MLScheduler, _chunk_seeds, _label_chunks, _random_workloads,
+)
+from observability import configure_logging, get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized.
+    fcntl = None
+
+log = get_logger("dataset_cache")
+
+DEFAULT_DIRECTORY = Path(__file__).resolve().parent / "dataset_cache"
+# Single-stream rows labeled (and committed) per block.
+BLOCK_ROWS = 8192
+LABEL_DTYPE = np.dtype(f"<U{max(len(algo) for algo in ALGORITHMS)}")
+
+_HEADER_IO = {
+    (1, 0): (np.lib.format.read_array_header_1_0, np.lib.format.write_array_header_1_0),
+    (2, 0): (np.lib.format.read_array_header_2_0, np.lib.format.write_array_header_2_0),
+}
+_thread_lock = threading.Lock()
+
+
+def _append_rows(path: Path, committed: int, rows: np.ndarray):
+    """
+    Write ``rows`` after the first ``committed`` rows of the .npy at ``path``
+    and update its header, creating the file when nothing is committed.
+    """
+    if committed == 0:
+        with open(path, "wb") as f:
+            np.save(f, rows)
+            f.flush()
+            os.fsync(f.fileno())
+        return
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        read_header, write_header = _HEADER_IO[version]
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+        if fortran_order or dtype != rows.dtype or shape[1:] != rows.shape[1:] or shape[0] < committed:
+            raise ValueError(f"{path.name} does not match the cached rows.")
+        row_bytes = dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64))
+        f.seek(offset + committed * row_bytes)
+        f.truncate()
+        f.write(np.ascontiguousarray(rows).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+        # np.save leaves room in the header for the row count to grow.
+        f.seek(0)
+        write_header(f, {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (committed + len(rows), *shape[1:]),
+        })
+        if f.tell() != offset:
+            raise ValueError(f"{path.name} header cannot grow in place.")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class DatasetCache:
+    def __init__(self, directory: str | Path = DEFAULT_DIRECTORY, block_rows: int = BLOCK_ROWS):
+        self.directory = Path(directory)
+        self.block_rows = max(1, block_rows)
+
+    @staticmethod
+    def params(
+        scheduler: MLScheduler,
+        n_processes_range: Tuple[int, int],
+        seed: int,
+        n_jobs: Optional[int],
+        chunk_size: int,
+    ) -> Dict[str, Any]:
+        """Everything that decides a dataset's rows, apart from how many there are."""
+        return {
+            "simulator_version": SIMULATOR_VERSION,
+            "algorithms": ALGORITHMS,
+            "score_weights": SCORE_WEIGHTS,
+            "time_quantum": scheduler.time_quantum,
+            "n_processes_range": list(n_processes_range),
+            "seed": seed,
+            # The chunked result is the same for every worker count.
+            "chunk_size": None if n_jobs is None else chunk_size,
+        }
+
+    def entry(self, params: Dict[str, Any]) -> Path:
+        digest = hashlib.blake2b(json.dumps(params, sort_keys=True).encode(), digest_size=8).hexdigest()
+        return self.directory / digest
+
+    @contextlib.contextmanager
+    def _locked(self, entry: Path):
+        entry.mkdir(parents=True, exist_ok=True)
+        with _thread_lock, open(entry / "lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_meta(self, entry: Path, params: Dict[str, Any]) -> Dict[str, Any]:
+        """The committed state of ``entry``, or an empty one if it is missing or inconsistent."""
+        empty = {"params": params, "rows": 0, "rng_state": None}
+        try:
+            meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+            if meta["params"] != params or meta["rows"] < 0:
+                raise ValueError("parameters differ")
+            if meta["rows"] and params["chunk_size"] is None and meta.get("rng_state") is None:
+                raise ValueError("missing generator state")
+            for name in ("X.npy", "y.npy"):
+                if meta["rows"] and len(np.load(entry / name, mmap_mode="r")) < meta["rows"]:
+                    raise ValueError(f"{name} is short")
+            return meta
+        except FileNotFoundError:
+            return empty
+        except (ValueError, KeyError, TypeError, OSError) as exc:
+            log.warning("discarding cached dataset", entry=entry.name, error=str(exc))
+            for name in ("X.npy", "y.npy", "meta.json"):
+                (entry / name).unlink(missing_ok=True)
+            return empty
+
+    def _commit(self, entry: Path, meta: Dict[str, Any], X: np.ndarray, y: np.ndarray, rng_state=None):
+        _append_rows(entry / "X.npy", meta["rows"], np.asarray(X, dtype=float))
+        _append_rows(entry / "y.npy", meta["rows"], np.asarray(y).astype(LABEL_DTYPE))
+        meta["rows"] += len(y)
+        if rng_state is not None:
+            meta["rng_state"] = [rng_state[0], list(rng_state[1]), rng_state[2]]
+        tmp = entry / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, entry / "meta.json")
+
+    def _extend_stream(self, scheduler: MLScheduler, entry: Path, meta: Dict[str, Any], n_samples: int):
+        params = meta["params"]
+        rng = random.Random(params["seed"])
+        if meta["rows"]:
+            state = meta["rng_state"]
+            rng.setstate((state[0], tuple(state[1]), state[2]))
+        while meta["rows"] < n_samples:
+            size = min(self.block_rows, n_samples - meta["rows"])
+            workloads = _random_workloads(rng, size, tuple(params["n_processes_range"]))
+            X, y = scheduler._featurize_and_label(workloads)
+            self._commit(entry, meta, X, y, rng.getstate())
+
+    def _extend_chunks(self, entry: Path, meta: Dict[str, Any], n_samples: int, n_jobs: int):
+        params = meta["params"]
+        chunk_size = params["chunk_size"]
+        seeds = _chunk_seeds(params["seed"], -(-n_samples // chunk_size))
+        chunks, start = [], meta["rows"]
+        while start < n_samples:
+            # A partly cached chunk is redrawn from its seed and labeled from where it stopped.
+            index, skip = divmod(start, chunk_size)
+            size = min(chunk_size, n_samples - index * chunk_size)
+            chunks.append((params["time_quantum"], seeds[index], size, tuple(params["n_processes_range"]), skip))
+            start = index * chunk_size + size
+        for X, y in _label_chunks(chunks, n_jobs):
+            self._commit(entry, meta, X, y)
+
+    def dataset(
+        self,
+        scheduler: MLScheduler,
+        n_samples: int = 1200,
+        n_processes_range: Tuple[int, int] = (3, 10),
+        seed: int = 42,
+        n_jobs: Optional[int] = None,
+        chunk_size: int = 1024,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The rows MLScheduler.generate_dataset would return for these
+        arguments, as read-only memory-mapped X and y. Rows not cached yet
+        are labeled and appended first.
+        """
+        if n_samples < 1:
+            raise ValueError("n_samples must be at least 1.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        params = self.params(scheduler, n_processes_range, seed, n_jobs, chunk_size)
+        entry = self.entry(params)
+        with self._locked(entry):
+            meta = self._read_meta(entry, params)
+            cached = meta["rows"]
+            if cached < n_samples:
+                if params["chunk_size"] is None:
+                    self._extend_stream(scheduler, entry, meta, n_samples)
+                else:
+                    self._extend_chunks(entry, meta, n_samples, n_jobs)
+            X = np.load(entry / "X.npy", mmap_mode="r")[:n_samples]
+            y = np.load(entry / "y.npy", mmap_mode="r")[:n_samples]
+        log.info("dataset loaded", entry=entry.name, rows=n_samples, labeled=max(0, n_samples - cached))
+        return X, y
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Metadata of every cached dataset."""
+        found = []
+        for path in sorted(self.directory.glob("*/meta.json")):
+            meta = json.loads(path.read_text(encoding="utf-8"))
+            found.append({"entry": path.parent.name, "rows": meta["rows"], "params": meta["params"]})
+        return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fill or inspect the labeled synthetic dataset cache.")
+    parser.add_argument("--directory", default=os.getenv("DATASET_CACHE_DIR") or str(DEFAULT_DIRECTORY))
+    parser.add_argument("--samples", type=int, help="make sure this many rows are cached (default: just list)")
+    parser.add_argument("--jobs", type=int, help="label in chunks on this many processes (-1: every core)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--time-quantum", type=int, default=2)
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    cache = DatasetCache(args.directory)
+    if args.samples:
+        scheduler = MLScheduler(time_quantum=args.time_quantum)
+        scheduler.generate_dataset(n_samples=args.samples, seed=args.seed, n_jobs=args.jobs, cache=cache)
+    print(json.dumps(cache.entries(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
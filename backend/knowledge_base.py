@@ -0,0 +1,202 @@
+"""
+knowledge_base.py
+Local OS knowledge base used when the LLM is unavailable.
+
+A KnowledgeBase is a corpus of (term, answer) entries, built from the
+OS_KNOWLEDGE_BASE defaults and/or loaded from a JSON or JSONL file. It is
+indexed once: an Aho-Corasick automaton finds every term mentioned in a message
+in one pass over the text, and an inverted index ranks entries with BM25 for
+free-text questions that name no term.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from collections import Counter, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Local knowledge base for OS concepts
+OS_KNOWLEDGE_BASE = {
+    'process': 'A **process** is a program in execution. It includes the program code and its current activity. Each process has its own memory space, file handles, and system resources.',
+    'thread': 'A **thread** is the smallest unit of processing that can be performed in an OS. Threads within the same process share the same memory space but have their own program counters and stack.',
+    'scheduling': '**CPU Scheduling** is the process of determining which process will use the CPU when multiple processes are ready to execute. Common algorithms include FCFS, SJF, Priority, Round Robin, and Multilevel Queue.',
+    'paging': '**Paging** is a memory management scheme that divides memory into fixed-size blocks called pages. It allows the physical address space of a process to be non-contiguous.',
+    'segmentation': '**Segmentation** is a memory management technique that divides memory into segments of varying sizes. Each segment represents a logical unit like code, data, or stack.',
+    'virtual memory': '**Virtual Memory** is a memory management technique that provides an idealized abstraction of the storage resources available on a machine, allowing execution of processes that may not be completely in memory.',
+    'deadlock': 'A **deadlock** is a situation where a set of processes are blocked because each process is holding a resource and waiting for another resource acquired by some other process.',
+    'synchronization': '**Synchronization** is the coordination of multiple processes or threads to ensure proper execution order and prevent race conditions.',
+    'concurrency': '**Concurrency** is the ability of different parts or units of a program to be executed out-of-order or in partial order, without affecting the final outcome.',
+    'file system': 'A **file system** is a method for storing and organizing computer files and the data they contain, including file attributes, directory structure, and file allocation methods.',
+    'memory management': "**Memory Management** involves managing the computer's primary memory, including memory allocation, swapping, and memory protection.",
+    'disk scheduling': '**Disk Scheduling** algorithms determine the order in which disk I/O requests are processed, including FCFS, SSTF, SCAN, and C-SCAN algorithms.',
+    'interprocess communication': '**Interprocess Communication (IPC)** mechanisms allow processes to communicate and synchronize their actions, including shared memory, message passing, pipes, and sockets.'
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its me of on or "
+    "please tell that the this to what when where which who why with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+@dataclass
+class Match:
+    term: str
+    answer: str
+    score: float
+    method: str  # "term" or "bm25"
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: one pass over the text finds every pattern."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._lengths: List[int] = []
+        for index, pattern in enumerate(patterns):
+            self._lengths.append(len(pattern))
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> Iterable[Tuple[int, int]]:
+        """Yield (pattern index, start offset) for every occurrence."""
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for index in self._out[node]:
+                yield index, position - self._lengths[index] + 1
+
+
+class KnowledgeBase:
+    """Indexed corpus of (term, answer) entries."""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]], k1: float = 1.2, b: float = 0.75, min_score: float = 1.0):
+        self.terms: List[str] = []
+        self.answers: List[str] = []
+        seen: Dict[str, int] = {}
+        for term, answer in entries:
+            key = term.strip().lower()
+            if not key:
+                continue
+            if key in seen:
+                # Later sources override earlier ones (e.g. a loaded file over the defaults).
+                self.answers[seen[key]] = answer
+                continue
+            seen[key] = len(self.terms)
+            self.terms.append(key)
+            self.answers.append(answer)
+
+        self.k1, self.b, self.min_score = k1, b, min_score
+        self._automaton = AhoCorasick(self.terms)
+
+        # BM25 inverted index over each entry's term and answer text.
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._doc_lengths: List[int] = []
+        for doc, (term, answer) in enumerate(zip(self.terms, self.answers)):
+            counts = Counter(tokenize(term) * 2 + tokenize(answer))
+            self._doc_lengths.append(sum(counts.values()))
+            for token, count in counts.items():
+                self._postings.setdefault(token, []).append((doc, count))
+        n_docs = max(len(self.terms), 1)
+        self._avg_length = (sum(self._doc_lengths) / n_docs) or 1.0
+        self._idf = {
+            token: math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for token, posting in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, str], **kwargs) -> "KnowledgeBase":
+        return cls(mapping.items(), **kwargs)
+
+    @staticmethod
+    def read_entries(path: str | Path) -> List[Tuple[str, str]]:
+        """
+        Read a corpus file: a JSON object of term -> answer, a JSON list of
+        {"term", "answer"} objects, or JSONL with one such object per line.
+        """
+        path = Path(path)
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".jsonl":
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            data = json.loads(text)
+            if isinstance(data, dict):
+                return list(data.items())
+            records = data
+        return [(record["term"], record["answer"]) for record in records]
+
+    @classmethod
+    def load(cls, path: str | Path, include_defaults: bool = True, **kwargs) -> "KnowledgeBase":
+        entries = list(OS_KNOWLEDGE_BASE.items()) if include_defaults else []
+        return cls(entries + cls.read_entries(path), **kwargs)
+
+    def term_matches(self, message: str) -> List[Match]:
+        """
+        Terms mentioned in the message, most specific (longest) first. A term
+        must start at a word boundary but may run into a suffix ("processes").
+        """
+        text = message.lower()
+        found = {}
+        for index, start in self._automaton.find(text):
+            if start == 0 or not text[start - 1].isalnum():
+                found.setdefault(index, start)
+        ranked = sorted(found.items(), key=lambda item: (-len(self.terms[item[0]]), item[1]))
+        return [Match(self.terms[i], self.answers[i], float(len(self.terms[i])), "term") for i, _ in ranked]
+
+    def search(self, query: str, limit: int = 5) -> List[Match]:
+        """BM25-ranked entries for free text, best first."""
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            idf = self._idf.get(token)
+            if idf is None:
+                continue
+            for doc, count in self._postings[token]:
+                norm = count + self.k1 * (1 - self.b + self.b * self._doc_lengths[doc] / self._avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * count * (self.k1 + 1) / norm
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [Match(self.terms[doc], self.answers[doc], score, "bm25") for doc, score in best]
+
+    def lookup(self, message: str) -> Optional[Match]:
+        """Best answer for a chat message: a mentioned term, else a confident BM25 hit."""
+        matches = self.term_matches(message)
+        if matches:
+            return matches[0]
+        ranked = self.search(message, limit=1)
+        if ranked and ranked[0].score >= self.min_score:
+            return ranked[0]
+        return None
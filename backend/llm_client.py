@@ -0,0 +1,196 @@
+"""
+llm_client.py
+Pluggable text-generation clients for the chat endpoints.
+
+The API only talks to LLMClient: stream() yields LLMChunk pieces as the model
+produces them and generate() returns the whole answer as one chunk. GeminiClient
+adapts google.generativeai; FakeLLMClient streams canned text locally so the
+chat paths can be exercised without network access or an API key.
+PooledLLMClient wraps any client with a bounded worker pool and timeouts, and
+rejects calls with LLMBusyError once too many are waiting, so request threads
+are not tied up queueing for the model.
+"""
+
+from __future__ import annotations
+
+import abc
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, Union
+
+
+@dataclass
+class LLMChunk:
+    text: str
+    finish_reason: Optional[str] = None
+    usage: Any = None
+
+
+def normalize_finish_reason(reason: Any) -> Optional[str]:
+    """Map SDK enums/ints/strings to an upper-case name such as "MAX_TOKENS"."""
+    if reason is None:
+        return None
+    name = getattr(reason, "name", None) or str(reason)
+    return name.rpartition(".")[2].upper()
+
+
+class LLMBusyError(RuntimeError):
+    """Raised instead of queueing when the pool's running and waiting slots are all taken."""
+
+
+class LLMClient(abc.ABC):
+    """Minimal interface the chat endpoints need from a text model."""
+
+    name = "llm"
+
+    @abc.abstractmethod
+    def stream(self, prompt: str, max_output_tokens: int, temperature: float = 0.5) -> Iterator[LLMChunk]:
+        """Yield the answer in pieces as the model produces them."""
+
+    def generate(self, prompt: str, max_output_tokens: int, temperature: float = 0.5) -> LLMChunk:
+        parts, finish_reason, usage = [], None, None
+        for chunk in self.stream(prompt, max_output_tokens, temperature):
+            parts.append(chunk.text)
+            finish_reason = chunk.finish_reason or finish_reason
+            usage = chunk.usage or usage
+        return LLMChunk("".join(parts), finish_reason, usage)
+
+
+class GeminiClient(LLMClient):
+    name = "gemini"
+
+    def __init__(self, model):
+        self.model = model
+
+    @staticmethod
+    def _to_chunk(response) -> LLMChunk:
+        try:
+            text = response.text or ""
+        except ValueError:
+            # Chunks without text parts (e.g. a final metadata-only chunk) raise on .text.
+            text = ""
+        finish_reason = None
+        if getattr(response, "candidates", None):
+            finish_reason = normalize_finish_reason(getattr(response.candidates[0], "finish_reason", None))
+        return LLMChunk(text, finish_reason, getattr(response, "usage_metadata", None))
+
+    def generate(self, prompt: str, max_output_tokens: int, temperature: float = 0.5) -> LLMChunk:
+        response = self.model.generate_content(
+            prompt,
+            generation_config={"temperature": temperature, "max_output_tokens": max_output_tokens},
+        )
+        return self._to_chunk(response)
+
+    def stream(self, prompt: str, max_output_tokens: int, temperature: float = 0.5) -> Iterator[LLMChunk]:
+        response = self.model.generate_content(
+            prompt,
+            generation_config={"temperature": temperature, "max_output_tokens": max_output_tokens},
+            stream=True,
+        )
+        for chunk in response:
+            yield self._to_chunk(chunk)
+
+
+class FakeLLMClient(LLMClient):
+    """
+    Local stand-in: streams ``reply`` (a string or a function of the prompt)
+    one word per chunk, treating words as tokens. Replies longer than
+    max_output_tokens are cut off with finish_reason MAX_TOKENS.
+    """
+
+    name = "fake"
+
+    def __init__(self, reply: Union[str, Callable[[str], str]] = "This is a local test answer about operating systems.", delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    def stream(self, prompt: str, max_output_tokens: int, temperature: float = 0.5) -> Iterator[LLMChunk]:
+        self.calls += 1
+        text = self.reply(prompt) if callable(self.reply) else self.reply
+        words = text.split(" ")
+        kept = words[:max_output_tokens]
+        finish_reason = "MAX_TOKENS" if len(words) > max_output_tokens else "STOP"
+        for i, word in enumerate(kept):
+            if self.delay:
+                time.sleep(self.delay)
+            last = i == len(kept) - 1
+            yield LLMChunk(word if i == 0 else " " + word, finish_reason if last else None)
+
+
+class PooledLLMClient(LLMClient):
+    """
+    Runs another client's calls on a bounded thread pool: at most
+    max_concurrency upstream calls at once. generate() fails with TimeoutError
+    after ``timeout`` seconds (time spent queued included), and stream() when
+    no chunk arrives for ``timeout`` seconds. submit() gives async callers a Future.
+    With ``max_waiting`` set, a call that would queue behind that many others
+    fails at once with LLMBusyError.
+    """
+
+    def __init__(self, client: LLMClient, max_concurrency: int = 8, timeout: float = 30.0, max_waiting: Optional[int] = None):
+        self.client = client
+        self.name = client.name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._slots = None if max_waiting is None else threading.BoundedSemaphore(max_concurrency + max_waiting)
+
+    def _claim(self):
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            raise LLMBusyError(f"LLM pool busy: {self.max_concurrency} running and the wait queue is full")
+
+    def _release(self, *_):
+        if self._slots is not None:
+            self._slots.release()
+
+    def submit(self, prompt: str, max_output_tokens: int, temperature: float = 0.5) -> Future:
+        self._claim()
+        future = self._pool.submit(self.client.generate, prompt, max_output_tokens, temperature)
+        future.add_done_callback(self._release)
+        return future
+
+    def generate(self, prompt: str, max_output_tokens: int, temperature: float = 0.5) -> LLMChunk:
+        future = self.submit(prompt, max_output_tokens, temperature)
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            future.cancel()
+            raise TimeoutError(f"LLM call timed out after {self.timeout}s") from None
+
+    def stream(self, prompt: str, max_output_tokens: int, temperature: float = 0.5) -> Iterator[LLMChunk]:
+        chunks: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def pump():
+            try:
+                for chunk in self.client.stream(prompt, max_output_tokens, temperature):
+                    if stop.is_set():
+                        return
+                    chunks.put(chunk)
+            except BaseException as exc:
+                chunks.put(exc)
+                return
+            chunks.put(done)
+
+        self._claim()
+        self._pool.submit(pump).add_done_callback(self._release)
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"LLM stream stalled for {self.timeout}s") from None
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Lets the pump release its worker if the consumer stops early.
+            stop.set()
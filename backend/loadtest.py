@@ -0,0 +1,223 @@
+"""
+loadtest.py
+Throughput of the pre-fork server (serve.py) as the worker count grows.
+
+For each worker count the harness starts serve.py on a free local port with a
+private copy of a freshly trained model and the fake LLM, then runs closed-loop
+client processes against /api/suggest-algorithm for a fixed time. Every
+request sends a different seeded workload, so the prediction cache does not
+absorb the load. With --chat-clients, other clients keep /api/chat busy with
+unique questions against a slow fake LLM (--llm-delay seconds per word) at the
+same time, which shows whether chat traffic slows predictions down.
+
+    python loadtest.py                              # 1, 2 and 4 workers, 16 clients, 10 s each
+    python loadtest.py --workers 1 2 4 8 --clients 32 --duration 20
+    python loadtest.py --chat-clients 16 --llm-delay 0.05 -o load.json
+
+Results are JSON on stdout (or -o): {"meta": {...}, "runs": [{"workers",
+"predict": {"requests", "errors", "rps", "p50_ms", "p99_ms"}, "chat": {...},
+"speedup"}]}. A summary table goes to stderr.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmark import as_request, workload
+from observability import configure_logging
+
+BACKEND = Path(__file__).resolve().parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(port: int, method: str, path: str, body: Optional[Dict] = None, timeout: float = 60.0):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        payload = json.dumps(body).encode() if body is not None else None
+        conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def _client(port: int, kind: str, client_id: int, deadline: float, results) -> None:
+    """Closed-loop client: send the next request as soon as the last one returns."""
+    latencies, errors, seq = [], 0, 0
+    while time.time() < deadline:
+        seq += 1
+        if kind == "predict":
+            body = {"processes": as_request(workload(8, seed=client_id * 1_000_000 + seq))}
+            path = "/api/suggest-algorithm"
+        else:
+            body = {"message": f"explain paging {client_id}-{seq}"}
+            path = "/api/chat"
+        started = time.perf_counter()
+        try:
+            status, _ = _request(port, "POST", path, body)
+        except OSError:
+            status = 0
+        latencies.append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            errors += 1
+    results.put((kind, latencies, errors))
+
+
+def _summarize(latencies: List[float], errors: int, duration: float) -> Dict[str, float]:
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0, "p50_ms": None, "p99_ms": None}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+class LoadTest:
+    def __init__(self, clients: int, chat_clients: int, duration: float, threads: int, llm_delay: float):
+        self.clients = clients
+        self.chat_clients = chat_clients
+        self.duration = duration
+        self.threads = threads
+        self.llm_delay = llm_delay
+        self._model_dir = tempfile.TemporaryDirectory(prefix="loadtest-model-")
+        self.model_path = Path(self._model_dir.name) / "ml_scheduler.pkl"
+
+    def prepare_model(self):
+        from ml_scheduler import MLScheduler
+
+        scheduler = MLScheduler(model_path=str(self.model_path))
+        scheduler.train()
+        scheduler.save()
+        scheduler.export_compact()
+
+    def _start_server(self, workers: int, port: int) -> subprocess.Popen:
+        env = dict(
+            os.environ,
+            SCHEDULER_MODEL_PATH=str(self.model_path),
+            LLM_CLIENT="fake",
+            LLM_FAKE_DELAY=str(self.llm_delay),
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+        )
+        env.pop("ONLINE_LEARNING", None)
+        server = subprocess.Popen(
+            [sys.executable, str(BACKEND / "serve.py"), "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(workers), "--threads", str(self.threads)],
+            cwd=BACKEND, env=env,
+        )
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"serve.py exited with {server.returncode}")
+            try:
+                status, body = _request(port, "GET", "/api/model/status", timeout=2)
+                if status == 200 and json.loads(body)["model_ready"]:
+                    return server
+            except OSError:
+                pass
+            time.sleep(0.2)
+        server.terminate()
+        raise RuntimeError("serve.py did not become ready")
+
+    def run_one(self, workers: int) -> Dict:
+        port = _free_port()
+        server = self._start_server(workers, port)
+        try:
+            # Warm every worker's lazy subsystems before timing.
+            for seed in range(4 * workers):
+                _request(port, "POST", "/api/suggest-algorithm", {"processes": as_request(workload(8, seed=-1 - seed))})
+            results = multiprocessing.Queue()
+            deadline = time.time() + self.duration
+            procs = [
+                multiprocessing.Process(target=_client, args=(port, kind, i, deadline, results))
+                for kind, count in (("predict", self.clients), ("chat", self.chat_clients))
+                for i in range(count)
+            ]
+            for proc in procs:
+                proc.start()
+            collected = [results.get() for _ in procs]
+            for proc in procs:
+                proc.join()
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        run = {"workers": workers}
+        for kind in ("predict", "chat"):
+            latencies = [ms for k, values, _ in collected if k == kind for ms in values]
+            errors = sum(e for k, _, e in collected if k == kind)
+            run[kind] = _summarize(latencies, errors, self.duration)
+        return run
+
+    def run(self, worker_counts: List[int]) -> Dict:
+        self.prepare_model()
+        runs = []
+        for workers in worker_counts:
+            run = self.run_one(workers)
+            base = runs[0]["predict"]["rps"] if runs else run["predict"]["rps"]
+            run["speedup"] = run["predict"]["rps"] / base if base else None
+            runs.append(run)
+            predict = run["predict"]
+            print(f"[LoadTest] workers={workers:<3} {predict['rps']:9.1f} req/s  p50 {predict['p50_ms'] or 0:8.2f} ms"
+                  f"  p99 {predict['p99_ms'] or 0:8.2f} ms  errors {predict['errors']}"
+                  f"  chat {run['chat']['rps']:6.1f} req/s  x{run['speedup'] or 0:.2f}", file=sys.stderr)
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "clients": self.clients,
+                "chat_clients": self.chat_clients,
+                "duration_s": self.duration,
+                "threads": self.threads,
+                "llm_delay_s": self.llm_delay,
+            },
+            "runs": runs,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test serve.py at several worker counts.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to test")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent prediction clients")
+    parser.add_argument("--chat-clients", type=int, default=0, help="concurrent chat clients running alongside")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    parser.add_argument("--threads", type=int, default=32, help="request threads per worker")
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="fake LLM seconds per word")
+    parser.add_argument("-o", "--output", help="write results JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    report = LoadTest(args.clients, args.chat_clients, args.duration, args.threads, args.llm_delay).run(args.workers)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,440 @@
+"""
+memory_allocator.py
+Contiguous memory allocation simulator (first/best/worst fit) for long traces.
+
+Mirrors firstFit/bestFit/worstFit and calculateFragmentation in
+frontend/src/logic/memoryManager.ts (blocks are placed at the start of the
+chosen hole, free neighbours merge), but keeps the free holes indexed instead
+of scanning a block list:
+
+- by size, in a bucketed sorted list of (size, start): best fit is the first
+  entry >= the request and worst fit the largest entry;
+- by address, in buckets with a max-size segment tree over them: first fit
+  walks down to the lowest-addressed hole that is big enough;
+- by both ends in dicts, so a free merges with its neighbours in O(1).
+
+replay() runs alloc/free traces of millions of events and samples
+fragmentation over time.
+"""
+
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+POLICIES = ["first_fit", "best_fit", "worst_fit"]
+
+# Matches TOTAL_MEMORY in the frontend (MB).
+DEFAULT_MEMORY_SIZE = 1000
+
+
+class SortedList:
+    """
+    Sorted list kept as bounded-size sorted buckets, so inserts and deletes
+    move at most a bucket's worth of items.
+    """
+
+    LOAD = 256
+
+    def __init__(self):
+        self._buckets: List[list] = []
+        self._mins: List = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def _locate(self, item) -> int:
+        return max(0, bisect.bisect_right(self._mins, item) - 1)
+
+    def add(self, item):
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([item])
+            self._mins.append(item)
+            return
+        b = self._locate(item)
+        bucket = self._buckets[b]
+        bisect.insort(bucket, item)
+        self._mins[b] = bucket[0]
+        if len(bucket) > 2 * self.LOAD:
+            self._buckets[b:b + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self._mins[b:b + 1] = [bucket[0], bucket[self.LOAD]]
+
+    def remove(self, item):
+        b = self._locate(item)
+        bucket = self._buckets[b] if self._buckets else []
+        i = bisect.bisect_left(bucket, item)
+        if i == len(bucket) or bucket[i] != item:
+            raise ValueError(f"{item!r} not in list")
+        del bucket[i]
+        self._len -= 1
+        if bucket:
+            self._mins[b] = bucket[0]
+        else:
+            del self._buckets[b]
+            del self._mins[b]
+
+    def ceiling(self, item):
+        """Smallest element >= item, or None."""
+        b = self._locate(item)
+        while b < len(self._buckets):
+            bucket = self._buckets[b]
+            i = bisect.bisect_left(bucket, item)
+            if i < len(bucket):
+                return bucket[i]
+            b += 1
+        return None
+
+    def last(self):
+        return self._buckets[-1][-1] if self._buckets else None
+
+
+class _AddressIndex:
+    """Free holes in address order, answering lowest-address-that-fits queries."""
+
+    LOAD = 128
+
+    def __init__(self):
+        self._starts: List[List[int]] = []
+        self._sizes: List[List[int]] = []
+        self._mins: List[int] = []
+        # Max hole size per bucket as a 1-based segment tree with leaves at _cap.
+        self._cap = 1
+        self._tree: List[int] = [0, 0]
+
+    def _locate(self, start: int) -> int:
+        return max(0, bisect.bisect_right(self._mins, start) - 1)
+
+    def _rebuild(self):
+        self._cap = 1
+        while self._cap < len(self._starts):
+            self._cap *= 2
+        self._tree = [0] * (2 * self._cap)
+        for b, sizes in enumerate(self._sizes):
+            self._tree[self._cap + b] = max(sizes)
+        for node in range(self._cap - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+
+    def _refresh(self, b: int, grown: int = 0, shrunk: int = 0):
+        """
+        Update bucket b's leaf after a hole of size ``grown`` appeared in it or
+        one of size ``shrunk`` left it; only the latter can need a rescan.
+        """
+        node = self._cap + b
+        leaf = self._tree[node]
+        value = max(self._sizes[b]) if shrunk >= leaf else max(leaf, grown)
+        if value == leaf:
+            return
+        tree = self._tree
+        tree[node] = value
+        node //= 2
+        while node:
+            left, right = tree[2 * node], tree[2 * node + 1]
+            value = left if left > right else right
+            if tree[node] == value:
+                break
+            tree[node] = value
+            node //= 2
+
+    def add(self, start: int, size: int):
+        if not self._starts:
+            self._starts.append([start])
+            self._sizes.append([size])
+            self._mins.append(start)
+            self._rebuild()
+            return
+        b = self._locate(start)
+        starts, sizes = self._starts[b], self._sizes[b]
+        i = bisect.bisect_left(starts, start)
+        starts.insert(i, start)
+        sizes.insert(i, size)
+        self._mins[b] = starts[0]
+        if len(starts) > 2 * self.LOAD:
+            half = self.LOAD
+            self._starts[b:b + 1] = [starts[:half], starts[half:]]
+            self._sizes[b:b + 1] = [sizes[:half], sizes[half:]]
+            self._mins[b:b + 1] = [starts[0], starts[half]]
+            self._rebuild()
+        else:
+            self._refresh(b, grown=size)
+
+    def update(self, start: int, new_start: int, new_size: int):
+        """Move/resize a hole in place; no other hole may lie between the two starts."""
+        b = self._locate(start)
+        starts, sizes = self._starts[b], self._sizes[b]
+        i = bisect.bisect_left(starts, start)
+        old_size = sizes[i]
+        starts[i], sizes[i] = new_start, new_size
+        if i == 0:
+            self._mins[b] = new_start
+        self._refresh(b, grown=new_size, shrunk=old_size if new_size < old_size else 0)
+
+    def remove(self, start: int):
+        b = self._locate(start)
+        starts, sizes = self._starts[b], self._sizes[b]
+        i = bisect.bisect_left(starts, start)
+        size = sizes.pop(i)
+        del starts[i]
+        if starts:
+            self._mins[b] = starts[0]
+            self._refresh(b, shrunk=size)
+        else:
+            del self._starts[b], self._sizes[b], self._mins[b]
+            self._rebuild()
+
+    def first_fit(self, size: int) -> Optional[Tuple[int, int]]:
+        if self._tree[1] < size:
+            return None
+        node = 1
+        while node < self._cap:
+            node = 2 * node if self._tree[2 * node] >= size else 2 * node + 1
+        b = node - self._cap
+        sizes = self._sizes[b]
+        i = next(i for i, hole in enumerate(sizes) if hole >= size)
+        return self._starts[b][i], sizes[i]
+
+
+@dataclass
+class FragmentationSample:
+    event: int
+    used: int
+    free: int
+    free_blocks: int
+    largest_free: int
+    failed_allocations: int
+
+    @property
+    def fragmentation(self) -> float:
+        """External fragmentation %, as calculateFragmentation computes it."""
+        return (self.free - self.largest_free) / self.free * 100 if self.free else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "event": self.event,
+            "used": self.used,
+            "free": self.free,
+            "free_blocks": self.free_blocks,
+            "largest_free": self.largest_free,
+            "fragmentation": self.fragmentation,
+            "failed_allocations": self.failed_allocations,
+        }
+
+
+class MemoryAllocator:
+    """
+    Contiguous allocator over [0, memory_size). allocate() returns the block's
+    start address, or None when no hole fits (the frontend's null).
+    """
+
+    def __init__(self, memory_size: int = DEFAULT_MEMORY_SIZE, policy: str = "first_fit"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown allocation policy {policy!r}; choose from {POLICIES}.")
+        if memory_size < 1:
+            raise ValueError("memory_size must be >= 1.")
+        self.memory_size = memory_size
+        self.policy = policy
+        self.used = 0
+        self.failed_allocations = 0
+        self.allocations: Dict[Hashable, Tuple[int, int]] = {}
+        self._hole_at: Dict[int, int] = {}   # start -> size
+        self._hole_end: Dict[int, int] = {}  # end -> start
+        self._by_size = SortedList()
+        self._by_address = _AddressIndex()
+        self._add_hole(0, memory_size)
+
+    def _add_hole(self, start: int, size: int):
+        self._hole_at[start] = size
+        self._hole_end[start + size] = start
+        self._by_size.add((size, start))
+        self._by_address.add(start, size)
+
+    def _remove_hole(self, start: int) -> int:
+        size = self._hole_at.pop(start)
+        del self._hole_end[start + size]
+        self._by_size.remove((size, start))
+        self._by_address.remove(start)
+        return size
+
+    def _move_hole(self, start: int, new_start: int, new_size: int):
+        """Resize a hole (and/or move its start) without reordering it among the others."""
+        size = self._hole_at.pop(start)
+        del self._hole_end[start + size]
+        self._by_size.remove((size, start))
+        self._hole_at[new_start] = new_size
+        self._hole_end[new_start + new_size] = new_start
+        self._by_size.add((new_size, new_start))
+        self._by_address.update(start, new_start, new_size)
+
+    def _find_hole(self, size: int) -> Optional[Tuple[int, int]]:
+        if self.policy == "first_fit":
+            return self._by_address.first_fit(size)
+        if self.policy == "best_fit":
+            found = self._by_size.ceiling((size, -1))
+        else:
+            largest = self._by_size.last()
+            # Lowest address among the largest holes, like the frontend's reduce.
+            found = self._by_size.ceiling((largest[0], -1)) if largest and largest[0] >= size else None
+        return (found[1], found[0]) if found else None
+
+    def allocate(self, block_id: Hashable, size: int) -> Optional[int]:
+        if size < 1:
+            raise ValueError(f"Allocation {block_id!r} has size {size}; sizes must be >= 1.")
+        if block_id in self.allocations:
+            raise ValueError(f"Block {block_id!r} is already allocated.")
+        hole = self._find_hole(size)
+        if hole is None:
+            self.failed_allocations += 1
+            return None
+        start, hole_size = hole
+        if hole_size > size:
+            self._move_hole(start, start + size, hole_size - size)
+        else:
+            self._remove_hole(start)
+        self.allocations[block_id] = (start, size)
+        self.used += size
+        return start
+
+    def free(self, block_id: Hashable):
+        """Release a block and merge it with free neighbours on either side."""
+        try:
+            start, size = self.allocations.pop(block_id)
+        except KeyError:
+            raise ValueError(f"Block {block_id!r} is not allocated.") from None
+        self.used -= size
+        left = self._hole_end.get(start)
+        right = start + size
+        right_size = self._hole_at.get(right)
+        if right_size is not None and left is not None:
+            self._remove_hole(right)
+            self._move_hole(left, left, self._hole_at[left] + size + right_size)
+        elif left is not None:
+            self._move_hole(left, left, self._hole_at[left] + size)
+        elif right_size is not None:
+            self._move_hole(right, start, size + right_size)
+        else:
+            self._add_hole(start, size)
+
+    @property
+    def free_blocks(self) -> int:
+        return len(self._hole_at)
+
+    @property
+    def largest_free(self) -> int:
+        largest = self._by_size.last()
+        return largest[0] if largest else 0
+
+    def holes(self) -> List[Tuple[int, int]]:
+        """Free (start, size) holes in address order."""
+        return sorted(self._hole_at.items())
+
+    def sample(self, event: int) -> FragmentationSample:
+        return FragmentationSample(
+            event=event,
+            used=self.used,
+            free=self.memory_size - self.used,
+            free_blocks=self.free_blocks,
+            largest_free=self.largest_free,
+            failed_allocations=self.failed_allocations,
+        )
+
+
+@dataclass
+class ReplayReport:
+    policy: str
+    memory_size: int
+    events: int = 0
+    allocations: int = 0
+    frees: int = 0
+    failed_allocations: int = 0
+    timeline: List[FragmentationSample] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "memory_size": self.memory_size,
+            "events": self.events,
+            "allocations": self.allocations,
+            "frees": self.frees,
+            "failed_allocations": self.failed_allocations,
+            "peak_fragmentation": max((s.fragmentation for s in self.timeline), default=0.0),
+            "timeline": [s.to_dict() for s in self.timeline],
+        }
+
+
+# Trace events: ("alloc", block id, size) or ("free", block id).
+TraceEvent = Tuple
+
+
+def read_trace(path: str | Path) -> Iterator[TraceEvent]:
+    """
+    Stream a text trace, one event per line: ``alloc <id> <size>`` or
+    ``free <id>`` (``a``/``f`` also accepted). Blank lines and ``#`` comments
+    are skipped.
+    """
+    with open(path, encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, 1):
+            parts = line.split("#", 1)[0].split()
+            if not parts:
+                continue
+            op = parts[0].lower()
+            if op in ("alloc", "a") and len(parts) == 3:
+                yield ("alloc", parts[1], int(parts[2]))
+            elif op in ("free", "f") and len(parts) == 2:
+                yield ("free", parts[1])
+            else:
+                raise ValueError(f"{path}:{line_no}: cannot parse trace event {line.strip()!r}")
+
+
+def replay(
+    events: Iterable[TraceEvent],
+    policy: str = "first_fit",
+    memory_size: int = DEFAULT_MEMORY_SIZE,
+    sample_every: int = 1000,
+) -> ReplayReport:
+    """
+    Run a trace through one policy. Fragmentation is sampled every
+    ``sample_every`` events and after the last one. Frees of blocks whose
+    allocation failed are ignored, as they never received memory.
+    """
+    allocator = MemoryAllocator(memory_size, policy)
+    report = ReplayReport(policy, memory_size)
+    rejected = set()
+    event_no = 0
+    for event_no, event in enumerate(events, 1):
+        if event[0] == "alloc":
+            report.allocations += 1
+            if allocator.allocate(event[1], event[2]) is None:
+                rejected.add(event[1])
+        elif event[0] == "free":
+            report.frees += 1
+            if event[1] in rejected:
+                rejected.discard(event[1])
+            else:
+                allocator.free(event[1])
+        else:
+            raise ValueError(f"Event {event_no}: unknown operation {event[0]!r}")
+        if event_no % sample_every == 0:
+            report.timeline.append(allocator.sample(event_no))
+    if event_no % sample_every:
+        report.timeline.append(allocator.sample(event_no))
+    report.events = event_no
+    report.failed_allocations = allocator.failed_allocations
+    return report
+
+
+def compare(events: List[TraceEvent], memory_size: int = DEFAULT_MEMORY_SIZE, sample_every: int = 1000) -> Dict:
+    """Replay the same (in-memory) trace under every policy."""
+    reports = [replay(events, policy, memory_size, sample_every) for policy in POLICIES]
+    return {r.policy: r.to_dict() for r in reports}
+
+
+# Usage example:
+# report = replay(read_trace("alloc_trace.txt"), policy="best_fit", memory_size=1 << 20)
+# print(report.failed_allocations, report.timeline[-1].fragmentation)
@@ -5,20 +5,37 @@ Smarter ML + heuristic recommender for CPU scheduling algorithms.
 
 from __future__ import annotations
 
+import bisect
+import copy
+import functools
+import heapq
+import os
 import pickle
 import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+
+from compact_model import CompactForest, export_forest, exportable
+from observability import get_logger, stage
+
+log = get_logger("ml_scheduler")
 
 # Supported algorithms (aligned with frontend names)
 ALGORITHMS = ["FCFS", "SJF", "SRJF", "RR", "Priority", "RR+Priority"]
 
+# Weights of the metrics in the labeling score (lower total is better).
+SCORE_WEIGHTS = {"avg_turnaround": 0.6, "avg_waiting": 0.3, "avg_response": 0.1}
+
+# Bump whenever the simulators, the synthetic workload generator or
+# extract_features change what a labeled dataset contains; cached datasets
+# (dataset_cache.py) are keyed on it.
+SIMULATOR_VERSION = 1
+
 
 @dataclass
 class ProcessSample:
@@ -27,10 +44,345 @@ class ProcessSample:
     arrival: int
 
 
+def normalize_process(p: Dict) -> Tuple[int, int, int]:
+    """(burst, priority, arrival) of a request process dict: burst >= 1, the others >= 0."""
+    return (
+        int(max(1, p.get("burst", p.get("burstTime", 1)))),
+        int(max(0, p.get("priority", 0))),
+        int(max(0, p.get("arrival", p.get("arrivalTime", 0)))),
+    )
+
+
+@dataclass
+class Schedule:
+    """
+    One algorithm's complete run over a process set. Per-process lists follow
+    input order; ``gantt`` holds (process index, start, duration) runs sorted by
+    start, with idle time left implicit.
+    """
+    algorithm: str
+    arrival: List[int]
+    burst: List[int]
+    priority: List[int]
+    start: List[int]
+    finish: List[int]
+    gantt: List[Tuple[int, int, int]]
+
+    def __len__(self) -> int:
+        return len(self.arrival)
+
+    @property
+    def total_time(self) -> int:
+        return max(self.finish, default=0)
+
+    def summary(self) -> Dict[str, float]:
+        n, total = len(self), self.total_time
+        turnaround = [f - a for f, a in zip(self.finish, self.arrival)]
+        return {
+            "avg_waiting": (sum(turnaround) - sum(self.burst)) / n,
+            "avg_turnaround": sum(turnaround) / n,
+            "avg_response": (sum(self.start) - sum(self.arrival)) / n,
+            "total_time": total,
+            "cpu_utilization": sum(self.burst) / total * 100 if total else 0.0,
+            "throughput": n / total if total else 0.0,
+            "gantt_segments": len(self.gantt),
+        }
+
+    def process_metrics(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, int]]:
+        """Per-process rows for input positions [offset, offset + limit)."""
+        stop = len(self) if limit is None else min(len(self), offset + limit)
+        return [
+            {
+                "index": i,
+                "arrival": self.arrival[i],
+                "burst": self.burst[i],
+                "priority": self.priority[i],
+                "start": self.start[i],
+                "completion": self.finish[i],
+                "turnaround": self.finish[i] - self.arrival[i],
+                "waiting": self.finish[i] - self.arrival[i] - self.burst[i],
+                "response": self.start[i] - self.arrival[i],
+            }
+            for i in range(max(offset, 0), stop)
+        ]
+
+    @functools.cached_property
+    def _gantt_starts(self) -> List[int]:
+        return [s for _, s, _ in self.gantt]
+
+    @functools.cached_property
+    def _gantt_ends(self) -> List[int]:
+        return [s + d for _, s, d in self.gantt]
+
+    def gantt_range(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Slice bounds [first, last) of the runs overlapping the time window
+        [start, end). Runs are disjoint and sorted, so both ends bisect the
+        run start and end times, which are built once per schedule.
+        """
+        first, last = 0, len(self.gantt)
+        if start is not None:
+            first = bisect.bisect_right(self._gantt_ends, start)
+        if end is not None:
+            last = bisect.bisect_left(self._gantt_starts, end, lo=first)
+        return first, max(first, last)
+
+
 def _safe_std(values: List[float]) -> float:
     return float(np.std(values)) if values else 0.0
 
 
+class _ReadyQueue:
+    """
+    Ready queue fed by an arrival-sorted cursor over a simulation's process list.
+
+    With ``key`` the queue is a heap ordered on ``(key(index), push order)``;
+    without it the queue is a plain FIFO deque. Push and pop are O(log n).
+    """
+
+    def __init__(self, procs: List[Dict], key: Optional[Callable[[int], tuple]] = None):
+        self._procs = procs
+        self._order = sorted(range(len(procs)), key=lambda i: procs[i]["arrival"])
+        self._cursor = 0
+        self._key = key
+        self._heap: List[Tuple[tuple, int, int]] = []
+        self._fifo: deque = deque()
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._heap) if self._key else len(self._fifo)
+
+    def next_arrival(self) -> Optional[int]:
+        """Arrival time of the next process not yet admitted, if any."""
+        if self._cursor < len(self._order):
+            return self._procs[self._order[self._cursor]]["arrival"]
+        return None
+
+    def admit(self, now: int):
+        """Push every process that has arrived by ``now``."""
+        while self._cursor < len(self._order) and self._procs[self._order[self._cursor]]["arrival"] <= now:
+            self.push(self._order[self._cursor])
+            self._cursor += 1
+
+    def push(self, i: int):
+        if self._key:
+            heapq.heappush(self._heap, (self._key(i), self._seq, i))
+            self._seq += 1
+        else:
+            self._fifo.append(i)
+
+    def pop(self) -> int:
+        if self._key:
+            return heapq.heappop(self._heap)[2]
+        return self._fifo.popleft()
+
+
+# Sentinel larger than any real arrival/key in the padded batch arrays.
+_INT_MAX = np.iinfo(np.int64).max
+
+
+def _score(metrics: Dict) -> float | np.ndarray:
+    """
+    Lower is better; weight turnaround slightly more than waiting.
+    Works on scalar metrics and on batch metric arrays alike.
+    """
+    return (
+        SCORE_WEIGHTS["avg_turnaround"] * metrics["avg_turnaround"]
+        + SCORE_WEIGHTS["avg_waiting"] * metrics["avg_waiting"]
+        + SCORE_WEIGHTS["avg_response"] * metrics["avg_response"]
+    )
+
+
+def pack_workloads(workloads: List[List[ProcessSample]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack process lists into a padded struct-of-arrays batch.
+    Returns (burst, priority, arrival, lengths); the first three are (B, N) int64.
+    """
+    lengths = np.array([len(w) for w in workloads], dtype=np.int64)
+    width = int(lengths.max()) if len(workloads) else 0
+    burst = np.zeros((len(workloads), width), dtype=np.int64)
+    priority = np.zeros_like(burst)
+    arrival = np.zeros_like(burst)
+    for row, processes in enumerate(workloads):
+        for col, p in enumerate(processes):
+            burst[row, col] = p.burst
+            priority[row, col] = p.priority
+            arrival[row, col] = p.arrival
+    return burst, priority, arrival, lengths
+
+
+def _lexicographic_key(major: np.ndarray, minor: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Fold (major, minor) into one int64 that orders like the tuple over valid cells."""
+    if not valid.any():
+        return np.zeros_like(major)
+    minor = minor - minor[valid].min()
+    major = major - major[valid].min()
+    return np.where(valid, major * (int(minor[valid].max()) + 1) + minor, 0)
+
+
+def _batch_fcfs(burst: np.ndarray, arrival: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    FCFS over arrival-sorted columns (padding last). With C the running burst sum,
+    finish_k = C_k + max(0, max_{j<=k}(arrival_j - C_{j-1})), so no dispatch loop is needed.
+    """
+    burst = np.where(valid, burst, 0)
+    arrival = np.where(valid, arrival, 0)
+    total = np.cumsum(burst, axis=1)
+    idle = np.maximum.accumulate(arrival - (total - burst), axis=1)
+    finish = total + np.maximum(idle, 0)
+    return finish - burst, finish
+
+
+def _batch_nonpreemptive(
+    key: np.ndarray, burst: np.ndarray, arrival: np.ndarray, valid: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Non-preemptive dispatch (SJF/Priority) of the arrived job with the smallest key,
+    ties on column order. One vectorized step per dispatch, N steps in total.
+    """
+    rows = np.arange(burst.shape[0])
+    t = np.zeros(burst.shape[0], dtype=np.int64)
+    start = np.zeros_like(burst)
+    finish = np.zeros_like(burst)
+    pending = valid.copy()
+    for _ in range(burst.shape[1]):
+        avail = pending & (arrival <= t[:, None])
+        idle = pending.any(axis=1) & ~avail.any(axis=1)
+        t = np.where(idle, np.where(pending, arrival, _INT_MAX).min(axis=1), t)
+        avail = pending & (arrival <= t[:, None])
+        pick = np.where(avail, key, _INT_MAX).argmin(axis=1)
+        ok = avail[rows, pick]
+        r, c = rows[ok], pick[ok]
+        start[r, c] = t[ok]
+        t[ok] += burst[r, c]
+        finish[r, c] = t[ok]
+        pending[r, c] = False
+    return start, finish
+
+
+def _batch_srjf(burst: np.ndarray, arrival: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Event-driven SRJF: each step runs every workload's shortest remaining job
+    until its next arrival or completion, so there are at most ~2N steps.
+    """
+    rows = np.arange(burst.shape[0])
+    t = np.zeros(burst.shape[0], dtype=np.int64)
+    remaining = np.where(valid, burst, 0)
+    start = np.zeros_like(burst)
+    finish = np.zeros_like(burst)
+    started = np.zeros_like(valid)
+    pending = valid.copy()
+    while pending.any():
+        avail = pending & (arrival <= t[:, None])
+        idle = pending.any(axis=1) & ~avail.any(axis=1)
+        t = np.where(idle, np.where(pending, arrival, _INT_MAX).min(axis=1), t)
+        avail = pending & (arrival <= t[:, None])
+        pick = np.where(avail, remaining, _INT_MAX).argmin(axis=1)
+        ok = avail[rows, pick]
+        r, c, now = rows[ok], pick[ok], t[ok]
+
+        first = ~started[r, c]
+        start[r[first], c[first]] = now[first]
+        started[r, c] = True
+
+        next_arrival = np.where(valid & (arrival > t[:, None]), arrival, _INT_MAX).min(axis=1)[ok]
+        run = np.minimum(remaining[r, c], next_arrival - now)
+        remaining[r, c] -= run
+        t[ok] = now + run
+
+        done = remaining[r, c] == 0
+        finish[r[done], c[done]] = t[ok][done]
+        pending[r[done], c[done]] = False
+    return start, finish
+
+
+def _batch_round_robin(
+    quantum: int,
+    burst: np.ndarray,
+    arrival: np.ndarray,
+    valid: np.ndarray,
+    priority_key: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    RR over arrival-sorted columns (padding last). The FIFO is modelled with an
+    enqueue sequence number per job; with ``priority_key`` (RR+Priority) the job
+    with the smallest key runs, ties on enqueue order. One step per quantum;
+    finished workloads are dropped from the working set as the batch drains.
+    """
+    width = burst.shape[1]
+    cols = np.arange(width)
+    start = np.zeros_like(burst)
+    finish = np.zeros_like(burst)
+
+    ids = np.arange(burst.shape[0])
+    t = np.zeros(burst.shape[0], dtype=np.int64)
+    remaining = np.where(valid, burst, 0)
+    # One extra sentinel column so arrival[row, cursor] is always the next arrival.
+    arrival = np.pad(np.where(valid, arrival, _INT_MAX), ((0, 0), (0, 1)), constant_values=_INT_MAX)
+    key = priority_key
+    pending = valid.copy()
+    started = np.zeros_like(valid)
+    queued = np.zeros_like(valid)
+    seq = np.zeros_like(burst)
+    counter = np.zeros(burst.shape[0], dtype=np.int64)
+    cursor = np.zeros(burst.shape[0], dtype=np.int64)
+
+    def admit():
+        nonlocal counter, cursor, queued, seq
+        if (arrival[np.arange(len(t)), cursor] > t).all():
+            return
+        upto = (arrival[:, :width] <= t[:, None]).sum(axis=1)
+        new = (cols >= cursor[:, None]) & (cols < upto[:, None])
+        seq = np.where(new, counter[:, None] + cols - cursor[:, None], seq)
+        queued = queued | new
+        counter = counter + upto - cursor
+        cursor = upto
+
+    while len(ids):
+        rows = np.arange(len(ids))
+        admit()
+        idle = pending.any(axis=1) & ~queued.any(axis=1)
+        if idle.any():
+            t = np.where(idle, np.maximum(t + 1, arrival[rows, cursor]), t)
+            admit()
+
+        order = seq
+        if key is not None:
+            best = np.where(queued, key, _INT_MAX).min(axis=1)
+            order = np.where(key == best[:, None], seq, _INT_MAX)
+        pick = np.where(queued, order, _INT_MAX).argmin(axis=1)
+        ok = queued[rows, pick]
+        r, c = rows[ok], pick[ok]
+
+        first = ~started[r, c]
+        start[ids[r[first]], c[first]] = t[r[first]]
+        started[r, c] = True
+        queued[r, c] = False
+
+        run = np.minimum(quantum, remaining[r, c])
+        remaining[r, c] -= run
+        t[r] += run
+        admit()
+
+        done = remaining[r, c] == 0
+        finish[ids[r[done]], c[done]] = t[r[done]]
+        pending[r[done], c[done]] = False
+        back_r, back_c = r[~done], c[~done]
+        seq[back_r, back_c] = counter[back_r]
+        counter[back_r] += 1
+        queued[back_r, back_c] = True
+
+        live = pending.any(axis=1)
+        if live.sum() < 0.75 * len(ids):
+            ids, t, counter, cursor = ids[live], t[live], counter[live], cursor[live]
+            remaining, arrival, pending, started, queued, seq = (
+                a[live] for a in (remaining, arrival, pending, started, queued, seq)
+            )
+            if key is not None:
+                key = key[live]
+    return start, finish
+
+
 class MLScheduler:
     """
     Provides two layers of intelligence:
@@ -43,21 +395,35 @@ class MLScheduler:
         model_type: str = "rf",
         model_path: str = "ml_scheduler.pkl",
         time_quantum: int = 2,
+        dataset_cache=None,
     ):
         self.model_type = model_type
         self.model_path = Path(model_path)
         self.time_quantum = max(1, time_quantum)
         self.model = None
+        # Optional dataset_cache.DatasetCache that train() draws synthetic data from.
+        self.dataset_cache = dataset_cache
+        # Trade-off table from the last budgeted train() (model_selection.SelectionReport).
+        self.selection = None
 
     # ---------------------------
     # Synthetic data + labeling
     # ---------------------------
-    def _simulate_algorithm(self, processes: List[ProcessSample], algo: str) -> Dict[str, float]:
+    def _run_schedule(
+        self,
+        processes: List[ProcessSample],
+        algo: str,
+        gantt: Optional[List[List[int]]] = None,
+    ) -> List[Dict]:
         """
-        Rough simulation to estimate average waiting/turnaround for a process set.
+        Run one algorithm over a process set and return the per-process records
+        (input order) with start/finish times. When ``gantt`` is a list, the
+        timeline is appended to it run-length encoded: [process index, start,
+        duration] rows, with back-to-back slices of one process merged.
         """
         procs = [
             {
+                "index": i,
                 "burst": p.burst,
                 "priority": p.priority,
                 "arrival": p.arrival,
@@ -65,112 +431,113 @@ class MLScheduler:
                 "start": None,
                 "finish": None,
             }
-            for p in processes
+            for i, p in enumerate(processes)
         ]
 
         current_time = 0
-        gantt: List[Tuple[int, str]] = []
         finished = 0
 
-        def record(pid: str, duration: int):
-            if duration <= 0:
+        def record(index: int, duration: int):
+            if gantt is None or duration <= 0:
                 return
-            start = gantt[-1][0] if gantt else current_time
-            gantt.append((start + duration, pid))
+            if gantt and gantt[-1][0] == index and gantt[-1][1] + gantt[-1][2] == current_time:
+                gantt[-1][2] += duration
+            else:
+                gantt.append([index, current_time, duration])
 
         if algo == "FCFS":
-            procs.sort(key=lambda p: p["arrival"])
-            for p in procs:
+            for p in sorted(procs, key=lambda p: p["arrival"]):
                 current_time = max(current_time, p["arrival"])
                 p["start"] = current_time
-                record("P", p["burst"])
+                record(p["index"], p["burst"])
                 current_time += p["burst"]
                 p["finish"] = current_time
 
-        elif algo == "SJF":
-            queue = procs[:]
-            while queue:
-                available = [p for p in queue if p["arrival"] <= current_time]
-                if not available:
-                    current_time = min(p["arrival"] for p in queue)
-                    continue
-                shortest = min(available, key=lambda p: p["burst"])
-                current_time = max(current_time, shortest["arrival"])
-                shortest["start"] = current_time if shortest["start"] is None else shortest["start"]
-                record("P", shortest["burst"])
-                current_time += shortest["burst"]
-                shortest["finish"] = current_time
-                queue.remove(shortest)
-
-        elif algo == "Priority":
-            queue = procs[:]
-            while queue:
-                available = [p for p in queue if p["arrival"] <= current_time]
-                if not available:
-                    current_time = min(p["arrival"] for p in queue)
+        elif algo in ("SJF", "Priority"):
+            # Non-preemptive: ties fall back to input order, like min() over the list.
+            if algo == "SJF":
+                ready = _ReadyQueue(procs, key=lambda i: (procs[i]["burst"], i))
+            else:
+                ready = _ReadyQueue(procs, key=lambda i: (procs[i]["priority"], procs[i]["arrival"], i))
+            while finished < len(procs):
+                ready.admit(current_time)
+                if not ready:
+                    current_time = ready.next_arrival()
                     continue
-                chosen = min(available, key=lambda p: (p["priority"], p["arrival"]))
-                current_time = max(current_time, chosen["arrival"])
-                chosen["start"] = current_time if chosen["start"] is None else chosen["start"]
-                record("P", chosen["burst"])
+                chosen = procs[ready.pop()]
+                chosen["start"] = current_time
+                record(chosen["index"], chosen["burst"])
                 current_time += chosen["burst"]
                 chosen["finish"] = current_time
-                queue.remove(chosen)
+                finished += 1
 
         elif algo == "SRJF":
+            # Event-driven: run the job with the least remaining time until the
+            # next arrival or its own completion. The remaining time is captured
+            # when a job is (re)queued, and ties break on input order.
+            ready = _ReadyQueue(procs, key=lambda i: (procs[i]["remaining"], i))
             while finished < len(procs):
-                available = [p for p in procs if p["arrival"] <= current_time and p["remaining"] > 0]
-                if not available:
-                    current_time = min(p["arrival"] for p in procs if p["remaining"] > 0)
+                ready.admit(current_time)
+                if not ready:
+                    current_time = ready.next_arrival()
                     continue
-                shortest = min(available, key=lambda p: p["remaining"])
+                i = ready.pop()
+                shortest = procs[i]
                 if shortest["start"] is None:
                     shortest["start"] = current_time
-                shortest["remaining"] -= 1
-                record("P", 1)
-                current_time += 1
+                run = shortest["remaining"]
+                next_arrival = ready.next_arrival()
+                if next_arrival is not None:
+                    run = min(run, next_arrival - current_time)
+                record(i, run)
+                shortest["remaining"] -= run
+                current_time += run
                 if shortest["remaining"] == 0:
                     shortest["finish"] = current_time
                     finished += 1
+                else:
+                    ready.push(i)
 
         elif algo in ("RR", "RR+Priority"):
-            queue: List[Dict] = []
-            procs.sort(key=lambda p: p["arrival"])
-            idx = 0
+            # RR+Priority re-picks the best (priority, arrival) job every quantum;
+            # ties keep queue order, as a stable re-sort of the ready list would.
+            if algo == "RR":
+                ready = _ReadyQueue(procs)
+            else:
+                ready = _ReadyQueue(procs, key=lambda i: (procs[i]["priority"], procs[i]["arrival"]))
             while finished < len(procs):
-                while idx < len(procs) and procs[idx]["arrival"] <= current_time:
-                    queue.append(procs[idx])
-                    idx += 1
-
-                if not queue:
-                    if idx < len(procs):
-                        current_time = max(current_time + 1, procs[idx]["arrival"])
+                ready.admit(current_time)
+                if not ready:
+                    current_time = max(current_time + 1, ready.next_arrival())
                     continue
 
-                if algo == "RR+Priority":
-                    queue.sort(key=lambda p: (p["priority"], p["arrival"]))
-
-                proc = queue.pop(0)
+                i = ready.pop()
+                proc = procs[i]
                 if proc["start"] is None:
                     proc["start"] = current_time
                 slice_time = min(self.time_quantum, proc["remaining"])
-                record("P", slice_time)
+                record(i, slice_time)
                 proc["remaining"] -= slice_time
                 current_time += slice_time
 
-                while idx < len(procs) and procs[idx]["arrival"] <= current_time:
-                    queue.append(procs[idx])
-                    idx += 1
+                ready.admit(current_time)
 
                 if proc["remaining"] == 0:
                     proc["finish"] = current_time
                     finished += 1
                 else:
-                    queue.append(proc)
+                    ready.push(i)
 
         else:
             raise ValueError(f"Unknown algorithm: {algo}")
 
+        return procs
+
+    def _simulate_algorithm(self, processes: List[ProcessSample], algo: str) -> Dict[str, float]:
+        """
+        Rough simulation to estimate average waiting/turnaround for a process set.
+        """
+        procs = self._run_schedule(processes, algo)
         waiting_times = []
         turnaround_times = []
         response_times = []
@@ -190,85 +557,248 @@ class MLScheduler:
             "avg_response": float(np.mean(response_times)),
         }
 
+    def simulate_schedule(self, processes: List[ProcessSample], algo: str) -> Schedule:
+        """
+        Full schedule for one algorithm: per-process times and the
+        run-length-encoded Gantt timeline.
+        """
+        if not processes:
+            raise ValueError("No processes provided for simulation.")
+        gantt: List[List[int]] = []
+        procs = self._run_schedule(processes, algo, gantt)
+        return Schedule(
+            algorithm=algo,
+            arrival=[p["arrival"] for p in procs],
+            burst=[p["burst"] for p in procs],
+            priority=[p["priority"] for p in procs],
+            start=[p["start"] for p in procs],
+            finish=[p["finish"] for p in procs],
+            gantt=[tuple(segment) for segment in gantt],
+        )
+
+    def simulate_batch(
+        self,
+        burst: np.ndarray,
+        priority: np.ndarray,
+        arrival: np.ndarray,
+        lengths: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Simulate every algorithm over a padded batch of workloads at once.
+
+        burst/priority/arrival are (B, N) matrices whose first lengths[b] columns
+        hold workload b (see pack_workloads). Returns avg_waiting, avg_turnaround
+        and avg_response as (B, len(ALGORITHMS)) arrays, columns in ALGORITHMS
+        order, matching _simulate_algorithm per workload.
+        """
+        burst = np.asarray(burst, dtype=np.int64)
+        priority = np.asarray(priority, dtype=np.int64)
+        arrival = np.asarray(arrival, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if burst.ndim != 2 or priority.shape != burst.shape or arrival.shape != burst.shape:
+            raise ValueError("burst, priority and arrival must be matrices of the same shape.")
+        if lengths.shape != (burst.shape[0],) or (lengths < 1).any() or (lengths > burst.shape[1]).any():
+            raise ValueError("lengths must give 1..N processes for every workload.")
+
+        valid = np.arange(burst.shape[1]) < lengths[:, None]
+        # FCFS and the RR family dispatch in (stable) arrival order.
+        order = np.argsort(np.where(valid, arrival, _INT_MAX), axis=1, kind="stable")
+        s_burst, s_priority, s_arrival, s_valid = (
+            np.take_along_axis(a, order, axis=1) for a in (burst, priority, arrival, valid)
+        )
+
+        schedules = {
+            "FCFS": _batch_fcfs(s_burst, s_arrival, s_valid),
+            "SJF": _batch_nonpreemptive(burst, burst, arrival, valid),
+            "SRJF": _batch_srjf(burst, arrival, valid),
+            "RR": _batch_round_robin(self.time_quantum, s_burst, s_arrival, s_valid),
+            "Priority": _batch_nonpreemptive(
+                _lexicographic_key(priority, arrival, valid), burst, arrival, valid
+            ),
+            "RR+Priority": _batch_round_robin(
+                self.time_quantum, s_burst, s_arrival, s_valid,
+                priority_key=_lexicographic_key(s_priority, s_arrival, s_valid),
+            ),
+        }
+
+        metrics = {name: np.empty((burst.shape[0], len(ALGORITHMS))) for name in ("avg_waiting", "avg_turnaround", "avg_response")}
+        for col, algo in enumerate(ALGORITHMS):
+            start, finish = schedules[algo]
+            if algo in ("FCFS", "RR", "RR+Priority"):
+                b, a, v = s_burst, s_arrival, s_valid
+            else:
+                b, a, v = burst, arrival, valid
+            metrics["avg_waiting"][:, col] = np.where(v, finish - a - b, 0).sum(axis=1) / lengths
+            metrics["avg_turnaround"][:, col] = np.where(v, finish - a, 0).sum(axis=1) / lengths
+            metrics["avg_response"][:, col] = np.where(v, start - a, 0).sum(axis=1) / lengths
+        return metrics
+
     def _label_best_algorithm(self, processes: List[ProcessSample]) -> str:
-        scores = {}
-        for algo in ALGORITHMS:
-            metrics = self._simulate_algorithm(processes, algo)
-            # Lower is better; weight turnaround slightly more than waiting.
-            score = (0.6 * metrics["avg_turnaround"]) + (0.3 * metrics["avg_waiting"]) + (0.1 * metrics["avg_response"])
-            scores[algo] = score
+        scores = {algo: _score(self._simulate_algorithm(processes, algo)) for algo in ALGORITHMS}
         # pick algorithm with minimal score
         return min(scores.items(), key=lambda kv: kv[1])[0]
 
-    def generate_dataset(self, n_samples: int = 1200, n_processes_range: Tuple[int, int] = (3, 10)):
+    def _label_batch(self, workloads: List[List[ProcessSample]]) -> List[str]:
+        """Vectorized _label_best_algorithm over many workloads."""
+        scores = _score(self.simulate_batch(*pack_workloads(workloads)))
+        return [ALGORITHMS[i] for i in scores.argmin(axis=1)]
+
+    def _featurize_and_label(self, workloads: List[List[ProcessSample]]):
+        X = [self.extract_features(processes) for processes in workloads]
+        y = self._label_batch(workloads)
+        return np.vstack(X), np.array(y)
+
+    def generate_dataset(
+        self,
+        n_samples: int = 1200,
+        n_processes_range: Tuple[int, int] = (3, 10),
+        seed: int = 42,
+        n_jobs: Optional[int] = None,
+        chunk_size: int = 1024,
+        cache=None,
+    ):
         """
         Generate synthetic datasets and label them by simulated best algorithm.
         Returns X (features) and y (labels).
+
+        By default all samples come from one random.Random(seed) stream. With
+        n_jobs set, samples are drawn in chunk_size chunks, each from its own
+        stream spawned from seed, and labeled on n_jobs worker processes
+        (-1 uses every core). That result depends on seed and chunk_size only,
+        so it is identical for any worker count.
+
+        With a dataset_cache.DatasetCache, the same dataset is read from (and
+        only its missing rows labeled into) the cache, as memory-mapped arrays.
         """
-        rng = random.Random(42)
-        X, y = [], []
-        for _ in range(n_samples):
-            n_proc = rng.randint(*n_processes_range)
-            processes = []
-            for _ in range(n_proc):
-                burst = rng.randint(1, 25)
-                priority = rng.randint(1, 10)
-                arrival = rng.randint(0, 12)
-                processes.append(ProcessSample(burst=burst, priority=priority, arrival=arrival))
-
-            label = self._label_best_algorithm(processes)
-            X.append(self.extract_features(processes))
-            y.append(label)
+        if n_samples < 1:
+            raise ValueError("n_samples must be at least 1.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        if cache is not None:
+            return cache.dataset(self, n_samples, n_processes_range, seed, n_jobs, chunk_size)
+        if n_jobs is None:
+            workloads = _random_workloads(random.Random(seed), n_samples, n_processes_range)
+            return self._featurize_and_label(workloads)
 
-        return np.vstack(X), np.array(y)
+        sizes = [min(chunk_size, n_samples - offset) for offset in range(0, n_samples, chunk_size)]
+        chunks = [
+            (self.time_quantum, chunk_seed, size, n_processes_range)
+            for chunk_seed, size in zip(_chunk_seeds(seed, len(sizes)), sizes)
+        ]
+        parts = list(_label_chunks(chunks, n_jobs))
+        return np.vstack([X for X, _ in parts]), np.concatenate([y for _, y in parts])
 
     # ---------------------------
     # Model lifecycle
     # ---------------------------
-    def train(self, X=None, y=None):
+    def train(self, X=None, y=None, budget=None):
         """
         Train the ML model. If X/y not provided, generate synthetic data.
+
+        With a model_selection.ModelBudget, fit every candidate model on the
+        same split instead and keep the most accurate one within the budget;
+        the trade-off table is left in self.selection.
         """
+        # Imported here so serving a compact model never loads scikit-learn.
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import accuracy_score
+        from sklearn.model_selection import train_test_split
+
         if X is None or y is None:
-            X, y = self.generate_dataset()
+            X, y = self.generate_dataset(cache=self.dataset_cache)
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=7, stratify=y)
+        if budget is not None:
+            from model_selection import TRANSFER_FACTOR, select_model
+
+            transfer = _random_workloads(random.Random(len(X)), TRANSFER_FACTOR * len(X_train), (3, 10))
+            self.selection = select_model(
+                X_train, y_train, X_test, y_test, budget,
+                transfer_X=np.vstack([self.extract_features(processes) for processes in transfer]),
+            )
+            self.model = self.selection.result.model
+            return self.selection.result.accuracy
+
         self.model = RandomForestClassifier(
             n_estimators=200,
             max_depth=None,
             random_state=7,
             n_jobs=-1,
         )
-        self.model.fit(X_train, y_train)
+        with stage("model_train"):
+            self.model.fit(X_train, y_train)
         y_pred = self.model.predict(X_test)
         acc = accuracy_score(y_test, y_pred)
-        print(f"ML Scheduler model accuracy: {acc:.3f}")
+        log.info("model trained", accuracy=round(float(acc), 3), samples=len(X))
         return acc
 
+    def warm_start(self, X, y, n_new_trees: int = 50) -> "MLScheduler":
+        """
+        Return a new scheduler whose forest is a copy of this one plus
+        ``n_new_trees`` trees fitted on X/y (scikit-learn's warm_start). This
+        scheduler is left untouched. y must cover exactly the model's classes,
+        since the existing trees keep their class layout.
+        """
+        if not (exportable(self.model) and hasattr(self.model, "estimators_")):
+            raise ValueError("Warm start needs a scikit-learn forest; train a full model instead.")
+        if set(np.unique(y)) != set(self.model.classes_):
+            raise ValueError("Warm-start labels must cover exactly the model's classes.")
+        model = copy.deepcopy(self.model)
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees)
+        with stage("model_train"):
+            model.fit(X, y)
+        grown = MLScheduler(model_type=self.model_type, model_path=str(self.model_path), time_quantum=self.time_quantum)
+        grown.model = model
+        log.info("model warm-started", trees=len(model.estimators_), samples=len(X))
+        return grown
+
     def save(self, path: str | Path = None):
-        """Persist trained model to disk."""
+        """Persist trained model to disk (written alongside, then renamed into place)."""
         path = Path(path) if path else self.model_path
         if self.model is None:
             raise ValueError("No model to save. Train first.")
-        with open(path, "wb") as f:
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
             pickle.dump(self.model, f)
+        os.replace(tmp, path)
         return path
 
+    def export_compact(self, path: str | Path = None):
+        """
+        Write the trained forest in the sklearn-free compact format
+        (defaults to the model path with a .npz suffix).
+        """
+        path = Path(path) if path else self.model_path.with_suffix(".npz")
+        if self.model is None or not exportable(self.model):
+            raise ValueError("No trained forest or tree to export. Train first.")
+        return export_forest(self.model, path)
+
     def load(self, path: str | Path = None):
-        """Load trained model from disk."""
+        """
+        Load trained model from disk. A .npz path is read as a memory-mapped
+        compact model; anything else is unpickled.
+        """
         path = Path(path) if path else self.model_path
         if not path.exists():
             return False
         try:
-            with open(path, "rb") as f:
-                self.model = pickle.load(f)
+            with stage("model_load"):
+                if path.suffix == ".npz":
+                    self.model = CompactForest.load(path)
+                else:
+                    with open(path, "rb") as f:
+                        self.model = pickle.load(f)
             return True
         except Exception as exc:
             # Version mismatch or corrupted pickle; ignore and retrain.
-            print(f"[MLScheduler] Failed to load cached model ({exc}). Will retrain.")
+            log.warning("cached model failed to load; will retrain", path=str(path), error=str(exc))
             self.model = None
             return False
 
+    def is_ready(self) -> bool:
+        """True when a model is loaded and matches the current feature layout."""
+        return self._is_model_compatible(self.extract_features([ProcessSample(1, 0, 0)]).reshape(1, -1))
+
     def _is_model_compatible(self, features: np.ndarray) -> bool:
         """
         Check whether the loaded model expects the same feature size.
@@ -304,6 +834,35 @@ class MLScheduler:
         ], dtype=float)
         return features
 
+    def extract_features_batch(
+        self,
+        burst: np.ndarray,
+        priority: np.ndarray,
+        arrival: np.ndarray,
+        lengths: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Vectorized extract_features over a padded batch (see pack_workloads).
+        Returns a (B, n_features) matrix.
+        """
+        lengths = np.asarray(lengths)
+        valid = np.arange(np.shape(burst)[1]) < lengths[:, None]
+        count = lengths.astype(float)
+
+        def stats(values):
+            values = np.where(valid, values, 0).astype(float)
+            mean = values.sum(axis=1) / count
+            std = np.sqrt((np.where(valid, values - mean[:, None], 0.0) ** 2).sum(axis=1) / count)
+            return mean, std, std / np.maximum(mean, 1e-6)
+
+        return np.column_stack([
+            count,
+            *stats(burst),
+            *stats(priority),
+            *stats(arrival),
+            np.where(valid, burst, 0).sum(axis=1).astype(float),  # workload size
+        ])
+
     # ---------------------------
     # Prediction
     # ---------------------------
@@ -311,16 +870,16 @@ class MLScheduler:
         """
         Rule-based fallback when model is unavailable. Returns (algorithm, confidence).
         """
-        burst = [p.burst if isinstance(p, ProcessSample) else p["burst"] for p in processes]
-        priority = [p.priority if isinstance(p, ProcessSample) else p["priority"] for p in processes]
-        arrival = [p.arrival if isinstance(p, ProcessSample) else p.get("arrival", 0) for p in processes]
+        if not processes:
+            return "FCFS", 0.55
+        return self._heuristic_from_features(self.extract_features(processes))
 
-        burst_std = _safe_std(burst)
-        arrival_std = _safe_std(arrival)
-        priority_std = _safe_std(priority)
-        avg_burst = float(np.mean(burst)) if burst else 0.0
-        avg_priority = float(np.mean(priority)) if priority else 0.0
-        avg_arrival = float(np.mean(arrival)) if arrival else 0.0
+    @staticmethod
+    def _heuristic_from_features(features: np.ndarray) -> Tuple[str, float]:
+        """The fallback rules, on an extract_features vector."""
+        avg_burst, burst_std = features[1], features[2]
+        avg_priority, priority_std = features[4], features[5]
+        avg_arrival, arrival_std = features[7], features[8]
 
         # Simple interpretable rules.
         if burst_std < 1.5 and arrival_std < 1.0:
@@ -335,6 +894,13 @@ class MLScheduler:
             return "SRJF", 0.60
         return "RR+Priority", 0.50
 
+    @staticmethod
+    def to_samples(processes: List[Dict]) -> List[ProcessSample]:
+        """
+        Normalize request process dicts (burst/burstTime, arrival/arrivalTime).
+        """
+        return [ProcessSample(*normalize_process(p)) for p in processes]
+
     def predict(self, processes: List[Dict]) -> str:
         """
         Predict the best algorithm for a given process list.
@@ -349,38 +915,147 @@ class MLScheduler:
         if not processes:
             raise ValueError("No processes provided for prediction.")
 
-        samples = [
-            ProcessSample(
-                burst=int(max(1, p.get("burst", p.get("burstTime", 1)))),
-                priority=int(max(0, p.get("priority", 0))),
-                arrival=int(max(0, p.get("arrival", p.get("arrivalTime", 0)))),
-            )
-            for p in processes
-        ]
+        samples = self.to_samples(processes)
+        with stage("feature_extraction"):
+            features = self.extract_features(samples)
+        return self.predict_features(features)
+
+    def predict_features(self, features: np.ndarray) -> Tuple[str, float]:
+        """Predict from an already extracted feature vector (see workload_stream)."""
+        self._ensure_model()
 
-        # Ensure model is ready; otherwise train quickly on synthetic data.
+        with stage("predict_proba"):
+            probs = self.model.predict_proba(np.asarray(features, dtype=float).reshape(1, -1))[0]
+        classes = self.model.classes_
+        top_idx = int(np.argmax(probs))
+        predicted = classes[top_idx]
+        confidence = float(probs[top_idx])
+        return predicted, confidence
+
+    def _ensure_model(self):
+        """Load the model, or train quickly on synthetic data if missing or stale."""
         if self.model is None:
             loaded = self.load()
             if not loaded:
                 self.train()
-
-        features = self.extract_features(samples).reshape(1, -1)
-        if not self._is_model_compatible(features):
+        if not self.is_ready():
             # Retrain if a stale model uses old feature dimensions.
             self.model = None
             self.train()
 
-        probs = self.model.predict_proba(features)[0]
-        classes = self.model.classes_
-        top_idx = int(np.argmax(probs))
-        predicted = classes[top_idx]
-        confidence = float(probs[top_idx])
-        return predicted, confidence
+    def _pack_requests(self, workloads: List) -> Tuple[Tuple[np.ndarray, ...], List[Optional[Dict]]]:
+        """
+        Normalize request workloads into a padded batch of the well-formed ones.
+        Returns ((burst, priority, arrival, lengths), results) where results holds
+        {"error": ...} for each malformed workload and None for each packed one.
+        """
+        rows, results = [], []
+        for i, processes in enumerate(workloads):
+            try:
+                if not isinstance(processes, list) or not processes:
+                    raise ValueError("expected a non-empty list of processes")
+                rows.append(np.array(
+                    [(s.burst, s.priority, s.arrival) for s in self.to_samples(processes)],
+                    dtype=np.int64,
+                ))
+                results.append(None)
+            except (AttributeError, TypeError, ValueError, OverflowError) as exc:
+                results.append({"error": f"workload {i}: {exc}"})
+
+        lengths = np.array([len(r) for r in rows], dtype=np.int64)
+        packed = np.zeros((len(rows), int(lengths.max()) if rows else 0, 3), dtype=np.int64)
+        for i, r in enumerate(rows):
+            packed[i, :len(r)] = r
+        return (packed[..., 0], packed[..., 1], packed[..., 2], lengths), results
+
+    def predict_packed(
+        self,
+        burst: np.ndarray,
+        priority: np.ndarray,
+        arrival: np.ndarray,
+        lengths: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predict for a padded batch. Returns (algorithms, confidences) arrays.
+        """
+        with stage("feature_extraction"):
+            features = self.extract_features_batch(burst, priority, arrival, lengths)
+        self._ensure_model()
+        with stage("predict_proba"):
+            probs = self.model.predict_proba(features)
+        top = probs.argmax(axis=1)
+        return self.model.classes_[top], probs[np.arange(len(top)), top]
+
+    def predict_batch(self, workloads: List[List[Dict]]) -> List[Dict]:
+        """
+        Predict for many process lists with one feature pass and one predict_proba call.
+        Returns one dict per workload, in order: suggested_algorithm/confidence,
+        or error for a malformed workload.
+        """
+        batch, results = self._pack_requests(workloads)
+        if not len(batch[3]):
+            return results
+
+        predictions = zip(*self.predict_packed(*batch))
+        for i, result in enumerate(results):
+            if result is None:
+                algo, confidence = next(predictions)
+                results[i] = {"suggested_algorithm": str(algo), "confidence": float(confidence)}
+        return results
+
+
+def _random_workloads(
+    rng: random.Random, n_samples: int, n_processes_range: Tuple[int, int]
+) -> List[List[ProcessSample]]:
+    workloads = []
+    for _ in range(n_samples):
+        n_proc = rng.randint(*n_processes_range)
+        processes = []
+        for _ in range(n_proc):
+            burst = rng.randint(1, 25)
+            priority = rng.randint(1, 10)
+            arrival = rng.randint(0, 12)
+            processes.append(ProcessSample(burst=burst, priority=priority, arrival=arrival))
+        workloads.append(processes)
+    return workloads
+
+
+def _chunk_seeds(seed: int, count: int) -> List[int]:
+    """Seeds of the first ``count`` chunks of generate_dataset's chunked mode."""
+    return [int(stream.generate_state(1, dtype=np.uint64)[0]) for stream in np.random.SeedSequence(seed).spawn(count)]
+
+
+def _generate_chunk(
+    time_quantum: int, seed: int, n_samples: int, n_processes_range: Tuple[int, int], skip: int = 0
+):
+    """
+    Worker entry point for MLScheduler.generate_dataset's process-pool mode.
+    The first ``skip`` workloads are drawn but not labeled, so a chunk can be
+    completed from where a shorter one left off.
+    """
+    scheduler = MLScheduler(time_quantum=time_quantum)
+    workloads = _random_workloads(random.Random(seed), n_samples, n_processes_range)
+    return scheduler._featurize_and_label(workloads[skip:])
+
+
+def _label_chunks(chunks: List[tuple], n_jobs: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """_generate_chunk over ``chunks`` (argument tuples) in order, on up to n_jobs processes."""
+    workers = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            yield _generate_chunk(*chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_generate_chunk, *zip(*chunks))
 
 
 # Usage example (manual training):
+# from observability import configure_logging
+# configure_logging()  # Show progress, including the model's accuracy, on stderr
 # ml = MLScheduler()
 # ml.train()          # Train on synthetic data
 # ml.save()           # Save to disk (ml_scheduler.pkl)
+# ml.export_compact() # Compact, sklearn-free copy (ml_scheduler.npz)
 # algo, conf = ml.predict_with_confidence([{"burst": 5, "priority": 2, "arrival": 0}])
 # print(algo, conf)
@@ -0,0 +1,360 @@
+"""
+model_registry.py
+Process-wide holder for the serving MLScheduler.
+
+The registry loads the model once (the compact .npz export when present,
+otherwise the pickle) and shares it across requests and threads. A published
+scheduler is never mutated: retraining builds a new one in a background thread
+and swaps the reference in under a lock, so readers always see either the old
+model or the new one. Each swap bumps the version and records a tag saying
+where the model came from (disk, retrain, or an online-learning update). Until
+a model is ready, predictions come from the scheduler's heuristic fallback.
+
+Models the registry trains are saved to ``state_dir`` (default: model_state/
+next to the model file), never over ``model_path``, which is the checked-in
+model; on startup a published model takes precedence over it. Each saved
+publish also writes a small manifest with its version, which other processes
+sharing the state_dir follow with sync() or watch(), so they serve the same
+model under the same version.
+
+Model predictions are cached on an order-independent digest of the normalized
+workload plus the model version; the cache is cleared on every swap.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from compact_model import exportable
+from ml_scheduler import MLScheduler, ProcessSample
+from observability import PREDICTIONS, get_logger
+from ttl_cache import TTLCache
+
+log = get_logger("model_registry")
+
+
+def workload_digest(burst: np.ndarray, priority: np.ndarray, arrival: np.ndarray) -> str:
+    """
+    Canonical hash of a workload: the multiset of (burst, priority, arrival)
+    triples, so permuted process lists share a digest.
+    """
+    triples = np.column_stack([burst, priority, arrival]).astype(np.int64)
+    triples = triples[np.lexsort(triples.T[::-1])]
+    return hashlib.blake2b(triples.tobytes(), digest_size=16).hexdigest()
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        model_path: str | Path = "ml_scheduler.pkl",
+        time_quantum: int = 2,
+        cache_size: int = 4096,
+        cache_ttl: Optional[float] = 600.0,
+        budget=None,
+        dataset_cache=None,
+        state_dir: str | Path | None = None,
+    ):
+        self.model_path = Path(model_path)
+        self.state_dir = Path(state_dir) if state_dir else self.model_path.parent / "model_state"
+        self.time_quantum = time_quantum
+        # Optional model_selection.ModelBudget that retrains select under.
+        self.budget = budget
+        # Optional dataset_cache.DatasetCache, so retrains skip relabeling synthetic data.
+        self.dataset_cache = dataset_cache
+        self._lock = threading.Lock()
+        # (version, scheduler) is swapped as one reference so readers never mix them.
+        self._serving: Tuple[int, Optional[MLScheduler]] = (0, None)
+        self.model_info: Dict[str, Any] = {"version": 0, "tag": None}
+        self._trainer: Optional[threading.Thread] = None
+        # (version, scikit-learn scheduler) behind a compact model; see trainable().
+        self._trainable: Tuple[int, Optional[MLScheduler]] = (0, None)
+        # Used for heuristic predictions and request parsing; it never holds a model.
+        self._fallback = MLScheduler(model_path=str(self.model_path), time_quantum=time_quantum)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    @property
+    def version(self) -> int:
+        """Incremented on every swap; 0 means no model has been published yet."""
+        return self._serving[0]
+
+    @property
+    def scheduler(self) -> Optional[MLScheduler]:
+        return self._serving[1]
+
+    def is_training(self) -> bool:
+        trainer = self._trainer
+        return trainer is not None and trainer.is_alive()
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """Block until a running background retrain finishes; False on timeout."""
+        trainer = self._trainer
+        if trainer is not None:
+            trainer.join(timeout)
+        return not self.is_training()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "model_version": self.version,
+            "model_ready": self.scheduler is not None,
+            "model_info": self.model_info,
+            "training": self.is_training(),
+            "cache": self.cache.stats(),
+        }
+
+    @property
+    def published_path(self) -> Path:
+        """Where publish() writes the pickle."""
+        return self.state_dir / self.model_path.name
+
+    @property
+    def compact_path(self) -> Path:
+        """Where publish() writes the compact export."""
+        return self.published_path.with_suffix(".npz")
+
+    @property
+    def manifest_path(self) -> Path:
+        """Version and tag of the model last saved to state_dir."""
+        return self.published_path.with_suffix(".json")
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            return manifest if isinstance(manifest.get("version"), int) else {}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def load(self) -> bool:
+        """
+        Load the model from disk and publish it: the last published model if
+        there is one, else the one at model_path, preferring each compact
+        export over its pickle. If none is usable, start a background retrain
+        and return False.
+        """
+        manifest = self._read_manifest()
+        candidates = (self.compact_path, self.published_path, self.model_path.with_suffix(".npz"), self.model_path)
+        for path in candidates:
+            scheduler = MLScheduler(model_path=str(self.model_path), time_quantum=self.time_quantum)
+            if scheduler.load(path) and scheduler.is_ready():
+                # A published model keeps the version it was published under.
+                published = path in (self.compact_path, self.published_path)
+                self._swap(scheduler, "disk", version=manifest.get("version") if published else None, path=str(path))
+                return True
+        log.warning("no compatible model on disk; training in the background", path=str(self.model_path))
+        self.retrain_async()
+        return False
+
+    def retrain_async(self) -> bool:
+        """Start a background retrain unless one is already running."""
+        with self._lock:
+            if self.is_training():
+                return False
+            self._trainer = threading.Thread(target=self._retrain, name="model-retrain", daemon=True)
+            self._trainer.start()
+            return True
+
+    def _retrain(self):
+        try:
+            scheduler = MLScheduler(
+                model_path=str(self.model_path), time_quantum=self.time_quantum, dataset_cache=self.dataset_cache
+            )
+            scheduler.train(budget=self.budget)
+            self.publish(scheduler, "retrain")
+        except Exception as exc:
+            log.error("background retrain failed", error=str(exc))
+
+    def publish(self, scheduler: MLScheduler, tag: str, persist: bool = True, **info) -> int:
+        """
+        Serve a freshly trained scheduler and return its version. With
+        ``persist`` the pickle and compact export in state_dir are replaced
+        first (both writes are atomic), so a restart serves the same model, and
+        the version is above the saved manifest's, so processes that sync()
+        from it take the model even if this one was serving an older one. A model
+        chosen under a budget carries its trade-off table into model_info.
+        """
+        if persist:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            scheduler.save(self.published_path)
+            if exportable(scheduler.model):
+                scheduler.export_compact(self.compact_path)
+            else:
+                # load() prefers the compact file, so a stale one must go.
+                self.compact_path.unlink(missing_ok=True)
+        if scheduler.selection is not None:
+            info.setdefault("selection", scheduler.selection.as_dict())
+        # Outrank whatever another process last saved, or sync() there would ignore this model.
+        saved = self._read_manifest() if persist else {}
+        version = self._swap(scheduler, tag, version=saved.get("version", 0) + 1, **info)
+        if persist:
+            tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+            tmp.write_text(json.dumps({"version": version, "tag": tag, "published_at": time.time()}), encoding="utf-8")
+            os.replace(tmp, self.manifest_path)
+        return version
+
+    def sync(self) -> bool:
+        """
+        Serve the model another process last saved to state_dir if its
+        manifest version is newer than ours. Returns True if it swapped.
+        """
+        manifest = self._read_manifest()
+        if manifest.get("version", 0) <= self.version:
+            return False
+        for path in (self.compact_path, self.published_path):
+            scheduler = MLScheduler(model_path=str(self.model_path), time_quantum=self.time_quantum)
+            if scheduler.load(path) and scheduler.is_ready():
+                self._swap(scheduler, manifest.get("tag") or "disk", version=manifest["version"], path=str(path), synced=True)
+                return True
+        return False
+
+    def watch(self, interval: float = 5.0) -> threading.Thread:
+        """Run sync() every ``interval`` seconds on a daemon thread."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sync()
+                except Exception as exc:
+                    log.error("model sync failed", error=str(exc))
+
+        thread = threading.Thread(target=loop, name="model-sync", daemon=True)
+        thread.start()
+        return thread
+
+    def _swap(self, scheduler: MLScheduler, tag: str, version: Optional[int] = None, **info) -> int:
+        with self._lock:
+            # Never go backwards, even when adopting another process's version.
+            version = max(self._serving[0] + 1, version or 0)
+            self._serving = (version, scheduler)
+            self.model_info = {"version": version, "tag": tag, "published_at": time.time(), **info}
+            self.cache.clear()
+        log.info("serving model", version=version, tag=tag)
+        return version
+
+    def trainable(self) -> Optional[MLScheduler]:
+        """
+        The serving model as a scikit-learn scheduler that warm_start can grow.
+        A compact model loaded from disk cannot be grown, so the pickle saved
+        beside it is loaded instead (once per version), provided it is the
+        same forest. None when no such model is available.
+        """
+        with self._lock:
+            (version, scheduler), info = self._serving, self.model_info
+        if scheduler is None or hasattr(scheduler.model, "estimators_"):
+            return scheduler
+        if self._trainable[0] == version:
+            return self._trainable[1]
+
+        pickles = {
+            str(self.compact_path): self.published_path,
+            str(self.model_path.with_suffix(".npz")): self.model_path,
+        }
+        path = pickles.get(info.get("path"))
+        grown = None
+        if path is not None:
+            candidate = MLScheduler(model_path=str(self.model_path), time_quantum=self.time_quantum)
+            if candidate.load(path) and candidate.is_ready():
+                model, compact = candidate.model, scheduler.model
+                if (
+                    hasattr(model, "estimators_")
+                    and len(model.estimators_) == compact.n_estimators
+                    and list(model.classes_) == list(compact.classes_)
+                ):
+                    grown = candidate
+        if grown is None:
+            log.info("no scikit-learn copy of the serving model", version=version, path=str(path))
+        self._trainable = (version, grown)
+        return grown
+
+    def predict_with_confidence(self, processes: List[Dict]) -> Tuple[str, float, str]:
+        """
+        Returns (algorithm, confidence, source) where source is "model" or "heuristic".
+        """
+        if not processes:
+            raise ValueError("No processes provided for prediction.")
+        samples = self._fallback.to_samples(processes)
+        version, scheduler = self._serving
+        if scheduler is None:
+            algo, confidence = self._fallback._heuristic_fallback(samples)
+            PREDICTIONS.labels("heuristic").inc()
+            return algo, confidence, "heuristic"
+
+        key = (version, workload_digest(
+            [s.burst for s in samples], [s.priority for s in samples], [s.arrival for s in samples]
+        ))
+        cached = self.cache.get(key)
+        if cached is None:
+            algo, confidence = scheduler.predict_with_confidence(processes)
+            cached = (str(algo), confidence)
+            self.cache.set(key, cached)
+            PREDICTIONS.labels("model").inc()
+        else:
+            PREDICTIONS.labels("cache").inc()
+        return cached[0], cached[1], "model"
+
+    def predict_features(self, features: np.ndarray) -> Tuple[str, float, str]:
+        """predict_with_confidence for an already extracted feature vector."""
+        version, scheduler = self._serving
+        if scheduler is None:
+            algo, confidence = MLScheduler._heuristic_from_features(features)
+            PREDICTIONS.labels("heuristic").inc()
+            return algo, confidence, "heuristic"
+
+        key = (version, "features", np.asarray(features, dtype=float).tobytes())
+        cached = self.cache.get(key)
+        if cached is None:
+            algo, confidence = scheduler.predict_features(features)
+            cached = (str(algo), confidence)
+            self.cache.set(key, cached)
+            PREDICTIONS.labels("model").inc()
+        else:
+            PREDICTIONS.labels("cache").inc()
+        return cached[0], cached[1], "model"
+
+    def predict_batch(self, workloads: List) -> List[Dict]:
+        """
+        Per-workload results in request order; see MLScheduler.predict_batch.
+        Each successful result also carries its source.
+        """
+        (burst, priority, arrival, lengths), results = self._fallback._pack_requests(workloads)
+        version, scheduler = self._serving
+        slots = [i for i, result in enumerate(results) if result is None]
+
+        if scheduler is None:
+            for row, i in enumerate(slots):
+                n = lengths[row]
+                samples = [
+                    ProcessSample(int(b), int(p), int(a))
+                    for b, p, a in zip(burst[row, :n], priority[row, :n], arrival[row, :n])
+                ]
+                algo, confidence = self._fallback._heuristic_fallback(samples)
+                results[i] = {"suggested_algorithm": algo, "confidence": confidence, "source": "heuristic"}
+            PREDICTIONS.labels("heuristic").inc(len(slots))
+            return results
+
+        keys = [
+            (version, workload_digest(burst[row, :n], priority[row, :n], arrival[row, :n]))
+            for row, n in enumerate(lengths)
+        ]
+        cached = [self.cache.get(key) for key in keys]
+        misses = np.array([row for row, hit in enumerate(cached) if hit is None], dtype=np.int64)
+        PREDICTIONS.labels("model").inc(len(misses))
+        PREDICTIONS.labels("cache").inc(len(keys) - len(misses))
+        if len(misses):
+            algos, confidences = scheduler.predict_packed(
+                burst[misses], priority[misses], arrival[misses], lengths[misses]
+            )
+            for row, algo, confidence in zip(misses, algos, confidences):
+                cached[row] = (str(algo), float(confidence))
+                self.cache.set(keys[row], cached[row])
+
+        for row, i in enumerate(slots):
+            algo, confidence = cached[row]
+            results[i] = {"suggested_algorithm": algo, "confidence": confidence, "source": "model"}
+        return results
@@ -0,0 +1,282 @@
+"""
+model_selection.py
+Latency-budgeted model selection for the scheduler recommender.
+
+select_model() fits a set of candidate classifiers on one train/test split:
+the default 200-tree forest, shallower and smaller forests, a single tree
+distilled from the default forest, and gradient boosting. For each it records
+hold-out accuracy, artifact size and p50/p99 predict_proba latency for one row
+and for a BATCH_ROWS-row batch, measured on the form the registry would serve
+(the memory-mapped compact export for forests and trees, the unpickled
+estimator otherwise). The most accurate candidate within the ModelBudget wins;
+if none fits, the one with the lowest single-row p99 does.
+
+    python model_selection.py --p99-ms 1 --max-kb 512          # print the trade-off table
+    python model_selection.py --p99-ms 1 -o ml_scheduler.pkl   # ...and save the chosen model
+
+MLScheduler.train(budget=...) runs the same selection; the API reads the
+budget from MODEL_BUDGET_P99_MS, MODEL_BUDGET_BATCH_P99_MS and
+MODEL_BUDGET_MAX_KB. The CLI reads its labeled training set from the
+dataset cache (dataset_cache.py), so repeated experiments skip labeling.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from compact_model import CompactForest, export_forest, exportable
+from observability import configure_logging, get_logger, stage
+
+log = get_logger("model_selection")
+
+BATCH_ROWS = 256
+SINGLE_REPEAT = 300
+BATCH_REPEAT = 50
+# Unlabeled rows per training row that the distilled tree learns the teacher's answers on.
+TRANSFER_FACTOR = 4
+
+
+@dataclass
+class ModelBudget:
+    """Upper bounds for the served model; None leaves a dimension unconstrained."""
+
+    p99_ms: Optional[float] = None  # single-row predict_proba
+    batch_p99_ms: Optional[float] = None  # one BATCH_ROWS-row predict_proba
+    max_bytes: Optional[int] = None  # served artifact on disk
+
+    @classmethod
+    def from_env(cls) -> Optional["ModelBudget"]:
+        """Budget from MODEL_BUDGET_* variables, or None when none is set."""
+        p99 = os.getenv("MODEL_BUDGET_P99_MS")
+        batch = os.getenv("MODEL_BUDGET_BATCH_P99_MS")
+        max_kb = os.getenv("MODEL_BUDGET_MAX_KB")
+        if not (p99 or batch or max_kb):
+            return None
+        return cls(
+            p99_ms=float(p99) if p99 else None,
+            batch_p99_ms=float(batch) if batch else None,
+            max_bytes=int(float(max_kb) * 1024) if max_kb else None,
+        )
+
+    def allows(self, result: "CandidateResult") -> bool:
+        return (
+            (self.p99_ms is None or result.single_p99_ms <= self.p99_ms)
+            and (self.batch_p99_ms is None or result.batch_p99_ms <= self.batch_p99_ms)
+            and (self.max_bytes is None or result.served_bytes <= self.max_bytes)
+        )
+
+
+@dataclass
+class CandidateResult:
+    name: str
+    description: str
+    accuracy: float
+    runtime: str  # "compact" or "sklearn"
+    served_bytes: int
+    pickle_bytes: int
+    single_p50_ms: float
+    single_p99_ms: float
+    batch_p50_ms: float
+    batch_p99_ms: float
+    fit_seconds: float
+    within_budget: bool = True
+    model: Any = field(default=None, repr=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        row = asdict(self)
+        row.pop("model")
+        return row
+
+
+@dataclass
+class SelectionReport:
+    chosen: str
+    budget: Optional[ModelBudget]
+    candidates: List[CandidateResult]
+
+    @property
+    def result(self) -> CandidateResult:
+        return next(c for c in self.candidates if c.name == self.chosen)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "chosen": self.chosen,
+            "budget": asdict(self.budget) if self.budget else None,
+            "batch_rows": BATCH_ROWS,
+            "candidates": [c.as_dict() for c in self.candidates],
+        }
+
+    def format_table(self) -> str:
+        header = (f"{'':2}{'candidate':<18}{'accuracy':>9}{'size KB':>10}{'runtime':>9}"
+                  f"{'p50 ms':>9}{'p99 ms':>9}{'batch p50':>11}{'batch p99':>11}{'fit s':>7}")
+        lines = [header]
+        for c in self.candidates:
+            mark = "*" if c.name == self.chosen else (" " if c.within_budget else "-")
+            lines.append(
+                f"{mark:<2}{c.name:<18}{c.accuracy:>9.3f}{c.served_bytes / 1024:>10.1f}{c.runtime:>9}"
+                f"{c.single_p50_ms:>9.3f}{c.single_p99_ms:>9.3f}{c.batch_p50_ms:>11.3f}{c.batch_p99_ms:>11.3f}"
+                f"{c.fit_seconds:>7.2f}"
+            )
+        lines.append(f"* chosen, - over budget; batch = {BATCH_ROWS} rows")
+        return "\n".join(lines)
+
+
+def candidates(random_state: int = 7) -> List[Tuple[str, str, Callable[[], Any], bool]]:
+    """
+    (name, description, factory, distilled) for every candidate. The first
+    one is the default model and serves as the teacher for distilled ones.
+    """
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    def forest(n_estimators: int, max_depth: Optional[int], min_samples_leaf: int = 1):
+        return lambda: RandomForestClassifier(
+            n_estimators=n_estimators, max_depth=max_depth, min_samples_leaf=min_samples_leaf,
+            random_state=random_state, n_jobs=-1,
+        )
+
+    return [
+        ("rf-200", "200 trees, unbounded depth (default)", forest(200, None), False),
+        ("rf-100-d12", "100 trees, depth <= 12", forest(100, 12, 2), False),
+        ("rf-50-d10", "50 trees, depth <= 10", forest(50, 10, 2), False),
+        ("rf-20-d8", "20 trees, depth <= 8", forest(20, 8, 2), False),
+        ("tree-distilled", "one depth-12 tree fitted to rf-200's answers",
+         lambda: DecisionTreeClassifier(max_depth=12, min_samples_leaf=2, random_state=random_state), True),
+        ("gbdt-100", "gradient boosting, 100 rounds of depth-3 trees",
+         lambda: GradientBoostingClassifier(n_estimators=100, max_depth=3, random_state=random_state), False),
+    ]
+
+
+def _latency_ms(predict: Callable[[np.ndarray], Any], batches: List[np.ndarray]) -> Tuple[float, float]:
+    predict(batches[0])
+    times = []
+    for batch in batches:
+        started = time.perf_counter()
+        predict(batch)
+        times.append((time.perf_counter() - started) * 1000)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 99))
+
+
+def evaluate(name: str, description: str, model, fit_seconds: float, X_test: np.ndarray, y_test: np.ndarray,
+             workdir: Path, rng: np.random.Generator) -> CandidateResult:
+    """Accuracy, sizes and latency of a fitted candidate, as the registry would serve it."""
+    accuracy = float(np.mean(model.predict(X_test) == y_test))
+    pickle_bytes = len(pickle.dumps(model))
+    if exportable(model):
+        path = export_forest(model, workdir / f"{name}.npz")
+        served, runtime, served_bytes = CompactForest.load(path), "compact", path.stat().st_size
+    else:
+        served, runtime, served_bytes = model, "sklearn", pickle_bytes
+
+    rows = X_test[rng.integers(0, len(X_test), size=SINGLE_REPEAT)]
+    single = [rows[i:i + 1] for i in range(SINGLE_REPEAT)]
+    batches = [X_test[rng.integers(0, len(X_test), size=BATCH_ROWS)] for _ in range(BATCH_REPEAT)]
+    single_p50, single_p99 = _latency_ms(served.predict_proba, single)
+    batch_p50, batch_p99 = _latency_ms(served.predict_proba, batches)
+    return CandidateResult(
+        name=name, description=description, accuracy=accuracy, runtime=runtime,
+        served_bytes=served_bytes, pickle_bytes=pickle_bytes,
+        single_p50_ms=single_p50, single_p99_ms=single_p99,
+        batch_p50_ms=batch_p50, batch_p99_ms=batch_p99,
+        fit_seconds=fit_seconds, model=model,
+    )
+
+
+def select_model(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    budget: Optional[ModelBudget] = None,
+    transfer_X: Optional[np.ndarray] = None,
+    random_state: int = 7,
+) -> SelectionReport:
+    """
+    Fit and measure every candidate, then pick the most accurate one within
+    ``budget`` (ties go to the lower single-row p99). Distilled candidates are
+    fitted on X_train plus ``transfer_X`` labeled by the teacher.
+    """
+    rng = np.random.default_rng(random_state)
+    results: List[CandidateResult] = []
+    teacher = None
+    with tempfile.TemporaryDirectory(prefix="model-selection-") as tmp:
+        for name, description, factory, distilled in candidates(random_state):
+            model = factory()
+            X_fit, y_fit = X_train, y_train
+            if distilled:
+                X_fit = X_train if transfer_X is None else np.vstack([X_train, transfer_X])
+                y_fit = teacher.predict(X_fit)
+            started = time.perf_counter()
+            with stage("model_train"):
+                model.fit(X_fit, y_fit)
+            result = evaluate(name, description, model, time.perf_counter() - started, X_test, y_test, Path(tmp), rng)
+            result.within_budget = budget is None or budget.allows(result)
+            results.append(result)
+            if teacher is None:
+                teacher = model
+
+    within = [r for r in results if r.within_budget]
+    if within:
+        chosen = max(within, key=lambda r: (r.accuracy, -r.single_p99_ms))
+    else:
+        chosen = min(results, key=lambda r: r.single_p99_ms)
+        log.warning("no candidate fits the model budget; using the fastest", candidate=chosen.name)
+    report = SelectionReport(chosen=chosen.name, budget=budget, candidates=results)
+    log.info("model selected", candidate=chosen.name, accuracy=round(chosen.accuracy, 3),
+             p99_ms=round(chosen.single_p99_ms, 3), kb=round(chosen.served_bytes / 1024, 1))
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from dataset_cache import DEFAULT_DIRECTORY, DatasetCache
+    from ml_scheduler import MLScheduler
+
+    parser = argparse.ArgumentParser(description="Compare candidate scheduler models under a latency/size budget.")
+    parser.add_argument("--p99-ms", type=float, help="single-row p99 latency budget")
+    parser.add_argument("--batch-p99-ms", type=float, help=f"{BATCH_ROWS}-row batch p99 latency budget")
+    parser.add_argument("--max-kb", type=float, help="served model size budget")
+    parser.add_argument("--samples", type=int, default=1200, help="synthetic training workloads")
+    parser.add_argument("--dataset-cache", default=os.getenv("DATASET_CACHE_DIR", str(DEFAULT_DIRECTORY)),
+                        help="labeled dataset cache directory ('' relabels every run)")
+    parser.add_argument("-o", "--output", help="save the chosen model here (plus a .npz compact export when possible)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON instead of a table")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    budget = ModelBudget(
+        p99_ms=args.p99_ms,
+        batch_p99_ms=args.batch_p99_ms,
+        max_bytes=int(args.max_kb * 1024) if args.max_kb else None,
+    )
+    scheduler = MLScheduler(model_path=args.output or "ml_scheduler.pkl")
+    cache = DatasetCache(args.dataset_cache) if args.dataset_cache else None
+    X, y = scheduler.generate_dataset(n_samples=args.samples, n_jobs=-1, cache=cache)
+    scheduler.train(X, y, budget=budget)
+    if args.json:
+        import json
+        print(json.dumps(scheduler.selection.as_dict(), indent=2))
+    else:
+        print(scheduler.selection.format_table())
+    if args.output:
+        scheduler.save()
+        compact = scheduler.model_path.with_suffix(".npz")
+        if exportable(scheduler.model):
+            scheduler.export_compact(compact)
+        else:
+            # The registry prefers the compact file, so drop a stale one.
+            compact.unlink(missing_ok=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
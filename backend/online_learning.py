@@ -0,0 +1,311 @@
+"""
+online_learning.py
+Learn from the workloads clients actually submit.
+
+OnlineLearner.record() is called on the request path and only enqueues the
+raw process list (dropping it if the queue is full), so requests never wait on
+learning. A labeler thread drains the queue in batches, labels each workload
+with the simulator and appends the rows to a TrainingBuffer on disk. A trainer
+thread wakes every ``interval`` seconds and, once enough new rows have
+arrived, builds the next model off the serving path:
+
+- warm start: copy the serving forest and grow ``grow_trees`` trees on the new
+  rows (plus a synthetic sample so every class is present); when the compact
+  export is serving, the forest is its pickle (ModelRegistry.trainable());
+- full retrain: fit a fresh forest on the synthetic base set plus the whole
+  buffer, used when warm start is not possible (the serving model is not a
+  forest or has no pickle, the classes changed) or the forest has reached
+  ``max_trees``.
+
+The result is published through the ModelRegistry, which swaps it in
+atomically under a new version tagged "online-warm-start" or "online-retrain".
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml_scheduler import MLScheduler
+from model_registry import ModelRegistry, workload_digest
+from observability import REGISTRY, get_logger
+
+log = get_logger("online_learning")
+
+ONLINE_WORKLOADS = REGISTRY.counter(
+    "scheduler_online_workloads_total",
+    "Submitted workloads seen by online learning: recorded, dropped, duplicate or labeled.",
+    ["result"],
+)
+ONLINE_UPDATES = REGISTRY.counter(
+    "scheduler_online_updates_total",
+    "Models published by online learning, by mode.",
+    ["mode"],
+)
+
+_CHUNK = re.compile(r"chunk-(\d{8})\.npz$")
+
+
+class TrainingBuffer:
+    """
+    Append-only store of labeled rows: one .npz chunk (X, y) per append,
+    written to a temporary name and renamed, so readers never see a partial
+    chunk. The oldest chunks are deleted once more than ``max_rows`` are held.
+    """
+
+    def __init__(self, directory: str | Path, max_rows: int = 200_000):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._chunks: List[Tuple[int, int]] = []  # (sequence, rows), oldest first
+        for path in sorted(self.directory.glob("chunk-*.npz")):
+            match = _CHUNK.search(path.name)
+            if match:
+                with np.load(path) as data:
+                    self._chunks.append((int(match.group(1)), len(data["y"])))
+
+    def _path(self, seq: int) -> Path:
+        return self.directory / f"chunk-{seq:08d}.npz"
+
+    @property
+    def rows(self) -> int:
+        return sum(rows for _, rows in self._chunks)
+
+    def rows_after(self, seq: int) -> int:
+        return sum(rows for s, rows in self._chunks if s > seq)
+
+    @property
+    def last_sequence(self) -> int:
+        return self._chunks[-1][0] if self._chunks else 0
+
+    def append(self, X: np.ndarray, y: np.ndarray) -> int:
+        """Store one batch and return its sequence number."""
+        with self._lock:
+            seq = self.last_sequence + 1
+            path = self._path(seq)
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as fh:
+                np.savez(fh, X=np.asarray(X, dtype=np.float64), y=np.asarray(y).astype(str))
+            os.replace(tmp, path)
+            self._chunks.append((seq, len(y)))
+            while len(self._chunks) > 1 and self.rows > self.max_rows:
+                old, _ = self._chunks.pop(0)
+                self._path(old).unlink(missing_ok=True)
+            return seq
+
+    def load(self, after: int = 0) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Rows from chunks newer than sequence ``after``; returns (X, y, last sequence)."""
+        with self._lock:
+            chunks = [seq for seq, _ in self._chunks if seq > after]
+        parts = []
+        for seq in chunks:
+            with np.load(self._path(seq)) as data:
+                parts.append((data["X"], data["y"]))
+        if not parts:
+            return np.empty((0, 0)), np.empty(0, dtype=str), after
+        return np.vstack([X for X, _ in parts]), np.concatenate([y for _, y in parts]), chunks[-1]
+
+
+class OnlineLearner:
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        buffer: TrainingBuffer,
+        interval: float = 300.0,
+        min_new_rows: int = 200,
+        batch_size: int = 256,
+        queue_size: int = 10_000,
+        grow_trees: int = 50,
+        max_trees: int = 500,
+        base_samples: int = 1200,
+    ):
+        self.registry = registry
+        self.buffer = buffer
+        self.interval = interval
+        self.min_new_rows = min_new_rows
+        self.batch_size = batch_size
+        self.grow_trees = grow_trees
+        self.max_trees = max_trees
+        self.base_samples = base_samples
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._labeler = MLScheduler(time_quantum=registry.time_quantum)
+        self._seen: set = set()
+        self._base: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._trained_through = buffer.last_sequence
+        self._train_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.last_update: Optional[Dict[str, Any]] = None
+        self.stats = {"recorded": 0, "dropped": 0, "duplicate": 0, "labeled": 0}
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._label_loop, name="online-labeler", daemon=True),
+            threading.Thread(target=self._train_loop, name="online-trainer", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _count(self, result: str, n: int = 1):
+        self.stats[result] += n
+        ONLINE_WORKLOADS.labels(result).inc(n)
+
+    def record(self, processes: List[Dict]) -> bool:
+        """Queue a submitted workload for labeling; never blocks."""
+        try:
+            self._queue.put_nowait(processes)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("recorded")
+        return True
+
+    # ---------------------------
+    # Labeling
+    # ---------------------------
+    def _next_batch(self, linger: float = 1.0) -> List[List[Dict]]:
+        """Up to batch_size workloads, waiting at most ``linger`` seconds after the first."""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def label_pending(self) -> int:
+        """Label and store one batch of queued workloads; returns rows written."""
+        workloads = []
+        for processes in self._next_batch():
+            try:
+                samples = self._labeler.to_samples(processes)
+            except (AttributeError, TypeError, ValueError):
+                continue
+            if not samples:
+                continue
+            digest = workload_digest(
+                [s.burst for s in samples], [s.priority for s in samples], [s.arrival for s in samples]
+            )
+            if digest in self._seen:
+                self._count("duplicate")
+                continue
+            self._seen.add(digest)
+            workloads.append(samples)
+        if len(self._seen) > 2 * self.buffer.max_rows:
+            self._seen.clear()
+        if not workloads:
+            return 0
+        X, y = self._labeler._featurize_and_label(workloads)
+        self.buffer.append(X, y)
+        self._count("labeled", len(workloads))
+        return len(workloads)
+
+    def _label_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.label_pending()
+            except Exception as exc:
+                log.error("labeling failed", error=str(exc))
+
+    # ---------------------------
+    # Training
+    # ---------------------------
+    def _base_set(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._base is None:
+            self._base = self._labeler.generate_dataset(
+                n_samples=self.base_samples, cache=self.registry.dataset_cache
+            )
+        return self._base
+
+    def train_once(self, force: bool = False) -> Optional[int]:
+        """
+        Build and publish the next model if at least min_new_rows rows arrived
+        since the last update (any new rows when ``force``). Returns the new
+        model version, or None if nothing was published.
+        """
+        with self._train_lock:
+            X_new, y_new, through = self.buffer.load(after=self._trained_through)
+            if len(y_new) == 0 or (len(y_new) < self.min_new_rows and not force):
+                return None
+
+            base_X, base_y = self._base_set()
+            # The scikit-learn forest, even when its compact export is serving.
+            serving = self.registry.trainable()
+            model = getattr(serving, "model", None)
+            can_grow = (
+                hasattr(model, "estimators_")
+                and len(model.estimators_) + self.grow_trees <= self.max_trees
+            )
+            started = time.perf_counter()
+            scheduler = None
+            if can_grow:
+                # Anchor the new trees with as many synthetic rows as new ones,
+                # including one of every class so the label set matches.
+                rng = np.random.default_rng(through)
+                anchor = rng.choice(len(base_y), size=min(len(base_y), len(y_new)), replace=False)
+                anchor = np.union1d(anchor, np.unique(base_y, return_index=True)[1])
+                X = np.vstack([X_new, base_X[anchor]])
+                y = np.concatenate([y_new, base_y[anchor]])
+                try:
+                    scheduler = serving.warm_start(X, y, self.grow_trees)
+                    mode = "online-warm-start"
+                except ValueError as exc:
+                    log.info("warm start not possible; retraining", reason=str(exc))
+            if scheduler is None:
+                X_all, y_all, _ = self.buffer.load()
+                scheduler = MLScheduler(model_path=str(self.registry.model_path), time_quantum=self.registry.time_quantum)
+                scheduler.train(np.vstack([base_X, X_all]), np.concatenate([base_y, y_all]), budget=self.registry.budget)
+                mode = "online-retrain"
+
+            version = self.registry.publish(scheduler, mode, new_rows=int(len(y_new)), buffer_rows=self.buffer.rows)
+            self._trained_through = through
+            self.last_update = {
+                "version": version,
+                "mode": mode,
+                "new_rows": int(len(y_new)),
+                "seconds": round(time.perf_counter() - started, 3),
+                "at": time.time(),
+            }
+            ONLINE_UPDATES.labels(mode).inc()
+            log.info("online model published", **self.last_update)
+            return version
+
+    def _train_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.train_once()
+            except Exception as exc:
+                log.error("online training failed", error=str(exc))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queued": self._queue.qsize(),
+            "buffer_rows": self.buffer.rows,
+            "pending_rows": self.buffer.rows_after(self._trained_through),
+            "last_update": self.last_update,
+        }
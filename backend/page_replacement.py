@@ -0,0 +1,332 @@
+"""
+page_replacement.py
+Page-replacement engine (FIFO, LRU, Optimal, Clock) for large reference traces.
+
+Mirrors frontend/src/logic/pageReplacement/algorithms.ts, but counts faults
+instead of recording every frame state, so memory stays bounded by the number
+of frames (plus distinct pages for Optimal) however long the trace is.
+Reference strings may be Python lists, NumPy arrays, or memory-mapped
+.npy/raw binary files (see load_references); they are consumed in chunks.
+
+Optimal runs on precomputed next-use indices (one backward pass, spilled to a
+scratch memmap for long traces) and a lazy max-heap, so each reference costs
+O(log frames) instead of a rescan of the future. LRU and Optimal are stack
+algorithms: fault_curve() gets the fault count for every frame count up to
+max_frames from a single pass.
+"""
+
+from __future__ import annotations
+
+import heapq
+import tempfile
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Names match the frontend's PageReplacementAlgorithm type.
+POLICIES = ["FIFO", "LRU", "Optimal", "Clock"]
+STACK_POLICIES = ("LRU", "Optimal")
+
+# References converted to Python ints at a time.
+CHUNK_SIZE = 1 << 20
+# "Never used again" in next-use arrays.
+NEVER = np.iinfo(np.int64).max
+# Longer traces keep their next-use array in a scratch file rather than RAM.
+_IN_MEMORY_NEXT_USE = 1 << 23
+
+
+@dataclass
+class PageReplacementResult:
+    algorithm: str
+    frames: int
+    total_accesses: int
+    page_faults: int
+
+    @property
+    def page_hits(self) -> int:
+        return self.total_accesses - self.page_faults
+
+    def to_dict(self) -> Dict:
+        total = self.total_accesses or 1
+        return {
+            "algorithm": self.algorithm,
+            "frames": self.frames,
+            "page_faults": self.page_faults,
+            "page_hits": self.page_hits,
+            "page_fault_rate": self.page_faults / total * 100,
+            "page_hit_rate": self.page_hits / total * 100,
+            "total_accesses": self.total_accesses,
+        }
+
+
+def load_references(path: str | Path, dtype: str = "uint32") -> np.ndarray:
+    """
+    Memory-map a reference trace: a .npy file (dtype from its header) or a raw
+    binary file of ``dtype`` page numbers. Nothing is read until it is used.
+    """
+    path = Path(path)
+    if path.suffix == ".npy":
+        refs = np.load(path, mmap_mode="r")
+        if refs.ndim != 1:
+            raise ValueError(f"{path} must hold a 1-D reference array, got shape {refs.shape}.")
+        return refs
+    return np.memmap(path, dtype=np.dtype(dtype), mode="r")
+
+
+def _as_references(refs: Sequence[int] | np.ndarray) -> np.ndarray:
+    refs = refs if isinstance(refs, np.ndarray) else np.asarray(refs, dtype=np.int64)
+    if refs.ndim != 1:
+        raise ValueError("Reference string must be one-dimensional.")
+    return refs
+
+
+def _chunks(refs: np.ndarray, chunk_size: int) -> Iterator[List[int]]:
+    for start in range(0, len(refs), chunk_size):
+        yield refs[start:start + chunk_size].tolist()
+
+
+def next_use_indices(
+    refs: Sequence[int] | np.ndarray,
+    chunk_size: int = CHUNK_SIZE,
+    scratch_dir: Optional[str | Path] = None,
+) -> np.ndarray:
+    """
+    next_use[i] = index of the next reference to refs[i]'s page, or NEVER.
+    Built back to front one chunk at a time; only the latest position of each
+    distinct page is carried between chunks. Traces longer than
+    _IN_MEMORY_NEXT_USE are written to an anonymous scratch memmap.
+    """
+    refs = _as_references(refs)
+    n = len(refs)
+    if n > _IN_MEMORY_NEXT_USE:
+        scratch = tempfile.TemporaryFile(dir=scratch_dir)
+        next_use = np.memmap(scratch, dtype=np.int64, mode="w+", shape=(n,))
+    else:
+        next_use = np.empty(n, dtype=np.int64)
+
+    latest: Dict[int, int] = {}
+    for stop in range(n, 0, -chunk_size):
+        start = max(0, stop - chunk_size)
+        chunk = np.asarray(refs[start:stop])
+        # Stable sort groups equal pages with positions ascending.
+        order = np.argsort(chunk, kind="stable")
+        pages = chunk[order]
+        same = pages[1:] == pages[:-1]
+        out = np.empty(len(chunk), dtype=np.int64)
+        out[order[:-1][same]] = start + order[1:][same]
+        last = np.append(~same, True)
+        out[order[last]] = [latest.get(page, NEVER) for page in pages[last].tolist()]
+        next_use[start:stop] = out
+        first = np.insert(~same, 0, True)
+        latest.update(zip(pages[first].tolist(), (start + order[first]).tolist()))
+    return next_use
+
+
+def _fifo(refs: np.ndarray, frames: int, chunk_size: int) -> int:
+    resident, queue, faults = set(), deque(), 0
+    for chunk in _chunks(refs, chunk_size):
+        for page in chunk:
+            if page in resident:
+                continue
+            faults += 1
+            if len(queue) == frames:
+                resident.discard(queue.popleft())
+            queue.append(page)
+            resident.add(page)
+    return faults
+
+
+def _lru(refs: np.ndarray, frames: int, chunk_size: int) -> int:
+    resident: OrderedDict = OrderedDict()
+    faults = 0
+    for chunk in _chunks(refs, chunk_size):
+        for page in chunk:
+            if page in resident:
+                resident.move_to_end(page)
+                continue
+            faults += 1
+            if len(resident) == frames:
+                resident.popitem(last=False)
+            resident[page] = None
+    return faults
+
+
+def _clock(refs: np.ndarray, frames: int, chunk_size: int) -> int:
+    # Frames fill in order, leaving the hand at frame 0, as in the frontend.
+    slot_of: Dict[int, int] = {}
+    pages: List[Optional[int]] = [None] * frames
+    referenced = [0] * frames
+    hand, faults = 0, 0
+    for chunk in _chunks(refs, chunk_size):
+        for page in chunk:
+            slot = slot_of.get(page)
+            if slot is not None:
+                referenced[slot] = 1
+                continue
+            faults += 1
+            if len(slot_of) < frames:
+                slot = len(slot_of)
+                hand = (slot + 1) % frames
+            else:
+                while referenced[hand]:
+                    referenced[hand] = 0
+                    hand = (hand + 1) % frames
+                slot = hand
+                del slot_of[pages[slot]]
+                hand = (hand + 1) % frames
+            pages[slot] = page
+            referenced[slot] = 1
+            slot_of[page] = slot
+    return faults
+
+
+def _optimal(refs: np.ndarray, frames: int, chunk_size: int, next_use: np.ndarray) -> int:
+    # resident maps page -> its next use; the heap holds (-next use, page) with
+    # stale entries skipped on pop and periodically compacted away.
+    resident: Dict[int, int] = {}
+    heap: List[Tuple[int, int]] = []
+    faults = 0
+    for start in range(0, len(refs), chunk_size):
+        chunk = refs[start:start + chunk_size].tolist()
+        uses = next_use[start:start + chunk_size].tolist()
+        for page, use in zip(chunk, uses):
+            if page not in resident:
+                faults += 1
+                if len(resident) == frames:
+                    while True:
+                        neg_use, victim = heapq.heappop(heap)
+                        if resident.get(victim) == -neg_use:
+                            break
+                    del resident[victim]
+            resident[page] = use
+            heapq.heappush(heap, (-use, page))
+            if len(heap) > 4 * frames + 64:
+                heap = [(-u, p) for p, u in resident.items()]
+                heapq.heapify(heap)
+    return faults
+
+
+def simulate(
+    refs: Sequence[int] | np.ndarray,
+    frames: int,
+    algorithm: str,
+    chunk_size: int = CHUNK_SIZE,
+    next_use: Optional[np.ndarray] = None,
+) -> PageReplacementResult:
+    """
+    Count page faults for one policy. Optimal computes next-use indices unless
+    they are passed in (compare() shares one array between calls).
+    """
+    if frames < 1:
+        raise ValueError("frames must be >= 1.")
+    refs = _as_references(refs)
+    if algorithm == "FIFO":
+        faults = _fifo(refs, frames, chunk_size)
+    elif algorithm == "LRU":
+        faults = _lru(refs, frames, chunk_size)
+    elif algorithm == "Clock":
+        faults = _clock(refs, frames, chunk_size)
+    elif algorithm == "Optimal":
+        if next_use is None:
+            next_use = next_use_indices(refs, chunk_size)
+        faults = _optimal(refs, frames, chunk_size, next_use)
+    else:
+        raise ValueError(f"Unknown page replacement algorithm: {algorithm}")
+    return PageReplacementResult(algorithm, frames, len(refs), faults)
+
+
+def compare(refs: Sequence[int] | np.ndarray, frames: int, chunk_size: int = CHUNK_SIZE) -> Dict:
+    """Run every policy, like comparePageReplacementAlgorithms in the frontend."""
+    refs = _as_references(refs)
+    next_use = next_use_indices(refs, chunk_size)
+    results = [simulate(refs, frames, algo, chunk_size, next_use) for algo in POLICIES]
+    return {
+        "results": [r.to_dict() for r in results],
+        "best_algorithm": min(results, key=lambda r: r.page_faults).algorithm,
+        "worst_algorithm": max(results, key=lambda r: r.page_faults).algorithm,
+    }
+
+
+def fault_curve(
+    refs: Sequence[int] | np.ndarray,
+    max_frames: int,
+    algorithm: str = "LRU",
+    chunk_size: int = CHUNK_SIZE,
+    next_use: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Faults for every frame count 1..max_frames (element k - 1 is k frames) in
+    one pass, using the inclusion property of stack algorithms: the pages held
+    with k frames are the top k of one priority stack, so a reference found at
+    depth d hits for every k > d. The stack is truncated at max_frames.
+    """
+    if algorithm not in STACK_POLICIES:
+        raise ValueError(f"{algorithm} is not a stack algorithm; simulate each frame count instead.")
+    if max_frames < 1:
+        raise ValueError("max_frames must be >= 1.")
+    refs = _as_references(refs)
+    hits_at = [0] * max_frames
+    pages: List[int] = []
+
+    if algorithm == "LRU":
+        for chunk in _chunks(refs, chunk_size):
+            for page in chunk:
+                if pages and pages[0] == page:
+                    hits_at[0] += 1
+                    continue
+                try:
+                    depth = pages.index(page)
+                except ValueError:
+                    if len(pages) == max_frames:
+                        pages.pop()
+                else:
+                    hits_at[depth] += 1
+                    del pages[depth]
+                pages.insert(0, page)
+    else:
+        # Mattson's OPT stack: the incoming page goes on top and each level
+        # keeps whichever of (carried page, resident page) is used sooner,
+        # carrying the other down to the level the page came from.
+        if next_use is None:
+            next_use = next_use_indices(refs, chunk_size)
+        uses_at: List[int] = []
+        for start in range(0, len(refs), chunk_size):
+            chunk = refs[start:start + chunk_size].tolist()
+            uses = next_use[start:start + chunk_size].tolist()
+            for page, use in zip(chunk, uses):
+                try:
+                    depth = pages.index(page)
+                except ValueError:
+                    depth = -1
+                if depth == 0:
+                    hits_at[0] += 1
+                    uses_at[0] = use
+                    continue
+                if not pages:
+                    pages.append(page)
+                    uses_at.append(use)
+                    continue
+                carry_page, carry_use = pages[0], uses_at[0]
+                pages[0], uses_at[0] = page, use
+                for level in range(1, depth if depth > 0 else len(pages)):
+                    if uses_at[level] > carry_use:
+                        pages[level], carry_page = carry_page, pages[level]
+                        uses_at[level], carry_use = carry_use, uses_at[level]
+                if depth > 0:
+                    hits_at[depth] += 1
+                    pages[depth], uses_at[depth] = carry_page, carry_use
+                elif len(pages) < max_frames:
+                    pages.append(carry_page)
+                    uses_at.append(carry_use)
+
+    return len(refs) - np.cumsum(hits_at, dtype=np.int64)
+
+
+# Usage example:
+# refs = load_references("trace.bin", dtype="uint32")   # memory-mapped
+# print(compare(refs, frames=64)["best_algorithm"])
+# curve = fault_curve(refs, max_frames=256, algorithm="Optimal")
+# print(curve[63])  # faults with 64 frames
@@ -0,0 +1,260 @@
+"""
+quantum_sweep.py
+Time-quantum sweep behind /api/simulate/sweep.
+
+RR and RR+Priority depend on the quantum; the other algorithms do not.
+sweep_round_robin() evaluates one RR-family policy for many quanta in a single
+pass. The arrival order is sorted once. All quanta start out as one branch of
+simulation state, and the branch advances as a single simulation for as long
+as every quantum in it would make the same choice. A quantum only matters when
+a slice is cut short, so when the running job needs more time than some of the
+branch's quanta, each of those quanta forks into a branch of its own from the
+shared state. The quanta that cover the job's whole remaining time stay
+together. Quanta at or above the longest burst never split, so the whole tail
+of a sweep costs one simulation. The results match _run_schedule quantum by
+quantum.
+
+sweep() runs a parsed SweepRequest: it sweeps the requested RR-family
+algorithms, evaluates the others once as baselines, and returns each swept
+curve (columnar, one entry per quantum) with its best quantum.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ml_scheduler import ALGORITHMS, MLScheduler, ProcessSample, _score
+from simulation import _int_param, workload_key
+from ttl_cache import TTLCache
+
+RR_FAMILY = ("RR", "RR+Priority")
+METRICS = ("score", "avg_waiting", "avg_turnaround", "avg_response", "context_switches")
+MAX_QUANTA = 5000
+
+sweep_cache = TTLCache(maxsize=int(os.getenv("SWEEP_CACHE_SIZE", "16")), ttl=600.0)
+
+
+@dataclass
+class _Branch:
+    """Simulation state shared by every quantum in ``quanta`` (ascending)."""
+
+    quanta: List[int]
+    t: int
+    remaining: List[int]
+    start: List[Optional[int]]
+    finish: List[Optional[int]]
+    cursor: int
+    ready: Any  # deque of indices (RR) or heap of (key, seq, index) (RR+Priority)
+    seq: int
+    finished: int
+    switches: int
+    last: int
+    running: Optional[int] = None  # dispatched job whose slice has not run yet
+
+    def fork(self, quanta: List[int]) -> "_Branch":
+        return _Branch(
+            quanta, self.t, self.remaining.copy(), self.start.copy(), self.finish.copy(), self.cursor,
+            self.ready.copy(), self.seq, self.finished, self.switches, self.last, self.running,
+        )
+
+
+def _metrics(processes: List[ProcessSample], start: Sequence[int], finish: Sequence[int], switches: int) -> Dict[str, float]:
+    n = len(processes)
+    turnaround = sum(f - p.arrival for f, p in zip(finish, processes))
+    metrics = {
+        "avg_waiting": (turnaround - sum(p.burst for p in processes)) / n,
+        "avg_turnaround": turnaround / n,
+        "avg_response": sum(s - p.arrival for s, p in zip(start, processes)) / n,
+    }
+    metrics["score"] = float(_score(metrics))
+    metrics["context_switches"] = switches
+    return metrics
+
+
+def sweep_round_robin(
+    processes: List[ProcessSample], quanta: Sequence[int], priority: bool = False
+) -> Tuple[Dict[int, Dict[str, float]], int]:
+    """
+    Metrics of RR (or RR+Priority with ``priority``) for every quantum in
+    ``quanta``. Returns ({quantum: metrics}, number of branches simulated).
+    context_switches counts dispatches that change the running process.
+    """
+    n = len(processes)
+    if not n:
+        raise ValueError("No processes provided for simulation.")
+    arrival = [p.arrival for p in processes]
+    order = sorted(range(n), key=arrival.__getitem__)
+    keys = [(p.priority, p.arrival) for p in processes] if priority else None
+
+    def push(b: _Branch, i: int):
+        if keys is None:
+            b.ready.append(i)
+        else:
+            heapq.heappush(b.ready, (keys[i], b.seq, i))
+            b.seq += 1
+
+    def admit(b: _Branch):
+        while b.cursor < n and arrival[order[b.cursor]] <= b.t:
+            push(b, order[b.cursor])
+            b.cursor += 1
+
+    results: Dict[int, Dict[str, float]] = {}
+    stack = [_Branch(
+        sorted(set(int(q) for q in quanta)), 0, [p.burst for p in processes], [None] * n, [None] * n,
+        0, deque() if keys is None else [], 0, 0, 0, -1,
+    )]
+    branches = 1
+    while stack:
+        b = stack.pop()
+        while b.finished < n:
+            if b.running is None:
+                admit(b)
+                if not b.ready:
+                    b.t = max(b.t + 1, arrival[order[b.cursor]])
+                    continue
+                i = b.ready.popleft() if keys is None else heapq.heappop(b.ready)[2]
+                if b.start[i] is None:
+                    b.start[i] = b.t
+                if b.last != -1 and i != b.last:
+                    b.switches += 1
+                b.last = i
+            else:
+                i, b.running = b.running, None
+
+            need = b.remaining[i]
+            cut = bisect.bisect_left(b.quanta, need)  # quanta[:cut] end this slice early
+            if cut and len(b.quanta) > 1:
+                groups = [[q] for q in b.quanta[:cut]]
+                if cut < len(b.quanta):
+                    groups.append(b.quanta[cut:])
+                b.running = i
+                for group in groups[:-1]:
+                    stack.append(b.fork(group))
+                branches += len(groups) - 1
+                b.quanta, b.running = groups[-1], None
+
+            run = min(b.quanta[0], need)
+            b.remaining[i] -= run
+            b.t += run
+            admit(b)
+            if b.remaining[i] == 0:
+                b.finish[i] = b.t
+                b.finished += 1
+            else:
+                push(b, i)
+
+        metrics = _metrics(processes, b.start, b.finish, b.switches)
+        for q in b.quanta:
+            results[q] = metrics
+    return results, branches
+
+
+def _gantt_switches(gantt: List[Tuple[int, int, int]]) -> int:
+    return sum(1 for a, b in zip(gantt, gantt[1:]) if a[0] != b[0])
+
+
+@dataclass
+class SweepRequest:
+    processes: List[Dict]
+    algorithms: List[str]
+    quanta: List[int]
+    metric: str
+
+    @classmethod
+    def parse(cls, data: Dict) -> "SweepRequest":
+        """
+        Validate a request body. Quanta come from ``quanta`` (a list) or the
+        range quantum_min..quantum_max (inclusive) by quantum_step; the range
+        defaults to 1..longest burst, beyond which RR no longer changes.
+        """
+        processes = data.get("processes")
+        if not isinstance(processes, list) or not processes:
+            raise ValueError("No processes provided")
+        if not all(isinstance(p, dict) for p in processes):
+            raise ValueError("Each process must be an object.")
+
+        algorithms = data.get("algorithms") or list(RR_FAMILY)
+        if isinstance(algorithms, str):
+            algorithms = [algorithms]
+        unknown = [a for a in algorithms if a not in ALGORITHMS]
+        if unknown:
+            raise ValueError(f"Unknown algorithms {unknown}; choose from {ALGORITHMS}.")
+        if not any(a in RR_FAMILY for a in algorithms):
+            raise ValueError(f"algorithms must include one of {list(RR_FAMILY)} to sweep.")
+
+        metric = data.get("metric", "score")
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {list(METRICS)}.")
+
+        if data.get("quanta") is not None:
+            quanta = data["quanta"]
+            if not isinstance(quanta, list) or not quanta:
+                raise ValueError("quanta must be a non-empty list of integers.")
+            quanta = sorted({_int_param({"quanta": q}, "quanta", None, minimum=1) for q in quanta})
+        else:
+            longest = max(MLScheduler.to_samples(processes), key=lambda p: p.burst).burst
+            low = _int_param(data, "quantum_min", 1, minimum=1)
+            high = _int_param(data, "quantum_max", max(low, longest), minimum=low)
+            step = _int_param(data, "quantum_step", 1, minimum=1)
+            if (high - low) // step + 1 > MAX_QUANTA:
+                raise ValueError(f"A sweep covers at most {MAX_QUANTA} quanta.")
+            quanta = list(range(low, high + 1, step))
+        if len(quanta) > MAX_QUANTA:
+            raise ValueError(f"A sweep covers at most {MAX_QUANTA} quanta.")
+        return cls(processes=processes, algorithms=list(dict.fromkeys(algorithms)), quanta=quanta, metric=metric)
+
+
+def _rank(metrics: Dict[str, float], metric: str, quantum: Optional[int] = None) -> tuple:
+    # Ties go to fewer context switches, then to the smaller quantum (every
+    # quantum at or above the longest burst behaves the same).
+    return (metrics[metric], metrics["context_switches"], quantum or 0)
+
+
+def sweep(req: SweepRequest) -> Dict[str, Any]:
+    """Curves and best quanta for the swept algorithms plus one-off baselines for the rest."""
+    samples = MLScheduler.to_samples(req.processes)
+    key = (workload_key(samples), tuple(req.quanta), tuple(req.algorithms), req.metric)
+    cached = sweep_cache.get(key)
+    if cached is not None:
+        return cached
+
+    results, baselines, candidates = {}, {}, []
+    for algo in req.algorithms:
+        if algo in RR_FAMILY:
+            by_quantum, branches = sweep_round_robin(samples, req.quanta, priority=algo == "RR+Priority")
+            best_q = min(req.quanta, key=lambda q: _rank(by_quantum[q], req.metric, q))
+            results[algo] = {
+                "best_quantum": best_q,
+                "best": by_quantum[best_q],
+                "simulated_branches": branches,
+                "curve": {
+                    "time_quantum": req.quanta,
+                    **{m: [by_quantum[q][m] for q in req.quanta] for m in METRICS},
+                },
+            }
+            candidates.append((_rank(by_quantum[best_q], req.metric, best_q), algo, best_q, by_quantum[best_q]))
+        else:
+            schedule = MLScheduler().simulate_schedule(samples, algo)
+            summary = schedule.summary()
+            metrics = {m: summary[m] for m in ("avg_waiting", "avg_turnaround", "avg_response")}
+            metrics["score"] = float(_score(metrics))
+            metrics["context_switches"] = _gantt_switches(schedule.gantt)
+            baselines[algo] = metrics
+            candidates.append((_rank(metrics, req.metric), algo, None, metrics))
+
+    _, algo, quantum, metrics = min(candidates, key=lambda c: c[0])
+    response = {
+        "process_count": len(samples),
+        "metric": req.metric,
+        "quanta": len(req.quanta),
+        "best": {"algorithm": algo, "time_quantum": quantum, **metrics},
+        "results": results,
+        "baselines": baselines,
+    }
+    sweep_cache.set(key, response)
+    return response
@@ -0,0 +1,195 @@
+"""
+serve.py
+Pre-fork production server for the API (POSIX only; app.run stays for development).
+
+    python serve.py --workers 4 --threads 32 --port 5000
+
+The master imports the app, loads the recommender and the knowledge base, binds
+the listening socket and forks the workers, so every worker starts with the
+model already in memory. The model is served from the memory-mapped compact
+export, whose pages are shared by all workers through the page cache; a
+pickled model is shared copy-on-write, and gc.freeze() keeps the collector from
+writing to (and so copying) those pages. Threads, the LLM client and the
+inference pool are only created after fork, in each worker.
+
+Each worker accepts connections on a bounded pool of request threads.
+Prediction and simulation run on the smaller inference pool (see
+api.run_inference) and chat calls beyond LLM_MAX_CONCURRENCY + LLM_MAX_WAITING
+fall back to the knowledge base, so slow LLM answers can never occupy every
+request thread. The master restarts workers that exit and stops them all on
+SIGTERM or SIGINT, letting in-flight requests finish.
+
+Online learning (ONLINE_LEARNING=1) runs in worker 0 only, since the learner
+owns its buffer directory; it learns from the share of traffic that worker gets.
+The other workers check the registry's manifest every MODEL_SYNC_INTERVAL
+seconds (default 5) and swap in each model worker 0 publishes, under the same
+version, so every worker converges on one model. A restarted worker 0 loads
+the last published model the same way before it resumes learning.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+# serve.py preloads what is safe to share and leaves the rest to the workers.
+# Set rather than removed, so a value in .env cannot turn it back on.
+os.environ["API_PRELOAD"] = ""
+import api  # noqa: E402
+from observability import get_logger  # noqa: E402
+
+log = get_logger("serve")
+
+
+class _RequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        # Per-request timings are in /metrics; keep the access log at debug.
+        log.debug("request", client=self.client_address[0], line=format % args)
+
+
+class PooledWSGIServer(WSGIServer):
+    """wsgiref server on an already-bound socket that handles connections on a thread pool."""
+
+    def __init__(self, sock: socket.socket, app, threads: int):
+        super().__init__(sock.getsockname()[:2], _RequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        host, port = sock.getsockname()[:2]
+        self.server_name = socket.getfqdn(host)
+        self.server_port = port
+        self.setup_environ()
+        self.set_app(app)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="request")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        # Finish in-flight requests; the listening socket belongs to the master.
+        self._pool.shutdown(wait=True)
+
+
+def _run_worker(index: int, sock: socket.socket, threads: int) -> int:
+    if index > 0 and api.ONLINE_LEARNING:
+        api.ONLINE_LEARNING = False
+        api.model_registry.get().watch(float(os.getenv("MODEL_SYNC_INTERVAL", "5")))
+    elif api.ONLINE_LEARNING:
+        # A respawned learner is forked with the master's model; catch up before growing it.
+        api.model_registry.get().sync()
+    server = PooledWSGIServer(sock, api.app, threads)
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever, so it cannot run on this thread.
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    api.llm.get()
+    log.info("worker ready", worker=index, pid=os.getpid(), threads=threads)
+    server.serve_forever(poll_interval=0.5)
+    server.server_close()
+    return 0
+
+
+def preload():
+    """Load the model and knowledge base in the master, before any fork."""
+    registry = api.model_registry.get()
+    if registry.scheduler is None:
+        log.info("waiting for the initial model before forking workers")
+        registry.wait_for_training()
+        # Reload so workers map the compact export rather than the trainer's copy.
+        registry.load()
+    api.knowledge_base.get()
+    gc.collect()
+    gc.freeze()
+
+
+def serve(host: str, port: int, workers: int, threads: int) -> int:
+    preload()
+    sock = socket.create_server((host, port), backlog=2048)
+    # Workers share the socket; a worker that loses an accept race gets EAGAIN instead of blocking.
+    sock.setblocking(False)
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = _run_worker(index, sock, threads)
+            except Exception as exc:
+                log.error("worker crashed", worker=index, error=str(exc))
+            finally:
+                os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+    log.info("serving", host=host, port=sock.getsockname()[1], workers=workers, threads=threads)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if not stopping:
+            log.warning("worker exited; restarting", worker=index, pid=pid, status=status)
+            spawn(index)
+    sock.close()
+    log.info("server stopped")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the API with pre-forked worker processes.")
+    parser.add_argument("--host", default=os.getenv("SERVE_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVE_PORT", "5000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVE_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("SERVE_THREADS", "32")),
+                        help="request threads per worker")
+    args = parser.parse_args(argv)
+    if not hasattr(os, "fork"):
+        parser.error("serve.py needs os.fork; use `python api.py` on this platform")
+
+    chat_threads = int(os.getenv("LLM_MAX_CONCURRENCY", "8")) + int(os.getenv("LLM_MAX_WAITING", "8"))
+    if args.threads <= chat_threads:
+        log.warning("chat can occupy every request thread; raise --threads or lower LLM_MAX_WAITING",
+                    threads=args.threads, chat_threads=chat_threads)
+    return serve(args.host, args.port, max(1, args.workers), max(1, args.threads))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+simulation.py
+Full-schedule simulation behind /api/simulate.
+
+A request names a process set, a subset of ALGORITHMS and a time quantum. Each
+algorithm's Schedule is computed once and kept in a small TTL cache keyed on
+the exact (ordered) workload, so clients paging through a huge schedule, or
+asking for another Gantt window, do not re-run the simulation. Responses carry
+per-process metrics and a run-length-encoded Gantt ([pid, start, duration]
+rows), either as bounded pages or as an NDJSON stream of fixed-size chunks.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from ml_scheduler import ALGORITHMS, MLScheduler, ProcessSample, Schedule
+from ttl_cache import TTLCache
+
+# (default, maximum) page sizes for paginated responses.
+PROCESS_PAGE = (500, 5000)
+GANTT_PAGE = (2000, 20000)
+# Rows per NDJSON line when streaming.
+STREAM_CHUNK = 1000
+
+GANTT_COLUMNS = ["pid", "start", "duration"]
+
+schedule_cache = TTLCache(maxsize=int(os.getenv("SIMULATE_CACHE_SIZE", "16")), ttl=600.0)
+
+
+def _int_param(data: Dict, name: str, default: Optional[int], minimum: int = 0, maximum: Optional[int] = None) -> Optional[int]:
+    value = data.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} must be an integer.")
+    value = int(value)
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}.")
+    return value if maximum is None else min(value, maximum)
+
+
+@dataclass
+class SimulationRequest:
+    processes: List[Dict]
+    pids: List[str]
+    algorithms: List[str]
+    time_quantum: int
+    process_offset: int
+    process_limit: Optional[int]
+    gantt_start: Optional[int]
+    gantt_end: Optional[int]
+    gantt_offset: int
+    gantt_limit: Optional[int]
+
+    @classmethod
+    def parse(cls, data: Dict, stream: bool = False) -> "SimulationRequest":
+        """
+        Validate a request body. Streams default to the whole result; pages
+        default to (and are capped at) PROCESS_PAGE / GANTT_PAGE rows.
+        """
+        processes = data.get("processes")
+        if not isinstance(processes, list) or not processes:
+            raise ValueError("No processes provided")
+        if not all(isinstance(p, dict) for p in processes):
+            raise ValueError("Each process must be an object.")
+
+        algorithms = data.get("algorithms") or ALGORITHMS
+        if isinstance(algorithms, str):
+            algorithms = [algorithms]
+        unknown = [a for a in algorithms if a not in ALGORITHMS]
+        if unknown:
+            raise ValueError(f"Unknown algorithms {unknown}; choose from {ALGORITHMS}.")
+
+        process_page = (None, None) if stream else PROCESS_PAGE
+        gantt_page = (None, None) if stream else GANTT_PAGE
+        return cls(
+            processes=processes,
+            pids=[str(p.get("pid", f"P{i + 1}")) for i, p in enumerate(processes)],
+            algorithms=list(dict.fromkeys(algorithms)),
+            time_quantum=_int_param(data, "time_quantum", 2, minimum=1),
+            process_offset=_int_param(data, "process_offset", 0),
+            process_limit=_int_param(data, "process_limit", process_page[0], minimum=1, maximum=process_page[1]),
+            gantt_start=_int_param(data, "gantt_start", None),
+            gantt_end=_int_param(data, "gantt_end", None),
+            gantt_offset=_int_param(data, "gantt_offset", 0),
+            gantt_limit=_int_param(data, "gantt_limit", gantt_page[0], minimum=1, maximum=gantt_page[1]),
+        )
+
+
+def workload_key(samples: List[ProcessSample]) -> str:
+    """Digest of the exact (ordered) workload, for result caches."""
+    return hashlib.blake2b(
+        repr([(p.burst, p.priority, p.arrival) for p in samples]).encode(), digest_size=16
+    ).hexdigest()
+
+
+def simulate(req: SimulationRequest) -> Dict[str, Schedule]:
+    """Schedules for every requested algorithm, served from the cache when possible."""
+    samples = MLScheduler.to_samples(req.processes)
+    digest = workload_key(samples)
+    scheduler = MLScheduler(time_quantum=req.time_quantum)
+    schedules = {}
+    for algo in req.algorithms:
+        key = (digest, req.time_quantum if algo in ("RR", "RR+Priority") else None, algo)
+        schedule = schedule_cache.get(key)
+        if schedule is None:
+            schedule = scheduler.simulate_schedule(samples, algo)
+            schedule_cache.set(key, schedule)
+        schedules[algo] = schedule
+    return schedules
+
+
+def _process_rows(schedule: Schedule, pids: List[str], offset: int, limit: Optional[int]) -> List[Dict[str, Any]]:
+    rows = schedule.process_metrics(offset, limit)
+    for row in rows:
+        row["pid"] = pids[row["index"]]
+    return rows
+
+
+def _gantt_rows(schedule: Schedule, pids: List[str], first: int, last: int) -> List[list]:
+    return [[pids[i], start, duration] for i, start, duration in schedule.gantt[first:last]]
+
+
+def page(req: SimulationRequest, schedules: Dict[str, Schedule]) -> Dict[str, Any]:
+    """One page of every schedule: a process slice and a slice of the Gantt window."""
+    results = {}
+    for algo, schedule in schedules.items():
+        first, last = schedule.gantt_range(req.gantt_start, req.gantt_end)
+        lo = min(first + req.gantt_offset, last)
+        hi = min(lo + req.gantt_limit, last)
+        process_end = min(req.process_offset + req.process_limit, len(schedule))
+        results[algo] = {
+            "summary": schedule.summary(),
+            "processes": {
+                "offset": req.process_offset,
+                "limit": req.process_limit,
+                "total": len(schedule),
+                "items": _process_rows(schedule, req.pids, req.process_offset, req.process_limit),
+                "next_offset": process_end if process_end < len(schedule) else None,
+            },
+            "gantt": {
+                "columns": GANTT_COLUMNS,
+                "window": [req.gantt_start, req.gantt_end],
+                "offset": req.gantt_offset,
+                "limit": req.gantt_limit,
+                "total": last - first,
+                "segments": _gantt_rows(schedule, req.pids, lo, hi),
+                "next_offset": hi - first if hi < last else None,
+            },
+        }
+    return {"time_quantum": req.time_quantum, "process_count": len(req.processes), "results": results}
+
+
+def stream(req: SimulationRequest, schedules: Dict[str, Schedule]) -> Iterator[str]:
+    """
+    NDJSON lines: a "meta" record, then per algorithm a "summary" followed by
+    "processes" and "gantt" chunks of at most STREAM_CHUNK rows, then "done".
+    """
+    def line(record: Dict[str, Any]) -> str:
+        return json.dumps(record, separators=(",", ":")) + "\n"
+
+    yield line({
+        "type": "meta",
+        "time_quantum": req.time_quantum,
+        "process_count": len(req.processes),
+        "algorithms": list(schedules),
+        "gantt_columns": GANTT_COLUMNS,
+    })
+    for algo, schedule in schedules.items():
+        yield line({"type": "summary", "algorithm": algo, **schedule.summary()})
+
+        stop = len(schedule) if req.process_limit is None else min(len(schedule), req.process_offset + req.process_limit)
+        for offset in range(req.process_offset, stop, STREAM_CHUNK):
+            items = _process_rows(schedule, req.pids, offset, min(STREAM_CHUNK, stop - offset))
+            yield line({"type": "processes", "algorithm": algo, "offset": offset, "items": items})
+
+        first, last = schedule.gantt_range(req.gantt_start, req.gantt_end)
+        lo = min(first + req.gantt_offset, last)
+        hi = last if req.gantt_limit is None else min(lo + req.gantt_limit, last)
+        for offset in range(lo, hi, STREAM_CHUNK):
+            segments = _gantt_rows(schedule, req.pids, offset, min(offset + STREAM_CHUNK, hi))
+            yield line({"type": "gantt", "algorithm": algo, "offset": offset - first, "segments": segments})
+    yield line({"type": "done"})
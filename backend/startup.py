@@ -0,0 +1,100 @@
+"""
+startup.py
+Boot-time bookkeeping for the API process.
+
+BootReport records how long each boot stage took and which top-level packages it
+imported (a coarse, always-on version of ``python -X importtime``). Lazy wraps a
+subsystem factory so it is built on first use, or up front in preload mode,
+with its initialization time added to the report.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+from observability import get_logger
+
+log = get_logger("startup")
+
+T = TypeVar("T")
+
+
+def _top_level_modules() -> set:
+    return {name.partition(".")[0] for name in list(sys.modules)}
+
+
+class BootReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self._known = _top_level_modules()
+        self.stages: List[Tuple[str, float, List[str]]] = []
+        self._lock = threading.Lock()
+
+    def mark(self, stage: str, since: Optional[float] = None) -> float:
+        """
+        Close a stage and return its duration in ms. Boot stages run from the
+        previous mark; pass ``since`` (a perf_counter value) for a stage that
+        started elsewhere, such as a lazy initialization after boot.
+        """
+        with self._lock:
+            now = time.perf_counter()
+            loaded = _top_level_modules()
+            new = sorted(name for name in loaded - self._known if not name.startswith("_"))
+            elapsed = (now - (self._last if since is None else since)) * 1000
+            self.stages.append((stage, elapsed, new))
+            self._known = loaded
+            if since is None:
+                self._last = now
+            return elapsed
+
+    def total_ms(self) -> float:
+        """Wall time from construction to the last boot mark."""
+        return (self._last - self.started) * 1000
+
+    def emit(self):
+        """Log the report as structured events, one per stage."""
+        log.info("boot complete", total_ms=round(self.total_ms(), 1))
+        for stage, elapsed, new in self.stages:
+            log.info("boot stage", stage=stage, ms=round(elapsed, 1), imported=",".join(new))
+
+    def format(self) -> str:
+        lines = [f"[Startup] boot took {self.total_ms():.1f} ms"]
+        for stage, elapsed, new in self.stages:
+            imported = f" (imported: {', '.join(new[:8])}{', ...' if len(new) > 8 else ''})" if new else ""
+            lines.append(f"[Startup]   {stage:<24} {elapsed:8.1f} ms{imported}")
+        return "\n".join(lines)
+
+
+class Lazy(Generic[T]):
+    """Thread-safe, build-once holder for an expensive subsystem."""
+
+    def __init__(self, name: str, factory: Callable[[], T], report: Optional[BootReport] = None):
+        self.name = name
+        self._factory = factory
+        self._report = report
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._ready = False
+
+    @property
+    def initialized(self) -> bool:
+        return self._ready
+
+    def get(self) -> T:
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                started = time.perf_counter()
+                self._value = self._factory()
+                self._ready = True
+                if self._report is not None:
+                    elapsed = self._report.mark(f"init {self.name}", since=started)
+                else:
+                    elapsed = (time.perf_counter() - started) * 1000
+                log.info("subsystem initialized", name=self.name, ms=round(elapsed, 1))
+        return self._value
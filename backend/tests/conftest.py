@@ -0,0 +1,28 @@
+"""
+Shared test setup: the backend modules are imported flat, as the scripts do,
+and nothing a test starts may train over the checked-in model.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_scratch = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("SCHEDULER_MODEL_PATH", os.path.join(_scratch, "ml_scheduler.pkl"))
+os.environ.setdefault("DATASET_CACHE_DIR", os.path.join(_scratch, "dataset_cache"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def trained_scheduler():
+    """A small forest trained on synthetic data, shared by tests that only read it."""
+    from ml_scheduler import MLScheduler
+
+    scheduler = MLScheduler(model_path=os.path.join(_scratch, "trained.pkl"))
+    scheduler.train(*scheduler.generate_dataset(n_samples=300))
+    return scheduler
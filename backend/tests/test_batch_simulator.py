@@ -0,0 +1,49 @@
+import random
+
+import numpy as np
+import pytest
+
+from ml_scheduler import ALGORITHMS, MLScheduler, ProcessSample, _random_workloads, pack_workloads
+
+METRICS = ("avg_waiting", "avg_turnaround", "avg_response")
+
+
+def _idle_heavy_workloads(rng, count):
+    # Sparse arrivals leave the CPU idle between jobs, and equal priorities and
+    # arrivals exercise every tie-break.
+    return [
+        [
+            ProcessSample(burst=rng.randint(1, 6), priority=rng.randint(1, 3), arrival=rng.choice([0, 0, 5, 20, 40]))
+            for _ in range(rng.randint(1, 12))
+        ]
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("time_quantum", [1, 2, 5])
+def test_batch_simulator_matches_per_workload_simulation(time_quantum):
+    rng = random.Random(time_quantum)
+    workloads = _random_workloads(rng, 300, (1, 15)) + _idle_heavy_workloads(rng, 200)
+    scheduler = MLScheduler(time_quantum=time_quantum)
+
+    batch = scheduler.simulate_batch(*pack_workloads(workloads))
+
+    for metric in METRICS:
+        assert batch[metric].shape == (len(workloads), len(ALGORITHMS))
+    for row, processes in enumerate(workloads):
+        for col, algo in enumerate(ALGORITHMS):
+            expected = scheduler._simulate_algorithm(processes, algo)
+            for metric in METRICS:
+                assert batch[metric][row, col] == pytest.approx(expected[metric]), (row, algo, metric)
+
+
+def test_batch_labels_match_per_workload_labels():
+    workloads = _random_workloads(random.Random(3), 400, (3, 10))
+    scheduler = MLScheduler()
+    assert scheduler._label_batch(workloads) == [scheduler._label_best_algorithm(p) for p in workloads]
+
+
+def test_simulate_batch_rejects_bad_lengths():
+    burst, priority, arrival, lengths = pack_workloads([[ProcessSample(3, 1, 0)]])
+    with pytest.raises(ValueError):
+        MLScheduler().simulate_batch(burst, priority, arrival, np.array([2]))
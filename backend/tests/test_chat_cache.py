@@ -0,0 +1,42 @@
+import threading
+import time
+
+from chat_cache import ChatAnswerCache, normalize_prompt
+
+
+def test_normalize_prompt_ignores_case_spacing_and_sentence_punctuation():
+    assert normalize_prompt("  What is Round  Robin?! ") == normalize_prompt("what is round robin")
+    assert normalize_prompt("Paging, segmentation; and swapping.") == "paging segmentation and swapping"
+
+
+def test_normalize_prompt_keeps_numbers_apart():
+    assert normalize_prompt("quantum 3.5") == "quantum 3.5"
+    assert normalize_prompt("Quantum 3.5?") == normalize_prompt("quantum 3.5")
+    assert normalize_prompt("quantum 3.5") != normalize_prompt("quantum 35")
+    assert normalize_prompt("quantum 3.5") != normalize_prompt("quantum 3 5")
+
+
+def test_concurrent_prompts_share_one_computation():
+    cache = ChatAnswerCache()
+    release, calls, results = threading.Event(), [], []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("What is FCFS?", compute)))
+    leader.start()
+    while not cache.flights._calls:
+        time.sleep(0.01)
+    follower = threading.Thread(target=lambda: results.append(cache.get_or_compute("what is fcfs", compute)))
+    follower.start()
+    while not cache.flights.coalesced:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(calls) == 1
+    assert sorted(how for _, how in results) == ["coalesced", "computed"]
+    assert cache.get_or_compute("WHAT IS FCFS", compute) == ("answer", "cache")
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from compact_model import CompactForest, export_forest
+from ml_scheduler import MLScheduler, _random_workloads
+
+
+@pytest.fixture(scope="module")
+def features(trained_scheduler):
+    workloads = _random_workloads(random.Random(99), 400, (1, 20))
+    return np.vstack([trained_scheduler.extract_features(processes) for processes in workloads])
+
+
+def _assert_same_predictions(compact, model, X):
+    np.testing.assert_array_equal(compact.classes_, model.classes_)
+    assert compact.n_features_in_ == model.n_features_in_
+    np.testing.assert_array_equal(compact.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(compact.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_compact_forest_matches_sklearn(tmp_path, trained_scheduler, features, mmap):
+    path = trained_scheduler.export_compact(tmp_path / "model.npz")
+    compact = CompactForest.load(path, mmap=mmap)
+
+    assert compact.n_estimators == len(trained_scheduler.model.estimators_)
+    assert isinstance(compact.value.base, np.memmap) == mmap
+    _assert_same_predictions(compact, trained_scheduler.model, features)
+
+
+def test_scheduler_serves_the_compact_export(tmp_path, trained_scheduler, features):
+    path = trained_scheduler.export_compact(tmp_path / "model.npz")
+    served = MLScheduler(model_path=tmp_path / "model.pkl")
+
+    assert served.load(path) and served.is_ready()
+    assert isinstance(served.model, CompactForest)
+    _assert_same_predictions(served.model, trained_scheduler.model, features)
+    processes = [{"burst": 7, "priority": 2, "arrival": 0}, {"burst": 3, "priority": 1, "arrival": 4}]
+    assert served.predict_with_confidence(processes) == trained_scheduler.predict_with_confidence(processes)
+
+
+def test_single_tree_is_stored_as_a_forest_of_one(tmp_path, trained_scheduler, features):
+    X, y = trained_scheduler.generate_dataset(n_samples=300)
+    tree = DecisionTreeClassifier(max_depth=6, random_state=0).fit(X, y)
+    compact = CompactForest.load(export_forest(tree, tmp_path / "tree.npz"))
+
+    assert compact.n_estimators == 1
+    _assert_same_predictions(compact, tree, features)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from dataset_cache import DatasetCache
+from ml_scheduler import MLScheduler
+
+
+@pytest.fixture
+def scheduler():
+    return MLScheduler()
+
+
+@pytest.mark.parametrize("n_jobs, chunk_size", [(None, 1024), (1, 150)])
+def test_cached_matches_uncached_while_growing_and_shrinking(tmp_path, scheduler, n_jobs, chunk_size):
+    cache = DatasetCache(tmp_path, block_rows=70)
+    for n_samples in (200, 90, 430, 450):
+        expected_X, expected_y = scheduler.generate_dataset(n_samples=n_samples, n_jobs=n_jobs, chunk_size=chunk_size)
+        X, y = scheduler.generate_dataset(n_samples=n_samples, n_jobs=n_jobs, chunk_size=chunk_size, cache=cache)
+        assert isinstance(X, np.memmap) and isinstance(y, np.memmap)
+        np.testing.assert_array_equal(X, expected_X)
+        np.testing.assert_array_equal(y, expected_y)
+    [entry] = cache.entries()
+    assert entry["rows"] == 450
+
+
+def test_parameters_select_separate_entries(tmp_path):
+    cache = DatasetCache(tmp_path)
+    MLScheduler(time_quantum=2).generate_dataset(n_samples=20, cache=cache)
+    MLScheduler(time_quantum=3).generate_dataset(n_samples=20, cache=cache)
+    MLScheduler(time_quantum=2).generate_dataset(n_samples=20, seed=1, cache=cache)
+    assert len(cache.entries()) == 3
+
+
+def test_interrupted_append_and_corrupt_metadata_recover(tmp_path, scheduler):
+    cache = DatasetCache(tmp_path, block_rows=50)
+    scheduler.generate_dataset(n_samples=100, cache=cache)
+    entry = cache.entry(cache.params(scheduler, (3, 10), 42, None, 1024))
+
+    # Bytes past the committed rows, as a crash between the data and meta writes leaves them.
+    with open(entry / "X.npy", "ab") as f:
+        f.write(b"\0" * 1000)
+    X, y = scheduler.generate_dataset(n_samples=160, cache=cache)
+    expected_X, expected_y = scheduler.generate_dataset(n_samples=160)
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+    (entry / "meta.json").write_text("{", encoding="utf-8")
+    X, _ = scheduler.generate_dataset(n_samples=30, cache=cache)
+    np.testing.assert_array_equal(X, expected_X[:30])
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from ml_scheduler import MLScheduler
+
+
+def test_chunked_dataset_is_independent_of_worker_count():
+    scheduler = MLScheduler()
+    X1, y1 = scheduler.generate_dataset(n_samples=300, n_jobs=1, chunk_size=70)
+    X2, y2 = scheduler.generate_dataset(n_samples=300, n_jobs=2, chunk_size=70)
+    np.testing.assert_array_equal(X1, X2)
+    np.testing.assert_array_equal(y1, y2)
+    assert len(y1) == 300
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"n_samples": 0},
+    {"n_samples": 10, "chunk_size": 0},
+    {"n_samples": 10, "n_jobs": 1, "chunk_size": -5},
+])
+def test_generate_dataset_rejects_empty_requests(kwargs):
+    with pytest.raises(ValueError, match="must be at least 1"):
+        MLScheduler().generate_dataset(**kwargs)
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from memory_allocator import POLICIES, MemoryAllocator, read_trace, replay
+
+
+class NaiveAllocator:
+    """Address-ordered hole list scanned on every request, like the frontend."""
+
+    def __init__(self, memory_size, policy):
+        self.policy = policy
+        self.holes = [[0, memory_size]]
+        self.blocks = {}
+
+    def allocate(self, block_id, size):
+        fits = [h for h in self.holes if h[1] >= size]
+        if not fits:
+            return None
+        if self.policy == "first_fit":
+            hole = fits[0]
+        elif self.policy == "best_fit":
+            hole = min(fits, key=lambda h: (h[1], h[0]))
+        else:
+            hole = min(fits, key=lambda h: (-h[1], h[0]))
+        start = hole[0]
+        hole[0] += size
+        hole[1] -= size
+        if hole[1] == 0:
+            self.holes.remove(hole)
+        self.blocks[block_id] = (start, size)
+        return start
+
+    def free(self, block_id):
+        start, size = self.blocks.pop(block_id)
+        self.holes.append([start, size])
+        self.holes.sort()
+        merged = []
+        for hole in self.holes:
+            if merged and merged[-1][0] + merged[-1][1] == hole[0]:
+                merged[-1][1] += hole[1]
+            else:
+                merged.append(hole)
+        self.holes = merged
+
+
+def _random_trace(seed, events=4000, max_size=60):
+    rng = random.Random(seed)
+    live, trace = [], []
+    for i in range(events):
+        if live and rng.random() < 0.45:
+            trace.append(("free", live.pop(rng.randrange(len(live)))))
+        else:
+            trace.append(("alloc", i, rng.randint(1, max_size)))
+            live.append(i)
+    return trace
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_allocator_matches_naive_fit(policy, seed):
+    memory_size = 3000
+    allocator, naive = MemoryAllocator(memory_size, policy), NaiveAllocator(memory_size, policy)
+    failed = set()
+    for event in _random_trace(seed):
+        if event[0] == "alloc":
+            got = allocator.allocate(event[1], event[2])
+            assert got == naive.allocate(event[1], event[2]), event
+            if got is None:
+                failed.add(event[1])
+        elif event[1] not in failed:
+            allocator.free(event[1])
+            naive.free(event[1])
+        assert allocator.holes() == [tuple(h) for h in naive.holes]
+    assert allocator.largest_free == max((h[1] for h in naive.holes), default=0)
+
+
+def test_replay_reads_text_traces(tmp_path):
+    path = tmp_path / "trace.txt"
+    path.write_text("# comment\nalloc A 600\na B 500\nfree A\n\nf B  # trailing\nalloc C 1000\n", encoding="utf-8")
+    report = replay(read_trace(path), "first_fit", memory_size=1000, sample_every=2)
+    assert (report.events, report.allocations, report.frees, report.failed_allocations) == (5, 3, 2, 1)
+    assert report.timeline[-1].used == 1000
+
+
+def test_allocator_rejects_double_free():
+    allocator = MemoryAllocator(100)
+    allocator.allocate("a", 10)
+    allocator.free("a")
+    with pytest.raises(ValueError):
+        allocator.free("a")
@@ -0,0 +1,134 @@
+import json
+import threading
+
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from compact_model import CompactForest
+from ml_scheduler import MLScheduler
+from model_registry import ModelRegistry
+
+PROCESSES = [{"burst": 7, "priority": 2, "arrival": 0}, {"burst": 3, "priority": 1, "arrival": 4}]
+
+
+def _registry(tmp_path):
+    return ModelRegistry(model_path=tmp_path / "ml_scheduler.pkl", state_dir=tmp_path / "state")
+
+
+@pytest.fixture(scope="module")
+def constant_scheduler(trained_scheduler):
+    """A model that always answers SJF, so its predictions differ from the trained one's."""
+    X, y = trained_scheduler.generate_dataset(n_samples=50)
+    scheduler = MLScheduler()
+    scheduler.model = DecisionTreeClassifier().fit(X, ["SJF"] * len(y))
+    return scheduler
+
+
+def test_publish_serves_and_persists_the_model(tmp_path, trained_scheduler):
+    registry = _registry(tmp_path)
+    assert registry.version == 0 and registry.scheduler is None
+    assert registry.predict_with_confidence(PROCESSES)[2] == "heuristic"
+
+    version = registry.publish(trained_scheduler, "retrain")
+
+    assert version == registry.version == 1
+    assert registry.scheduler is trained_scheduler
+    assert registry.model_info["tag"] == "retrain"
+    algo, confidence, source = registry.predict_with_confidence(PROCESSES)
+    assert (algo, confidence, source) == (*trained_scheduler.predict_with_confidence(PROCESSES), "model")
+    assert json.loads(registry.manifest_path.read_text())["version"] == 1
+
+    # A restart serves the published compact export under the same version,
+    # and the checked-in model_path is never written.
+    restarted = _registry(tmp_path)
+    assert restarted.load()
+    assert restarted.version == 1 and isinstance(restarted.scheduler.model, CompactForest)
+    assert restarted.predict_with_confidence(PROCESSES) == (algo, confidence, "model")
+    assert not registry.model_path.exists()
+
+
+def test_swap_evicts_cached_predictions(tmp_path, trained_scheduler, constant_scheduler):
+    registry = _registry(tmp_path)
+    registry.publish(trained_scheduler, "retrain", persist=False)
+    first = registry.predict_with_confidence(PROCESSES)
+    assert registry.predict_with_confidence(list(reversed(PROCESSES))) == first
+    batch = registry.predict_batch([PROCESSES])
+    assert registry.cache.stats()["hits"] >= 2 and len(registry.cache) == 1
+
+    registry.publish(constant_scheduler, "online", persist=False)
+
+    assert len(registry.cache) == 0
+    assert registry.predict_with_confidence(PROCESSES) == ("SJF", 1.0, "model")
+    assert registry.predict_batch([PROCESSES]) == [{"suggested_algorithm": "SJF", "confidence": 1.0, "source": "model"}]
+    assert batch[0]["suggested_algorithm"] == first[0]
+    # Keys carry the version, so an entry left by the old model could never be served.
+    assert all(key[0] == 2 for key in registry.cache._data)
+
+
+def test_readers_never_see_a_version_with_another_model(tmp_path, trained_scheduler, constant_scheduler):
+    registry = _registry(tmp_path)
+    published, mismatches, done = {}, [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            version, scheduler = registry._serving
+            if version in published and published[version] is not scheduler:
+                mismatches.append(version)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(200):
+        scheduler = trained_scheduler if i % 2 else constant_scheduler
+        # Recorded before the swap, since the reader may see it right after.
+        published[registry.version + 1] = scheduler
+        registry.publish(scheduler, "online", persist=False)
+    done.set()
+    reader.join()
+
+    assert registry.version == 200 and not mismatches
+
+
+def test_sync_takes_only_a_newer_manifest(tmp_path, trained_scheduler, constant_scheduler):
+    publisher, follower = _registry(tmp_path), _registry(tmp_path)
+    assert not follower.sync() and follower.version == 0
+
+    publisher.publish(trained_scheduler, "online")
+    publisher.publish(trained_scheduler, "online")
+    follower.predict_with_confidence(PROCESSES)
+    assert follower.sync()
+    assert follower.version == 2 and follower.model_info["synced"]
+    assert follower.model_info["tag"] == "online"
+    assert len(follower.cache) == 0
+    assert follower.predict_with_confidence(PROCESSES)[:2] == trained_scheduler.predict_with_confidence(PROCESSES)
+
+    # Nothing newer: sync keeps what it serves.
+    assert not follower.sync() and follower.version == 2
+
+    # An older manifest never replaces a newer local model.
+    follower.publish(constant_scheduler, "retrain", persist=False)
+    follower.publish(constant_scheduler, "retrain", persist=False)
+    assert not follower.sync()
+    assert follower.version == 4 and follower.scheduler is constant_scheduler
+
+
+def test_sync_ignores_an_unreadable_manifest(tmp_path, trained_scheduler):
+    publisher, follower = _registry(tmp_path), _registry(tmp_path)
+    publisher.publish(trained_scheduler, "online")
+    publisher.manifest_path.write_text("{not json", encoding="utf-8")
+
+    assert not follower.sync() and follower.version == 0
+
+
+def test_stale_publisher_outranks_the_saved_manifest(tmp_path, trained_scheduler):
+    learner, follower = _registry(tmp_path), _registry(tmp_path)
+    learner.publish(trained_scheduler, "online")
+    learner.publish(trained_scheduler, "online")
+    assert follower.sync() and follower.version == 2
+
+    # A respawned learner starts from the master's older model and version.
+    respawned = _registry(tmp_path)
+    version = respawned.publish(trained_scheduler, "online")
+
+    assert version == 3
+    assert follower.sync() and follower.version == 3
+    assert learner.sync() and learner.version == 3
@@ -0,0 +1,77 @@
+from collections import OrderedDict, deque
+
+import numpy as np
+import pytest
+
+from page_replacement import fault_curve, load_references, simulate
+
+
+def _naive_faults(refs, frames, algorithm):
+    """Textbook simulation, one list scan per reference."""
+    faults = 0
+    fifo, lru = deque(), OrderedDict()
+    for i, page in enumerate(refs):
+        if algorithm == "FIFO":
+            if page in fifo:
+                continue
+            faults += 1
+            if len(fifo) == frames:
+                fifo.popleft()
+            fifo.append(page)
+        elif algorithm == "LRU":
+            if page in lru:
+                lru.move_to_end(page)
+                continue
+            faults += 1
+            if len(lru) == frames:
+                lru.popitem(last=False)
+            lru[page] = True
+        else:  # Optimal: evict the page used farthest in the future (or never).
+            if page in lru:
+                continue
+            faults += 1
+            if len(lru) == frames:
+                future = list(refs[i + 1:])
+                victim = max(lru, key=lambda p: future.index(p) if p in future else len(future))
+                del lru[victim]
+            lru[page] = True
+    return faults
+
+
+def _trace(seed, length=600, pages=25):
+    rng = np.random.default_rng(seed)
+    # A hot set plus uniform noise, so fault counts vary with the frame count.
+    hot = rng.integers(0, 5, length)
+    cold = rng.integers(0, pages, length)
+    return np.where(rng.random(length) < 0.6, hot, cold).tolist()
+
+
+@pytest.mark.parametrize("algorithm", ["FIFO", "LRU", "Optimal"])
+@pytest.mark.parametrize("frames", [1, 3, 7])
+def test_simulate_matches_naive(algorithm, frames):
+    refs = _trace(frames)
+    assert simulate(refs, frames, algorithm).page_faults == _naive_faults(refs, frames, algorithm)
+
+
+@pytest.mark.parametrize("algorithm", ["LRU", "Optimal"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_fault_curve_matches_direct_simulation(algorithm, seed):
+    refs = _trace(seed)
+    max_frames = 30  # beyond the number of distinct pages
+    curve = fault_curve(refs, max_frames, algorithm, chunk_size=97)
+    direct = [simulate(refs, k, algorithm).page_faults for k in range(1, max_frames + 1)]
+    assert curve.tolist() == direct
+
+
+def test_fault_curve_rejects_non_stack_policies():
+    with pytest.raises(ValueError):
+        fault_curve([1, 2, 3], 3, "FIFO")
+
+
+def test_memory_mapped_trace_matches_list(tmp_path):
+    refs = _trace(5, length=2000)
+    path = tmp_path / "trace.npy"
+    np.save(path, np.array(refs, dtype=np.uint32))
+    mapped = load_references(path)
+    for algorithm in ("FIFO", "LRU", "Optimal", "Clock"):
+        assert simulate(mapped, 4, algorithm, chunk_size=128).page_faults == simulate(refs, 4, algorithm).page_faults
@@ -0,0 +1,34 @@
+import pytest
+
+from model_registry import ModelRegistry
+
+VALID = [{"burst": 5, "priority": 1, "arrival": 0}, {"burst": 2, "priority": 2, "arrival": 1}]
+OVERFLOWING = [
+    [{"burst": 10**30}],
+    [{"burst": float("inf")}],
+    [{"burst": 3}, {"burst": 4, "arrival": float("inf")}],
+    [{"priority": 2**63}],
+]
+
+
+@pytest.mark.parametrize("bad", OVERFLOWING)
+def test_overflowing_workload_is_reported_alone(trained_scheduler, bad):
+    results = trained_scheduler.predict_batch([VALID, bad, VALID])
+
+    assert results[1] == {"error": results[1]["error"]}
+    assert results[1]["error"].startswith("workload 1:")
+    expected = trained_scheduler.predict_with_confidence(VALID)
+    for result in (results[0], results[2]):
+        assert result["suggested_algorithm"] == expected[0]
+        assert result["confidence"] == pytest.approx(expected[1])
+
+
+@pytest.mark.parametrize("bad", OVERFLOWING)
+def test_registry_batch_reports_overflowing_workload(tmp_path, trained_scheduler, bad):
+    registry = ModelRegistry(model_path=tmp_path / "model.pkl")
+    heuristic = registry.predict_batch([bad, VALID])
+    assert "error" in heuristic[0] and heuristic[1]["source"] == "heuristic"
+
+    registry.publish(trained_scheduler, "test", persist=False)
+    served = registry.predict_batch([bad, VALID])
+    assert "error" in served[0] and served[1]["source"] == "model"
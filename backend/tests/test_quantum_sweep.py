@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from ml_scheduler import MLScheduler, ProcessSample, _score
+from quantum_sweep import RR_FAMILY, SweepRequest, _gantt_switches, sweep, sweep_round_robin
+
+
+def _direct(processes, quantum, algo):
+    schedule = MLScheduler(time_quantum=quantum).simulate_schedule(processes, algo)
+    summary = schedule.summary()
+    metrics = {m: summary[m] for m in ("avg_waiting", "avg_turnaround", "avg_response")}
+    metrics["score"] = float(_score(metrics))
+    metrics["context_switches"] = _gantt_switches(schedule.gantt)
+    return metrics
+
+
+def _workload(seed, n):
+    rng = random.Random(seed)
+    return [
+        ProcessSample(burst=rng.randint(1, 30), priority=rng.randint(1, 4), arrival=rng.choice([0, rng.randint(0, 60)]))
+        for _ in range(n)
+    ]
+
+
+@pytest.mark.parametrize("algo", RR_FAMILY)
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_sweep_matches_per_quantum_simulation(algo, seed):
+    processes = _workload(seed, 12)
+    quanta = list(range(1, 35))
+    results, branches = sweep_round_robin(processes, quanta, priority=algo == "RR+Priority")
+    assert branches <= len(quanta)
+    for q in quanta:
+        expected = _direct(processes, q, algo)
+        for metric, value in expected.items():
+            assert results[q][metric] == pytest.approx(value), (q, metric)
+
+
+def test_sweep_response_reports_best_quantum():
+    processes = [{"burst": p.burst, "priority": p.priority, "arrival": p.arrival} for p in _workload(7, 8)]
+    response = sweep(SweepRequest.parse({"processes": processes, "algorithms": ["RR", "FCFS"], "metric": "avg_waiting"}))
+    curve = response["results"]["RR"]["curve"]
+    best = response["results"]["RR"]["best_quantum"]
+    assert min(curve["avg_waiting"]) == response["results"]["RR"]["best"]["avg_waiting"]
+    assert curve["avg_waiting"][curve["time_quantum"].index(best)] == min(curve["avg_waiting"])
+    assert "FCFS" in response["baselines"]
+
+
+def test_sweep_request_validation():
+    with pytest.raises(ValueError):
+        SweepRequest.parse({"processes": [{"burst": 3}], "algorithms": ["FCFS"]})
+    with pytest.raises(ValueError):
+        SweepRequest.parse({"processes": [{"burst": 3}], "quantum_min": 1, "quantum_max": 10 ** 6})
@@ -0,0 +1,18 @@
+import random
+
+from ml_scheduler import MLScheduler, ProcessSample
+
+
+def test_gantt_range_matches_linear_scan():
+    rng = random.Random(0)
+    processes = [ProcessSample(rng.randint(1, 9), rng.randint(1, 5), rng.randint(0, 400)) for _ in range(200)]
+    schedule = MLScheduler().simulate_schedule(processes, "RR")
+    for _ in range(500):
+        start = rng.choice([None, rng.randint(-5, schedule.total_time + 5)])
+        end = rng.choice([None, rng.randint(-5, schedule.total_time + 5)])
+        overlapping = [
+            i for i, (_, s, d) in enumerate(schedule.gantt)
+            if (start is None or s + d > start) and (end is None or s < end)
+        ]
+        first, last = schedule.gantt_range(start, end)
+        assert list(range(first, last)) == overlapping, (start, end)
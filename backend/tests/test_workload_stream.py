@@ -0,0 +1,67 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from ml_scheduler import MLScheduler
+from workload_stream import features_from_stream
+
+
+def _workload(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"burst": int(b), "priority": int(p), "arrival": int(a)}
+        for b, p, a in zip(rng.integers(1, 30, n), rng.integers(0, 10, n), rng.integers(0, 500, n))
+    ]
+
+
+def _ndjson(processes):
+    return "".join(json.dumps(p) + "\n" for p in processes)
+
+
+def _csv(processes):
+    return "pid,burst,priority,arrival\n" + "".join(
+        f"P{i},{p['burst']},{p['priority']},{p['arrival']}\n" for i, p in enumerate(processes)
+    )
+
+
+@pytest.mark.parametrize("encode", [_ndjson, _csv])
+def test_streamed_features_match_extract_features(encode):
+    processes = _workload(5000)
+    expected = MLScheduler().extract_features(MLScheduler.to_samples(processes))
+    features, count = features_from_stream(io.StringIO(encode(processes)), chunk_rows=777)
+    assert count == len(processes)
+    np.testing.assert_allclose(features, expected, rtol=1e-12)
+
+
+def test_ndjson_rejects_several_values_on_one_line():
+    body = '{"burst": 1}\n{"burst": 3},{"burst": 4}\n{"burst": 2}\n'
+    with pytest.raises(ValueError, match="^Line 2:"):
+        features_from_stream(io.StringIO(body))
+
+
+def test_ndjson_rejects_values_outside_int64():
+    with pytest.raises(ValueError, match="^Line 2:"):
+        features_from_stream(io.StringIO('{"burst": 1}\n{"burst": 100000000000000000000000}\n'))
+    with pytest.raises(ValueError, match="^Line 1:"):
+        features_from_stream(io.StringIO('{"burst": NaN}\n'))
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-inf", "1e30"])
+def test_csv_rejects_non_finite_and_huge_values(value):
+    with pytest.raises(ValueError, match="^Row 3:"):
+        features_from_stream(io.StringIO(f"burst,priority\n4,1\n{value},2\n"))
+    # Blank cells send the chunk down the per-row path, which must reject them too.
+    with pytest.raises(ValueError, match="^Row 3:"):
+        features_from_stream(io.StringIO(f"burst,priority\n4,\n{value},2\n"))
+
+
+def test_ingest_endpoint_answers_400_for_non_finite_csv():
+    import api
+
+    response = api.app.test_client().post(
+        "/api/suggest-algorithm/ingest", data="burst\nnan\n", content_type="text/csv"
+    )
+    assert response.status_code == 400
+    assert "Row 2" in response.get_json()["error"]
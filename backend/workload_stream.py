@@ -0,0 +1,289 @@
+"""
+workload_stream.py
+One-pass feature extraction for workloads too large to hold in memory.
+
+iter_chunks() parses NDJSON (one process object per line) or CSV (a header
+row naming burst/burstTime, priority and arrival/arrivalTime columns) from
+any text or binary stream in fixed-size chunks of rows, normalized like
+MLScheduler.to_samples. FeatureAccumulator keeps a
+running count, mean and sum of squared deviations (Welford) per column.
+Records are folded in as fixed-size chunks with Chan's parallel update, so
+memory stays constant in the number of processes. features() matches
+MLScheduler.extract_features to float rounding.
+
+    python workload_stream.py trace.ndjson            # features as JSON
+    python workload_stream.py trace.csv.gz --predict  # plus the model's suggestion
+
+/api/suggest-algorithm/ingest runs the same path over the request body.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import sys
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ml_scheduler import normalize_process
+from observability import configure_logging
+
+FORMATS = ("ndjson", "csv")
+CSV_COLUMNS = ("burst", "burstTime", "priority", "arrival", "arrivalTime")
+CHUNK_ROWS = 8192
+# Values must be finite and fit the int64 columns the chunks are stored in.
+_INT64_LIMIT = float(2 ** 63)
+
+
+class RunningStats:
+    """Count, mean and M2 (sum of squared deviations) of a stream of values."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray):
+        """Fold in a chunk of values (Chan et al.'s pairwise combination)."""
+        n = len(values)
+        if not n:
+            return
+        values = np.asarray(values, dtype=float)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation, like np.std."""
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+
+class FeatureAccumulator:
+    """Running extract_features over (burst, priority, arrival) columns."""
+
+    def __init__(self):
+        self.burst = RunningStats()
+        self.priority = RunningStats()
+        self.arrival = RunningStats()
+        self.total_burst = 0
+
+    @property
+    def count(self) -> int:
+        return self.burst.count
+
+    def update(self, burst: np.ndarray, priority: np.ndarray, arrival: np.ndarray):
+        self.burst.update(burst)
+        self.priority.update(priority)
+        self.arrival.update(arrival)
+        self.total_burst += int(np.sum(burst, dtype=np.int64))
+
+    def features(self) -> np.ndarray:
+        if not self.count:
+            raise ValueError("No processes provided")
+
+        def column(stats: RunningStats):
+            # Coefficient of variation, as in extract_features.
+            return stats.mean, stats.std, stats.std / max(stats.mean, 1e-6)
+
+        return np.array([
+            self.count,
+            *column(self.burst),
+            *column(self.priority),
+            *column(self.arrival),
+            float(self.total_burst),
+        ], dtype=float)
+
+
+def _text(stream: IO) -> IO[str]:
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+
+def _csv_number(value: str):
+    value = value.strip()
+    if not value:
+        return None
+    number = float(value)
+    if not -_INT64_LIMIT <= number < _INT64_LIMIT:
+        raise ValueError(f"{value!r} is not a finite 64-bit number")
+    return int(number) if number.is_integer() else number
+
+
+def _reject_constant(name: str):
+    raise ValueError(f"{name} is not a finite number")
+
+
+def _ndjson_line_errors(lines: List[str], first_line: int):
+    """Raise ValueError naming the first line that is not exactly one JSON value."""
+    for offset, line in enumerate(lines):
+        try:
+            json.loads(line, parse_constant=_reject_constant)
+        except ValueError as exc:
+            raise ValueError(f"Line {first_line + offset}: {exc}") from None
+
+
+def _ndjson_chunk(lines: List[str], first_line: int) -> np.ndarray:
+    try:
+        # One parser call per chunk rather than per line.
+        records = json.loads("[" + ",".join(lines) + "]", parse_constant=_reject_constant)
+    except ValueError:
+        _ndjson_line_errors(lines, first_line)
+        raise
+    if len(records) != len(lines):
+        # A line holding several values ("{...},{...}") parses as part of the array.
+        _ndjson_line_errors(lines, first_line)
+        raise ValueError(f"Lines {first_line}-{first_line + len(lines) - 1}: expected one process per line.")
+    rows = []
+    for offset, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {first_line + offset}: each process must be an object.")
+        try:
+            rows.append(normalize_process(record))
+        except OverflowError as exc:
+            raise ValueError(f"Line {first_line + offset}: {exc}") from None
+    try:
+        return np.array(rows, dtype=np.int64).reshape(-1, 3)
+    except OverflowError:
+        for offset, row in enumerate(rows):
+            if not all(-_INT64_LIMIT <= value < _INT64_LIMIT for value in row):
+                raise ValueError(f"Line {first_line + offset}: values must fit in 64 bits.") from None
+        raise
+
+
+def _csv_chunk(rows: List[List[str]], header: Dict[str, int], first_row: int) -> np.ndarray:
+    """
+    Vectorized normalize_process over CSV rows; blank or short rows go one by
+    one. Non-finite values and values outside int64 are rejected by row.
+    """
+    def column(*names: str):
+        for name in names:
+            if name in header:
+                i = header[name]
+                return np.array([row[i] for row in rows], dtype=float)
+        return None
+
+    try:
+        burst = column("burst", "burstTime")
+        priority = column("priority")
+        arrival = column("arrival", "arrivalTime")
+    except (ValueError, IndexError):
+        pass
+    else:
+        n = len(rows)
+        for values in (burst, priority, arrival):
+            if values is not None:
+                bad = ~((values >= -_INT64_LIMIT) & (values < _INT64_LIMIT))
+                if bad.any():
+                    row = int(np.argmax(bad))
+                    raise ValueError(f"Row {first_row + row}: {values[row]:g} is not a finite 64-bit number")
+        return np.column_stack([
+            np.maximum(1, burst if burst is not None else np.ones(n)),
+            np.maximum(0, priority if priority is not None else np.zeros(n)),
+            np.maximum(0, arrival if arrival is not None else np.zeros(n)),
+        ]).astype(np.int64)
+
+    records = []
+    for offset, row in enumerate(rows):
+        try:
+            values = {name: _csv_number(row[i]) if i < len(row) else None for name, i in header.items()}
+        except ValueError as exc:
+            raise ValueError(f"Row {first_row + offset}: {exc}") from None
+        records.append(normalize_process({k: v for k, v in values.items() if v is not None}))
+    return np.array(records, dtype=np.int64).reshape(-1, 3)
+
+
+def iter_chunks(stream: IO, fmt: Optional[str] = None, chunk_rows: int = CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """
+    Normalized (rows, 3) int64 arrays of burst, priority and arrival from an
+    NDJSON or CSV stream, at most ``chunk_rows`` rows each. Without ``fmt``
+    the format is sniffed from the first non-blank line ("{" means NDJSON).
+    """
+    lines = iter(_text(stream))
+    first = next((line for line in lines if line.strip()), None)
+    if first is None:
+        return
+    if fmt is None:
+        fmt = "ndjson" if first.lstrip().startswith("{") else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; choose from {list(FORMATS)}.")
+
+    if fmt == "ndjson":
+        numbered = ((n, line) for n, line in enumerate(itertools.chain([first], lines), start=1) if line.strip())
+        while True:
+            batch = list(itertools.islice(numbered, chunk_rows))
+            if not batch:
+                return
+            yield _ndjson_chunk([line for _, line in batch], batch[0][0])
+
+    reader = csv.reader(itertools.chain([first], lines))
+    # Other columns (pid, name, ...) are ignored.
+    header = {name.strip(): i for i, name in enumerate(next(reader)) if name.strip() in CSV_COLUMNS}
+    rows = (row for row in reader if row)
+    first_row = 2
+    while True:
+        batch = list(itertools.islice(rows, chunk_rows))
+        if not batch:
+            return
+        yield _csv_chunk(batch, header, first_row)
+        first_row += len(batch)
+
+
+def features_from_stream(stream: IO, fmt: Optional[str] = None, chunk_rows: int = CHUNK_ROWS) -> Tuple[np.ndarray, int]:
+    """Feature vector and process count of a streamed workload, in one pass."""
+    accumulator = FeatureAccumulator()
+    for chunk in iter_chunks(stream, fmt, chunk_rows):
+        accumulator.update(chunk[:, 0], chunk[:, 1], chunk[:, 2])
+    return accumulator.features(), accumulator.count
+
+
+def format_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    if "ndjson" in content_type or "jsonl" in content_type or "jsonlines" in content_type:
+        return "ndjson"
+    return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compute scheduler features for a workload trace in one pass.")
+    parser.add_argument("path", help="NDJSON or CSV trace (optionally .gz); - reads stdin")
+    parser.add_argument("--format", choices=FORMATS, help="input format (sniffed by default)")
+    parser.add_argument("--predict", action="store_true", help="also suggest an algorithm with the saved model")
+    parser.add_argument("--model", default="ml_scheduler.pkl", help="model used by --predict")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    if args.path == "-":
+        stream = sys.stdin.buffer
+    elif args.path.endswith(".gz"):
+        stream = gzip.open(args.path, "rb")
+    else:
+        stream = open(args.path, "rb")
+    with stream:
+        features, count = features_from_stream(stream, args.format)
+    result = {"process_count": count, "features": features.tolist()}
+    if args.predict:
+        from ml_scheduler import MLScheduler
+
+        algo, confidence = MLScheduler(model_path=args.model).predict_features(features)
+        result.update(suggested_algorithm=str(algo), confidence=confidence)
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())